@@ -0,0 +1,61 @@
+"""
+DialogManager.show()/close() のベンチマーク
+
+テンプレートキャッシュ無し（従来動作: 毎回定義を解釈してウィジェットを生成）と
+テンプレートキャッシュ有り（コンパイル済みテンプレートから複製）、
+インスタンスプール有り（閉じたダイアログを初期状態に戻して再利用）で、
+1秒あたりの show()/close() サイクル数を比較する。
+
+実行方法:
+    python benchmarks/bench_dialog_show.py [--cycles N]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dialog_manager import DialogManager
+
+DIALOG_IDS = ["IDD_DEVICE_ID_EDIT", "IDD_TIMER_COUNTER_EDIT", "IDD_FILE_OPEN", "IDD_COMPARE_DEVICE_EDIT"]
+
+
+def measure_cycles(manager: DialogManager, dialog_id: str, cycles: int) -> float:
+    """show()/close() を指定回数繰り返し、1秒あたりのサイクル数を返す"""
+    # 初回のテンプレート生成はウォームアップとして計測から除外
+    manager.show(dialog_id)
+    manager.close()
+
+    start = time.perf_counter()
+    for _ in range(cycles):
+        manager.show(dialog_id)
+        manager.close()
+    elapsed = time.perf_counter() - start
+    return cycles / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DialogManager show()/close() benchmark")
+    parser.add_argument("--cycles", type=int, default=20000, help="計測するサイクル数")
+    parser.add_argument("--json", default=os.path.join(ROOT_DIR, "dialogs.json"), help="ダイアログ定義ファイル")
+    args = parser.parse_args()
+
+    before = DialogManager(args.json, use_templates=False)
+    after = DialogManager(args.json, use_templates=True)
+    pooled = DialogManager(args.json, use_templates=True)
+
+    print(f"{'dialog':<26}{'before (cycles/s)':>20}{'after (cycles/s)':>20}{'pooled (cycles/s)':>20}")
+    for dialog_id in DIALOG_IDS:
+        if dialog_id not in before.definitions:
+            continue
+        pooled.configure_pool(dialog_id, max_size=1)
+        before_rate = measure_cycles(before, dialog_id, args.cycles)
+        after_rate = measure_cycles(after, dialog_id, args.cycles)
+        pooled_rate = measure_cycles(pooled, dialog_id, args.cycles)
+        print(f"{dialog_id:<26}{before_rate:>20,.0f}{after_rate:>20,.0f}{pooled_rate:>20,.0f}")
+
+
+if __name__ == "__main__":
+    main()
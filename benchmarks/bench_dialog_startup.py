@@ -0,0 +1,87 @@
+"""
+DialogManager 起動時間のベンチマーク
+
+ダイアログを大量に含む合成定義ファイル（デフォルト1,000ダイアログ）を生成し、
+通常モード（json.load で全体を解析）、遅延モード（ID索引のみ作成）、
+コンパイル済みリソース（dialog_resource.py で生成したバイナリ）で
+DialogManager の生成時間と、初回 show() までの時間を比較する。
+
+実行方法:
+    python benchmarks/bench_dialog_startup.py [--dialogs N] [--repeat N]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dialog_manager import DialogManager
+from dialog_resource import compile_resource
+
+
+def generate_definitions(dialog_count: int) -> dict:
+    """既存の dialogs.json をもとに、IDを変えたダイアログ定義を大量に生成する"""
+    with open(os.path.join(ROOT_DIR, "dialogs.json"), 'r') as f:
+        base_definitions = list(json.load(f).values())
+
+    definitions = {}
+    for i in range(dialog_count):
+        definition = dict(base_definitions[i % len(base_definitions)])
+        definition["title"] = f"{definition.get('title', 'Dialog')} #{i}"
+        definitions[f"IDD_SYNTHETIC_{i:05d}"] = definition
+    return definitions
+
+
+def best_time(func, repeat: int) -> float:
+    """関数を複数回実行し、最短の実行時間（秒）を返す"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DialogManager startup benchmark")
+    parser.add_argument("--dialogs", type=int, default=1000, help="合成するダイアログ数")
+    parser.add_argument("--repeat", type=int, default=20, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    definitions = generate_definitions(args.dialogs)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        json_path = os.path.join(temp_dir, "dialogs.json")
+        with open(json_path, 'w') as f:
+            json.dump(definitions, f, indent=2)
+        size_kb = os.path.getsize(json_path) / 1024
+        print(f"synthetic file: {args.dialogs} dialogs, {size_kb:,.0f} KiB")
+
+        dialog_id = f"IDD_SYNTHETIC_{args.dialogs // 2:05d}"
+
+        compiled_path = os.path.join(temp_dir, "dialogs.dlgc")
+        compile_resource(json_path, compiled_path)
+
+        modes = {
+            "eager": lambda: DialogManager(json_path, use_compiled=False),
+            "lazy": lambda: DialogManager(json_path, lazy=True, use_compiled=False),
+            "compiled": lambda: DialogManager(json_path, compiled_path=compiled_path),
+        }
+
+        results = {}
+        for mode, create_manager in modes.items():
+            startup = best_time(create_manager, args.repeat)
+            first_show = best_time(lambda: create_manager().show(dialog_id), args.repeat)
+            results[mode] = (startup, first_show)
+
+    print(f"{'mode':<10}{'startup (ms)':>16}{'startup + first show (ms)':>30}{'speedup':>10}")
+    eager_startup = results["eager"][0]
+    for mode, (startup, first_show) in results.items():
+        print(f"{mode:<10}{startup * 1000:>16.2f}{first_show * 1000:>30.2f}{eager_startup / startup:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+ファイルダイアログのディレクトリ変更の反映のベンチマーク
+
+ヘッドレスバックエンドで --files 件のディレクトリを表示した FileOpenDialogController で、
+表示中のファイルへの書き込み・ファイルの追加を反映するフレームの更新時間を計測する。
+変更のあったエントリ名が分からない場合（更新時刻のポーリング）のディレクトリ全体の走査し直しは
+ワーカースレッドで行うため、その間のフレームの更新時間と、同じ走査をメインスレッドで行った場合の時間も表示する。
+あわせて、変更を反映した後も選択中のアイテムとスクロール位置（表示範囲の先頭のアイテム）が
+維持されていることを確認する（維持されていなければ終了コード1）。
+
+実行方法:
+    python benchmarks/bench_directory_refresh.py [--files N]
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dialog_backend import HeadlessBackend
+from dialog_manager import DialogManager
+from directory_watcher import PollingWatcher
+from file_open_dialog import FileOpenDialogController
+
+
+def create_directory(files: int) -> str:
+    """files 件のファイルを含む一時ディレクトリ"""
+    directory = tempfile.mkdtemp(prefix="bench_refresh_")
+    for index in range(files):
+        with open(os.path.join(directory, f"data{index:06d}.csv"), "w") as f:
+            f.write("x" * (index % 512))
+    return directory
+
+
+def run_frame(backend, manager, controller) -> float:
+    """1フレーム進めて、更新時間（秒）を返す"""
+    backend.next_frame()
+    start = time.perf_counter()
+    manager.update()
+    controller.update()
+    return time.perf_counter() - start
+
+
+def wait_for(backend, manager, controller, condition, timeout: float = 10.0) -> float:
+    """condition() が True になるまでフレームを進め、その間の最大の更新時間（秒）を返す"""
+    deadline = time.monotonic() + timeout
+    slowest = 0.0
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("directory change was not applied")
+        slowest = max(slowest, run_frame(backend, manager, controller))
+        time.sleep(0.001)
+    return slowest
+
+
+def selection_state(controller):
+    """選択中のアイテムと表示範囲の先頭のアイテムの名前"""
+    listbox = controller._find_widget("IDC_FILE_LIST")
+    items = controller.file_items
+    selected = items[listbox.selected_index].name if 0 <= listbox.selected_index < len(items) else None
+    top = items[listbox.scroll_offset].name if listbox.scroll_offset < len(items) else None
+    return selected, top
+
+
+def main():
+    parser = argparse.ArgumentParser(description="File dialog directory refresh benchmark")
+    parser.add_argument("--files", type=int, default=10000, help="ディレクトリのファイル数")
+    args = parser.parse_args()
+
+    directory = create_directory(args.files)
+    backend = HeadlessBackend(1024, 512)
+    manager = DialogManager(os.path.join(ROOT_DIR, "dialogs.json"), backend=backend, use_compiled=False)
+    failed = False
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            controller = FileOpenDialogController(manager, directory)
+            controller.show_file_open_dialog()
+            watcher_name = controller.directory_watcher.__class__.__name__
+            wait_for(backend, manager, controller, lambda: not controller.directory_loader.loading)
+
+            listbox = controller._find_widget("IDC_FILE_LIST")
+            listbox.select_item(args.files // 2)
+            listbox.scroll_offset = args.files // 2 - 3
+            expected = selection_state(controller)
+            selected_path = controller.file_items[listbox.selected_index].path
+            size_before = controller.file_items[listbox.selected_index].size
+
+            results = []
+            # 選択中のファイルへの追記（inotify では IN_CLOSE_WRITE、エントリ名が分かる）
+            with open(selected_path, "a") as f:
+                f.write("y" * 1000)
+            selected_item = controller.file_items[listbox.selected_index]
+            results.append(("write selected", wait_for(
+                backend, manager, controller, lambda: selected_item._size is None or
+                controller.file_items[listbox.selected_index] is not selected_item)))
+            size_after = controller.file_items[listbox.selected_index].size
+
+            # ファイルの追加（選択中のアイテムより前に追加されるので、インデックスがずれる）
+            count = len(controller.file_items)
+            with open(os.path.join(directory, "aaa_new.csv"), "w") as f:
+                f.write("new")
+            results.append(("add file", wait_for(
+                backend, manager, controller, lambda: len(controller.file_items) != count)))
+
+            # 更新時刻のポーリングに切り替えて追加（エントリ名が分からないので全体を走査し直す）
+            controller.directory_watcher.close()
+            controller.directory_watcher = PollingWatcher()
+            controller.directory_watcher.watch(directory)
+            count = len(controller.file_items)
+            with open(os.path.join(directory, "aab_new.csv"), "w") as f:
+                f.write("new")
+            results.append(("rescan (polling)", wait_for(
+                backend, manager, controller, lambda: len(controller.file_items) != count)))
+            file_manager = controller.file_manager
+            start = time.perf_counter()
+            file_manager.update_items(controller.pipeline.scanned, directory, None, apply_filter=False)
+            results.append(("  on main thread", time.perf_counter() - start))
+
+        state = selection_state(controller)
+        print(f"{args.files:,} files, watcher: {watcher_name}")
+        print(f"{'change':<20}{'slowest frame (ms)':>20}")
+        for label, seconds in results:
+            print(f"{label:<20}{seconds * 1000:>20.2f}")
+        print(f"selected size: {size_before} -> {size_after}")
+        if state != expected or size_after != size_before + 1000:
+            print(f"FAILED: selection/scroll {expected} -> {state}")
+            failed = True
+        else:
+            print(f"selection and scroll kept: {state}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
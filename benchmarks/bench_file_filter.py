@@ -0,0 +1,81 @@
+"""
+ファイルフィルターのベンチマーク
+
+10万件のファイル名を、従来の判定（呼び出しごとに fnmatch をインポートし、
+ファイル名とパターンを小文字化して fnmatch で判定、ファイルごとにデバッグ出力2行）と、
+変換済みの FileFilter で判定する時間を比較する。デバッグ出力は破棄して計測する。
+
+実行方法:
+    python benchmarks/bench_file_filter.py [--names N]
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from file_utils import FileFilter
+
+EXTENSIONS = [".csv", ".txt", ".py", ".json", ".CSV", ".bak", ""]
+
+PATTERN_SETS = [
+    ["*.*"],
+    ["*.csv"],
+    ["*.csv;*.txt"],
+    ["data_??.*", "*.py"],
+]
+
+
+def legacy_matches(filename: str, filters) -> bool:
+    """従来の FileManager._matches_filter()"""
+    import fnmatch
+    for filter_pattern in filters:
+        if fnmatch.fnmatch(filename.lower(), filter_pattern.lower()):
+            print(f"[DEBUG] File '{filename}' matches filter '{filter_pattern}'")
+            return True
+    print(f"[DEBUG] File '{filename}' does not match any filters: {filters}")
+    return False
+
+
+def best_time(function, repeat: int) -> float:
+    """repeat回実行した中で最短の時間（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="File filter benchmark")
+    parser.add_argument("--names", type=int, default=100000, help="ファイル名の数")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数（最短の時間を採用）")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    names = [f"data_{i % 100:02d}_{i}{rng.choice(EXTENSIONS)}" for i in range(args.names)]
+
+    print(f"{args.names:,} names")
+    print(f"{'pattern':<22}{'legacy (ms)':>14}{'compiled (ms)':>16}{'speedup':>10}")
+    with open(os.devnull, "w") as devnull:
+        for patterns in PATTERN_SETS:
+            # 従来の判定は ";" 区切りに対応していないため、分割したパターンを渡す
+            legacy_filters = [pattern for text in patterns for pattern in text.split(";")]
+            file_filter = FileFilter(patterns)
+            with contextlib.redirect_stdout(devnull):
+                expected = [legacy_matches(name, legacy_filters) for name in names]
+                legacy = best_time(lambda: [legacy_matches(name, legacy_filters) for name in names], args.repeat)
+            assert [file_filter.matches(name) for name in names] == expected
+            compiled = best_time(lambda: [file_filter.matches(name) for name in names], args.repeat)
+
+            label = ";".join(patterns)
+            print(f"{label:<22}{legacy * 1000:>14.1f}{compiled * 1000:>16.1f}{legacy / compiled:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+FileItem のメモリ使用量のベンチマーク
+
+10万件のディレクトリ一覧を想定し、インスタンスごとに __dict__ を持ちフルパスも保持する
+従来の FileItem と、__slots__ でディレクトリのパスを共有する現在の FileItem の
+メモリ使用量（tracemalloc）を比較する。
+
+ファイルシステムには触れず、同じ名前の一覧から両方のアイテムを作成して計測する。
+
+実行方法:
+    python benchmarks/bench_file_item_memory.py [--items N]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from file_utils import FileItem, _FILE
+
+
+class LegacyFileItem:
+    """従来の FileItem（__dict__ にフルパス・名前・種別・サイズを保持）"""
+    def __init__(self, path: str, name: str):
+        self.path = path
+        self.name = name
+        self.is_directory = False
+        self.is_file = True
+        self.size = 0
+
+
+def build_legacy(directory: str, names):
+    return [LegacyFileItem(os.path.join(directory, name), name) for name in names]
+
+
+def build_slotted(directory: str, names):
+    items = []
+    for name in names:
+        item = FileItem.__new__(FileItem)
+        item.directory = directory
+        item.name = name
+        item._flags = _FILE
+        item._size = None
+        item._mtime = None
+        items.append(item)
+    return items
+
+
+def measure(build, directory: str, names) -> int:
+    """アイテムの一覧を作成した時に増えたメモリ（バイト）"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = build(directory, names)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del items
+    return used
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FileItem memory benchmark")
+    parser.add_argument("--items", type=int, default=100000, help="アイテム数")
+    args = parser.parse_args()
+
+    directory = "/home/user/projects/plc/ladder_programs/archive"
+    # 名前の文字列はディレクトリ走査で必ず生成されるため、計測対象から除外する
+    names = [f"program_{i:06d}.csv" for i in range(args.items)]
+
+    legacy = measure(build_legacy, directory, names)
+    slotted = measure(build_slotted, directory, names)
+
+    print(f"{args.items:,} items")
+    print(f"dict     : {legacy / 1024 / 1024:7.2f} MiB ({legacy / args.items:6.1f} bytes / item)")
+    print(f"__slots__: {slotted / 1024 / 1024:7.2f} MiB ({slotted / args.items:6.1f} bytes / item)"
+          f"  ({legacy / slotted:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
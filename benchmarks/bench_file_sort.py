@@ -0,0 +1,134 @@
+"""
+ファイル一覧の並べ替えのベンチマーク
+
+5万件の一覧（ディレクトリ500件を含む）で、列ごとに毎回キーを計算して並べ替える場合と、
+FileSorter がキャッシュした並びを使う場合（昇順・降順の切り替え、並べ替えた列に戻す）の時間を比較する。
+1フレーム（60fps で約16.7ms）以内に収まるかを確認する。
+
+並べ替えの比較には、サイズと更新時刻をあらかじめ設定したアイテムを使う（ファイルシステムには触れない）。
+続いて一時ディレクトリに --stat-files 件のファイルを作成し、サイズと更新時刻が未取得の一覧を
+サイズで並べ替える場合の stat を含めた時間を、メインスレッドで並べ替え時に取得する場合（従来）と、
+DirectoryLoader.start_stats() でワーカースレッドで取得してから並べ替える場合（現在）で比較する。
+
+実行方法:
+    python benchmarks/bench_file_sort.py [--items N] [--stat-files N]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from directory_loader import DirectoryLoader
+from file_utils import FileItem, FileManager, FileSorter, SORT_FIELDS, _DIRECTORY, _FILE
+
+EXTENSIONS = [".csv", ".txt", ".py", ".json", ".bak", ""]
+
+
+def build_items(count: int, directories: int):
+    """名前順の一覧を作成"""
+    rng = random.Random(0)
+    directory = "/home/user/projects/plc/exports"
+    items = []
+    for i in range(count):
+        item = FileItem.__new__(FileItem)
+        item.directory = directory
+        is_directory = i < directories
+        item.name = f"dir_{i:05d}" if is_directory else f"export_{i:06d}_{rng.randrange(100):02d}{rng.choice(EXTENSIONS)}"
+        item._flags = _DIRECTORY if is_directory else _FILE
+        item._size = 0 if is_directory else rng.randrange(10**7)
+        item._mtime = 1.7e9 + rng.randrange(10**7)
+        items.append(item)
+    return FileManager.sort_items(items)
+
+
+def uncached_sort(items, field: str, descending: bool):
+    """キャッシュを使わず、毎回 (値, 名前) のキーを計算して並べ替える"""
+    def key(item):
+        return (getattr(item, field), item.name)
+    directories = sorted((item for item in items if item._flags & _DIRECTORY), key=key, reverse=descending)
+    files = sorted((item for item in items if not item._flags & _DIRECTORY), key=key, reverse=descending)
+    return directories + files
+
+
+def elapsed_ms(function) -> float:
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+def measure_stat_cost(files: int):
+    """サイズと更新時刻が未取得の一覧をサイズで並べ替える時間（stat を含む）"""
+    directory = tempfile.mkdtemp(prefix="bench_file_sort_")
+    try:
+        for i in range(files):
+            with open(os.path.join(directory, f"export_{i:06d}.csv"), "w") as f:
+                f.write("x" * (i % 512))
+        file_manager = FileManager(directory)
+
+        def scan():
+            items = []
+            for chunk in file_manager.scan_directory(directory):
+                items.extend(chunk)
+            return FileManager.sort_items(items)
+
+        # 従来: 並べ替えドロップダウンのコールバック中に、メインスレッドで全アイテムを stat する
+        items = scan()
+        lazy = elapsed_ms(lambda: FileSorter().sort(items, "size"))
+
+        # 現在: ワーカースレッドで stat してから、メインスレッドで並べ替える
+        items = scan()
+        loader = DirectoryLoader(file_manager)
+        start = time.perf_counter()
+        loader.start_stats(items)
+        main_thread = 0.0
+        while loader.loading:
+            poll_start = time.perf_counter()
+            loader.poll()
+            main_thread += time.perf_counter() - poll_start
+            time.sleep(0.001)
+        worker = (time.perf_counter() - start) * 1000
+        sort = elapsed_ms(lambda: FileSorter().sort(items, "size"))
+
+        print(f"\nsort by size with stat, {files:,} files")
+        print(f"{'main thread (lazy stat)':<32}{lazy:>10.2f} ms")
+        print(f"{'worker stat (wall clock)':<32}{worker:>10.2f} ms")
+        print(f"{'main thread (poll + sort)':<32}{main_thread * 1000 + sort:>10.2f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FileSorter benchmark")
+    parser.add_argument("--items", type=int, default=50000, help="アイテム数")
+    parser.add_argument("--dirs", type=int, default=500, help="ディレクトリ数")
+    parser.add_argument("--stat-files", type=int, default=20000, help="stat を含めて計測するファイル数")
+    args = parser.parse_args()
+
+    items = build_items(args.items, args.dirs)
+    sorter = FileSorter()
+
+    print(f"{args.items:,} items (1 frame = 16.7 ms)")
+    print(f"{'field':<11}{'uncached (ms)':>15}{'first (ms)':>12}{'toggle (ms)':>13}{'return (ms)':>13}")
+    for field in SORT_FIELDS:
+        uncached = elapsed_ms(lambda: uncached_sort(items, field, False))
+        # 列を選んだ最初の1回（キーを計算）、昇順・降順の切り替え、別の列から戻した場合
+        sorter.sort(items, "name", True)
+        first = elapsed_ms(lambda: sorter.sort(items, field, False))
+        toggle = elapsed_ms(lambda: sorter.sort(items, field, True))
+        sorter.sort(items, "size" if field != "size" else "mtime", False)
+        back = elapsed_ms(lambda: sorter.sort(items, field, False))
+        assert sorter.sort(items, field, False) == uncached_sort(items, field, False)
+        print(f"{field:<11}{uncached:>15.2f}{first:>12.2f}{toggle:>13.2f}{back:>13.2f}")
+        sorter = FileSorter()
+
+    measure_stat_cost(args.stat_files)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Dialog.find_widget() のマイクロベンチマーク
+
+200ウィジェットの合成ダイアログで、従来の線形探索（hasattr + 比較）と
+ID索引（dict）による検索の1回あたりの時間を比較する。
+コントローラーは毎フレーム複数回 _find_widget() を呼ぶため、この差がフレーム時間に効く。
+
+実行方法:
+    python benchmarks/bench_find_widget.py [--widgets N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dialog_manager import DialogManager
+from dialog_template import build_dialog
+
+
+def linear_find_widget(dialog, widget_id):
+    """従来の Dialog.find_widget() と同じ線形探索"""
+    for widget in dialog.widgets:
+        if hasattr(widget, 'id') and widget.id == widget_id:
+            return widget
+    return None
+
+
+def build_synthetic_dialog(widget_count: int):
+    """ラベルとボタンを交互に並べた合成ダイアログを生成する"""
+    widget_defs = []
+    for i in range(widget_count):
+        widget_type = "button" if i % 2 else "label"
+        widget_defs.append({
+            "type": widget_type,
+            "id": f"IDC_CELL_{i:04d}",
+            "text": f"C{i}",
+            "x": (i % 20) * 12,
+            "y": 14 + (i // 20) * 10,
+            "width": 12,
+            "height": 10,
+        })
+    definition = {"title": "Synthetic", "x": 0, "y": 0, "width": 256, "height": 256, "widgets": widget_defs}
+
+    # widget_factory は DialogManager の既定の対応表を流用
+    manager = DialogManager(os.path.join(ROOT_DIR, "dialogs.json"))
+    return build_dialog("IDD_SYNTHETIC", definition, manager.widget_factory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dialog.find_widget() micro benchmark")
+    parser.add_argument("--widgets", type=int, default=200, help="合成ダイアログのウィジェット数")
+    parser.add_argument("--number", type=int, default=20000, help="1ケースあたりの検索回数")
+    args = parser.parse_args()
+
+    dialog = build_synthetic_dialog(args.widgets)
+    cases = {
+        "first": "IDC_CELL_0000",
+        "middle": f"IDC_CELL_{args.widgets // 2:04d}",
+        "last": f"IDC_CELL_{args.widgets - 1:04d}",
+        "missing": "IDC_NOT_FOUND",
+    }
+
+    print(f"{args.widgets} widgets, {args.number} lookups per case")
+    print(f"{'case':<10}{'linear (ns)':>14}{'indexed (ns)':>14}{'speedup':>10}")
+    for case, widget_id in cases.items():
+        assert linear_find_widget(dialog, widget_id) is dialog.find_widget(widget_id)
+        linear = timeit.timeit(lambda: linear_find_widget(dialog, widget_id), number=args.number)
+        indexed = timeit.timeit(lambda: dialog.find_widget(widget_id), number=args.number)
+        linear_ns = linear / args.number * 1e9
+        indexed_ns = indexed / args.number * 1e9
+        print(f"{case:<10}{linear_ns:>14.0f}{indexed_ns:>14.0f}{linear_ns / indexed_ns:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""
+ダイアログシステムのフレーム時間のベンチマーク
+
+ヘッドレスバックエンド（dialog_backend.HeadlessBackend）でウィンドウを開かずに、
+スクリプトで与えた操作（マウス移動・クリック・キー入力）を再生しながら
+DialogManager.update() / draw() と各コントローラーの update() を実行し、
+1フレームあたりの更新時間・描画時間（p50 / p99）と、1フレームで確保したメモリ（tracemalloc）を計測する。
+
+シナリオ:
+    synthetic-N     N個のウィジェット（ボタン・チェックボックス・ラベル・テキストボックス）の合成ダイアログ
+    listbox         --items 件のリストボックス（クリック・スクロール・タイプアヘッド）
+    file-open       --files 件のディレクトリを表示した FileOpenDialogController（並べ替え・選択）
+    file-save       同じディレクトリを表示した FileSaveDialogController（ファイル名入力・選択）
+    device-id / timer-counter / compare / data-register
+                    PyPlc 側のコントローラー（PyPlc に組み込まれている場合のみ。無ければスキップ）
+
+実行方法:
+    python benchmarks/bench_frame_time.py [--frames N] [--sizes 10,100,1000] [--items N] [--files N]
+    python benchmarks/bench_frame_time.py --scenario listbox --scenario file-open
+"""
+import argparse
+import contextlib
+import gc
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pyxel
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dialog_backend import HeadlessBackend
+from dialog_manager import DialogManager
+from file_open_dialog import FileOpenDialogController
+from file_save_dialog import FileSaveDialogController
+
+CELL_WIDTH = 20
+CELL_HEIGHT = 12
+
+
+def widget_center(manager, widget_id):
+    """ウィジェットの中心の画面座標"""
+    dialog = manager.active_dialog
+    widget = dialog.find_widget(widget_id)
+    return dialog.x + widget.x + widget.width // 2, dialog.y + widget.y + widget.height // 2
+
+
+def list_row_point(manager, widget_id, row):
+    """リストボックスの表示行（スクロール位置からの行番号）の画面座標"""
+    dialog = manager.active_dialog
+    widget = dialog.find_widget(widget_id)
+    return dialog.x + widget.x + 8, dialog.y + widget.y + 2 + row * widget.item_height + widget.item_height // 2
+
+
+def dropdown_item_point(manager, widget_id, index):
+    """開いたドロップダウンリストの項目の画面座標"""
+    dialog = manager.active_dialog
+    widget = dialog.find_widget(widget_id)
+    return (dialog.x + widget.x + widget.width // 2,
+            dialog.y + widget.y + widget.height + index * widget.item_height + widget.item_height // 2)
+
+
+def type_and_erase(backend, manager, widget_id, text):
+    """テキストボックスをクリックし、文字列を入力してから消す"""
+    backend.click(*widget_center(manager, widget_id))
+    backend.type_text(text)
+    for _ in text:
+        backend.press_key(pyxel.KEY_BACKSPACE)
+
+
+# --- シナリオ（manager にダイアログを表示し、(コントローラー, 1周分の操作を登録する関数) を返す） ---
+
+def setup_synthetic(manager, backend, count):
+    """count 個のウィジェットを格子状に並べた合成ダイアログ"""
+    cols = max(1, min(40, int(count ** 0.5 * 1.6)))
+    rows = (count + cols - 1) // cols
+    kinds = ("button", "checkbox", "label", "textbox")
+    widget_defs = []
+    for index in range(count):
+        row, col = divmod(index, cols)
+        kind = kinds[index % len(kinds)]
+        widget_defs.append({
+            "type": kind,
+            "id": f"IDC_W{index:04d}",
+            "text": "" if kind == "textbox" else f"{index}",
+            "x": 4 + col * CELL_WIDTH,
+            "y": 16 + row * CELL_HEIGHT,
+            "width": CELL_WIDTH - 2,
+            "height": CELL_HEIGHT - 2,
+        })
+    dialog_id = f"IDD_SYNTHETIC_{count}"
+    manager.definitions[dialog_id] = {
+        "title": f"Synthetic {count}", "x": 0, "y": 0,
+        "width": 8 + cols * CELL_WIDTH, "height": 20 + rows * CELL_HEIGHT,
+        "widgets": widget_defs,
+    }
+    manager.show(dialog_id)
+    dialog = manager.active_dialog
+    textbox_id = next(w.id for w in dialog.widgets if w.__class__.__name__ == "TextBoxWidget")
+
+    def script():
+        # ポインタを格子に沿って動かし、ボタンとチェックボックスをクリックし、テキストボックスに入力
+        for index in range(0, count, max(1, count // 40)):
+            x, y = widget_center(manager, f"IDC_W{index:04d}")
+            backend.move_mouse(x, y)
+            if index % 4 in (0, 1):
+                backend.click(x, y)
+        type_and_erase(backend, manager, textbox_id, "M100")
+
+    return None, script
+
+
+def setup_listbox(manager, backend, items):
+    """items 件のリストボックス"""
+    manager.definitions["IDD_BENCH_LIST"] = {
+        "title": "List", "x": 0, "y": 0, "width": 240, "height": 220,
+        "widgets": [{"type": "listbox", "id": "IDC_LIST", "x": 4, "y": 16, "width": 232, "height": 200}],
+    }
+    manager.show("IDD_BENCH_LIST")
+    listbox = manager.active_dialog.find_widget("IDC_LIST")
+    listbox.set_items([f"{'XYMTCD'[i % 6]}{i:06d} relay {i % 97}" for i in range(items)])
+    dialog = manager.active_dialog
+    down5 = (dialog.x + listbox.x + listbox.width - 8, dialog.y + listbox.y + listbox.height - 7)
+
+    def script():
+        for row in range(0, listbox.visible_items, 3):
+            backend.click(*list_row_point(manager, "IDC_LIST", row))
+        for _ in range(10):
+            backend.click(*down5)
+        backend.click(*list_row_point(manager, "IDC_LIST", 1))
+        backend.type_text("m0123")
+        backend.wait(40)  # タイプアヘッドの入力をリセット
+        backend.type_text("y")
+
+    return None, script
+
+
+def create_bench_directory(files):
+    """files 件のファイルとサブディレクトリを含む一時ディレクトリ"""
+    directory = tempfile.mkdtemp(prefix="bench_frame_")
+    for index in range(20):
+        os.mkdir(os.path.join(directory, f"dir{index:02d}"))
+    for index in range(files):
+        with open(os.path.join(directory, f"data{index:06d}.csv"), "w") as f:
+            f.write("x" * (index % 512))
+    return directory
+
+
+def wait_for_load(backend, manager, controller):
+    """ディレクトリの読み込みが終わるまでフレームを進める（計測には含めない）"""
+    while True:
+        backend.next_frame()
+        manager.update()
+        controller.update()
+        if not controller.directory_loader.loading:
+            return
+        time.sleep(0.001)
+
+
+def click_files(backend, manager):
+    """ファイルリストを先頭に戻し、ディレクトリ（20件）より下のファイルの行をクリック"""
+    dialog = manager.active_dialog
+    listbox = dialog.find_widget("IDC_FILE_LIST")
+    scroll_x = dialog.x + listbox.x + listbox.width - 8
+    for _ in range(5):
+        backend.click(scroll_x, dialog.y + listbox.y + 7)  # up5
+    for _ in range(5):
+        backend.click(scroll_x, dialog.y + listbox.y + listbox.height - 7)  # down5
+    for row in range(0, 6, 2):
+        backend.click(*list_row_point(manager, "IDC_FILE_LIST", row))
+
+
+def setup_file_open(manager, backend, directory):
+    controller = FileOpenDialogController(manager, directory)
+    controller.show_file_open_dialog()
+    wait_for_load(backend, manager, controller)
+
+    def script():
+        click_files(backend, manager)
+        for index in (1, 2, 0):  # Size / Date / Name で並べ替え
+            backend.click(*widget_center(manager, "IDC_SORT_FIELD"))
+            backend.click(*dropdown_item_point(manager, "IDC_SORT_FIELD", index))
+        backend.click(*widget_center(manager, "IDC_SORT_DESCENDING"))
+        backend.click(*widget_center(manager, "IDC_SORT_DESCENDING"))
+        type_and_erase(backend, manager, "IDC_FILENAME_INPUT", "data000123.csv")
+
+    return controller, script
+
+
+def setup_file_save(manager, backend, directory):
+    controller = FileSaveDialogController(manager, directory)
+    controller.show_save_dialog("report", ".csv")
+    wait_for_load(backend, manager, controller)
+
+    def script():
+        click_files(backend, manager)
+        backend.click(*widget_center(manager, "IDC_SORT_DESCENDING"))
+        backend.click(*widget_center(manager, "IDC_SORT_DESCENDING"))
+        type_and_erase(backend, manager, "IDC_FILENAME_INPUT", "summary")
+
+    return controller, script
+
+
+def load_pyplc_modules():
+    """
+    PyPlc に組み込まれている場合（ROOT_DIR の親に PyPlc の core パッケージがある）のみ、
+    PyPlc 側のコントローラーのモジュールを読み込む（読み込めない場合はNone）
+    """
+    parent = os.path.dirname(ROOT_DIR)
+    if not os.path.isdir(os.path.join(parent, "core")):
+        return None
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+    package = os.path.basename(ROOT_DIR)
+    try:
+        return {
+            "device_id": importlib.import_module(f"{package}.device_id_dialog_controller"),
+            "timer_counter": importlib.import_module(f"{package}.timer_counter_dialog_controller"),
+            "compare": importlib.import_module(f"{package}.compare_dialog_controller"),
+            "data_register": importlib.import_module(f"{package}.data_register_dialog"),
+            "config": importlib.import_module("config"),
+        }
+    except ImportError as e:
+        print(f"PyPlc controllers unavailable: {e}")
+        return None
+
+
+def setup_device_id(manager, backend, modules):
+    controller = modules["device_id"].DeviceIdDialogController(manager)
+    controller.show_dialog(modules["config"].DeviceType.CONTACT_A, "X0")
+
+    def script():
+        type_and_erase(backend, manager, "IDC_ID_INPUT", "M100")
+        type_and_erase(backend, manager, "IDC_ID_INPUT", "Q9")  # 不正な入力（エラー表示）
+
+    return controller, script
+
+
+def setup_timer_counter(manager, backend, modules):
+    controller = modules["timer_counter"].TimerCounterDialogController(manager)
+    controller.show_dialog(modules["config"].DeviceType.TIMER_TON, 10, "T0")
+
+    def script():
+        type_and_erase(backend, manager, "IDC_DEVICE_ID_INPUT", "T12")
+        type_and_erase(backend, manager, "IDC_PRESET_INPUT", "300")
+
+    return controller, script
+
+
+def setup_compare(manager, backend, modules):
+    controller = modules["compare"].CompareDialogController(manager)
+    controller.show_compare_dialog("D0", "=", "100")
+
+    def script():
+        type_and_erase(backend, manager, "IDC_LEFT_VALUE_INPUT", "D10")
+        backend.click(*widget_center(manager, "IDC_OPERATOR_DROPDOWN"))
+        backend.click(*dropdown_item_point(manager, "IDC_OPERATOR_DROPDOWN", 2))
+        type_and_erase(backend, manager, "IDC_RIGHT_VALUE_INPUT", "K50")
+
+    return controller, script
+
+
+def setup_data_register(manager, backend, modules):
+    controller = modules["data_register"].DataRegisterDialogController(manager)
+    controller.show_data_register_dialog("D0", "MOV", "K1")
+
+    def script():
+        type_and_erase(backend, manager, "IDC_DEVICE_ID_INPUT", "D200")
+        backend.click(*widget_center(manager, "IDC_OPERATION_DROPDOWN"))
+        backend.click(*dropdown_item_point(manager, "IDC_OPERATION_DROPDOWN", 1))
+        type_and_erase(backend, manager, "IDC_OPERAND_INPUT", "K25")
+
+    return controller, script
+
+
+# --- 計測 ---
+
+def percentile(values, fraction):
+    """並べ替え済みのリストのパーセンタイル（最近傍）"""
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def run_frames(backend, manager, controller, script, frames, trace_memory=False):
+    """
+    操作を登録しながら frames フレーム実行し、フレームごとの (更新時間, 描画時間, 確保したメモリ) を返す
+
+    確保したメモリは、フレーム中の使用量のピークとフレーム開始時の差（tracemalloc、trace_memory=True の場合のみ）。
+    """
+    update_times, draw_times, allocations = [], [], []
+    screen = backend.screen
+    clock = time.perf_counter
+    for _ in range(frames):
+        if not backend.pending_frames:
+            script()
+        backend.next_frame()
+        if trace_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = clock()
+        manager.update()
+        if controller is not None:
+            controller.update()
+        middle = clock()
+        screen.cls(pyxel.COLOR_DARK_BLUE)
+        manager.draw()
+        end = clock()
+        if trace_memory:
+            allocations.append(tracemalloc.get_traced_memory()[1] - start_memory)
+        update_times.append(middle - start)
+        draw_times.append(end - middle)
+    return update_times, draw_times, allocations
+
+
+def measure(label, setup, frames, alloc_frames):
+    """シナリオを実行して1行の結果を表示"""
+    backend = HeadlessBackend(1024, 512)
+    manager = DialogManager(os.path.join(ROOT_DIR, "dialogs.json"), backend=backend, use_compiled=False)
+    # コントローラーのログ出力（選択したファイル名など）は表示しない
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        controller, script = setup(manager, backend)
+        widget_count = len(manager.active_dialog.widgets) if manager.active_dialog else 0
+        if widget_count:
+            # 計測の前に50フレーム実行して、テンプレートや索引の作成を済ませておく
+            run_frames(backend, manager, controller, script, min(frames, 50))
+            update_times, draw_times, _ = run_frames(backend, manager, controller, script, frames)
+            tracemalloc.start()
+            _, _, allocations = run_frames(backend, manager, controller, script, alloc_frames, trace_memory=True)
+            tracemalloc.stop()
+
+    # pyxel.Image は生成したスレッドで破棄する必要があるため、ディレクトリを読み込むワーカースレッドで
+    # GC が走る前に、このシナリオのダイアログ（循環参照）をメインスレッドで回収しておく
+    del backend, manager, controller, script
+    gc.collect()
+
+    if not widget_count:
+        print(f"{label:<16}  (dialog not shown)")
+        return
+    update_times.sort()
+    draw_times.sort()
+    allocations.sort()
+    print(f"{label:<16}{widget_count:>8}"
+          f"{percentile(update_times, 0.5) * 1e6:>11.1f}{percentile(update_times, 0.99) * 1e6:>11.1f}"
+          f"{percentile(draw_times, 0.5) * 1e6:>11.1f}{percentile(draw_times, 0.99) * 1e6:>11.1f}"
+          f"{sum(allocations) / len(allocations) / 1024:>12.1f}{percentile(allocations, 0.99) / 1024:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dialog system frame-time benchmark")
+    parser.add_argument("--frames", type=int, default=600, help="計測するフレーム数")
+    parser.add_argument("--alloc-frames", type=int, default=200, help="メモリを計測するフレーム数")
+    parser.add_argument("--sizes", default="10,100,1000", help="合成ダイアログのウィジェット数（カンマ区切り）")
+    parser.add_argument("--items", type=int, default=20000, help="リストボックスのアイテム数")
+    parser.add_argument("--files", type=int, default=10000, help="ファイルダイアログで表示するファイル数")
+    parser.add_argument("--scenario", action="append", help="実行するシナリオ（複数指定可、省略時はすべて）")
+    args = parser.parse_args()
+
+    scenarios = []
+    for size in (int(size) for size in args.sizes.split(",") if size):
+        scenarios.append((f"synthetic-{size}", lambda m, b, size=size: setup_synthetic(m, b, size)))
+    scenarios.append(("listbox", lambda m, b: setup_listbox(m, b, args.items)))
+    scenarios.append(("file-open", lambda m, b: setup_file_open(m, b, directory)))
+    scenarios.append(("file-save", lambda m, b: setup_file_save(m, b, directory)))
+    pyplc_scenarios = [("device-id", setup_device_id), ("timer-counter", setup_timer_counter),
+                       ("compare", setup_compare), ("data-register", setup_data_register)]
+    if args.scenario:
+        selected = set(args.scenario)
+        scenarios = [s for s in scenarios if s[0] in selected]
+        pyplc_scenarios = [s for s in pyplc_scenarios if s[0] in selected]
+
+    needs_directory = any(name.startswith("file-") for name, _ in scenarios)
+    directory = create_bench_directory(args.files) if needs_directory else None
+    modules = load_pyplc_modules() if pyplc_scenarios else None
+    try:
+        print(f"{args.frames} frames (memory: {args.alloc_frames} frames), "
+              f"listbox {args.items:,} items, directory {args.files:,} files")
+        print(f"{'scenario':<16}{'widgets':>8}{'update p50':>11}{'p99 (us)':>11}"
+              f"{'draw p50':>11}{'p99 (us)':>11}{'alloc avg':>12}{'p99 (KiB)':>12}")
+        for label, setup in scenarios:
+            measure(label, setup, args.frames, args.alloc_frames)
+        for label, setup in pyplc_scenarios:
+            if modules is None:
+                print(f"{label:<16}  skipped (PyPlc controllers not available)")
+                continue
+            measure(label, lambda m, b, setup=setup: setup(m, b, modules), args.frames, args.alloc_frames)
+    finally:
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
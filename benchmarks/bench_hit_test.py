@@ -0,0 +1,95 @@
+"""
+Dialog.widget_at() のヒットテストのベンチマーク
+
+I/Oマップを想定した、ボタンとチェックボックスを格子状に並べた合成ダイアログ
+（デフォルト 24 x 16 = 384 セル + ドロップダウン）で、Z-order順の線形探索と
+空間索引（WidgetGrid）による検索の1回あたりの時間を比較する。
+
+実行方法:
+    python benchmarks/bench_hit_test.py [--cols N] [--rows N]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dialog_manager import DialogManager
+from dialog_template import build_dialog
+
+CELL_WIDTH = 20
+CELL_HEIGHT = 12
+
+
+def linear_widget_at(dialog, mx, my):
+    """索引を使わない Z-order 順の線形探索"""
+    for widget in dialog._hit_order:
+        if widget.contains_point(mx, my):
+            return widget
+    return None
+
+
+def build_io_map_dialog(cols: int, rows: int):
+    """I/Oマップ風の合成ダイアログを生成する"""
+    widget_defs = [
+        {"type": "dropdown", "id": "IDC_PAGE", "x": 4, "y": 14, "width": 80, "height": 12,
+         "items": [f"Page {i}" for i in range(8)]},
+    ]
+    for row in range(rows):
+        for col in range(cols):
+            widget_defs.append({
+                "type": "checkbox" if (row + col) % 2 else "button",
+                "id": f"IDC_IO_{row:02d}_{col:02d}",
+                "text": "",
+                "x": 4 + col * CELL_WIDTH,
+                "y": 30 + row * CELL_HEIGHT,
+                "width": CELL_WIDTH - 2,
+                "height": CELL_HEIGHT - 2,
+            })
+    definition = {
+        "title": "I/O Map", "x": 0, "y": 0,
+        "width": 8 + cols * CELL_WIDTH, "height": 34 + rows * CELL_HEIGHT,
+        "widgets": widget_defs,
+    }
+
+    # widget_factory は DialogManager の既定の対応表を流用
+    manager = DialogManager(os.path.join(ROOT_DIR, "dialogs.json"))
+    return build_dialog("IDD_IO_MAP", definition, manager.widget_factory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dialog.widget_at() benchmark")
+    parser.add_argument("--cols", type=int, default=24, help="格子の列数")
+    parser.add_argument("--rows", type=int, default=16, help="格子の行数")
+    parser.add_argument("--points", type=int, default=10000, help="検索する座標の数")
+    args = parser.parse_args()
+
+    dialog = build_io_map_dialog(args.cols, args.rows)
+    rng = random.Random(0)
+    points = [(rng.randrange(dialog.width), rng.randrange(dialog.height)) for _ in range(args.points)]
+
+    dialog.widget_at(0, 0)  # 索引を作成しておく
+    for mx, my in points:
+        assert linear_widget_at(dialog, mx, my) is dialog.widget_at(mx, my)
+
+    def run_linear():
+        for mx, my in points:
+            linear_widget_at(dialog, mx, my)
+
+    def run_indexed():
+        for mx, my in points:
+            dialog.widget_at(mx, my)
+
+    linear = min(timeit.repeat(run_linear, number=1, repeat=5)) / args.points
+    indexed = min(timeit.repeat(run_indexed, number=1, repeat=5)) / args.points
+
+    print(f"{len(dialog.widgets)} widgets, {args.points} random points")
+    print(f"linear : {linear * 1e6:8.2f} us / hit-test")
+    print(f"indexed: {indexed * 1e6:8.2f} us / hit-test  ({linear / indexed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+FileManager.list_directory() のベンチマーク
+
+一時ディレクトリに5万件のファイル（とサブディレクトリ）を作成し、
+os.listdir() とエントリごとの isdir/isfile/getsize による従来の一覧取得と、
+os.scandir() の1回の走査による一覧取得を比較する。
+あわせて、走査結果のキャッシュを使う2回目以降の一覧取得（戻る・フィルター変更など）も計測する。
+
+ネットワークドライブなどシステムコールが遅い環境では差がさらに大きくなる。
+デバッグ出力は計測から除外する（標準出力を破棄する）。
+
+実行方法:
+    python benchmarks/bench_list_directory.py [--files N] [--dir PATH]
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from file_utils import FileItem, FileManager
+
+
+def legacy_list_directory(manager: FileManager):
+    """os.listdir() を使う従来の実装（FileItem はパスから種別とサイズを取得）"""
+    items = []
+    entries = os.listdir(manager.current_path)
+    if manager.show_directories:
+        for entry in sorted(entries):
+            full_path = os.path.join(manager.current_path, entry)
+            if os.path.isdir(full_path):
+                item = FileItem(full_path)
+                item.size  # 従来は作成時にサイズも取得していた
+                items.append(item)
+    for entry in sorted(entries):
+        full_path = os.path.join(manager.current_path, entry)
+        if os.path.isfile(full_path):
+            if manager._matches_filter(entry):
+                item = FileItem(full_path)
+                item.size
+                items.append(item)
+    return items
+
+
+def create_tree(path: str, files: int, directories: int):
+    """ベンチマーク用のファイルとディレクトリを作成"""
+    for i in range(directories):
+        os.mkdir(os.path.join(path, f"dir_{i:05d}"))
+    for i in range(files):
+        with open(os.path.join(path, f"file_{i:06d}.csv"), "w") as f:
+            f.write("x")
+    # 作成直後のディレクトリはキャッシュされないため、更新時刻を過去にする
+    past = time.time() - 60
+    os.utime(path, (past, past))
+
+
+def best_time(function, repeat: int) -> float:
+    """repeat回実行した中で最短の時間（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FileManager.list_directory() benchmark")
+    parser.add_argument("--files", type=int, default=50000, help="作成するファイル数")
+    parser.add_argument("--dirs", type=int, default=500, help="作成するディレクトリ数")
+    parser.add_argument("--dir", help="既存のディレクトリを計測する（作成しない）")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数（最短の時間を採用）")
+    args = parser.parse_args()
+
+    temp_dir = None
+    if args.dir:
+        path = args.dir
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="bench_list_directory_")
+        path = temp_dir
+        create_tree(path, args.files, args.dirs)
+
+    try:
+        manager = FileManager(path)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            legacy_items = legacy_list_directory(manager)
+            items = manager.list_directory()
+            assert [item.path for item in legacy_items] == [item.path for item in items]
+            legacy = best_time(lambda: legacy_list_directory(manager), args.repeat)
+
+            def list_uncached():
+                manager.clear_cache()
+                manager.list_directory()
+
+            scandir = best_time(list_uncached, args.repeat)
+            manager.list_directory()
+            cached = best_time(manager.list_directory, args.repeat)
+
+        print(f"{path}: {len(items):,} entries")
+        print(f"listdir + stat: {legacy * 1000:8.1f} ms")
+        print(f"scandir       : {scandir * 1000:8.1f} ms  ({legacy / scandir:.1f}x)")
+        print(f"cached        : {cached * 1000:8.1f} ms  ({legacy / cached:.1f}x)")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
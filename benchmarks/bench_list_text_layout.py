@@ -0,0 +1,142 @@
+"""
+リストの表示文字列キャッシュのベンチマーク
+
+ListBoxWidget / DropdownWidget の描画で、行ごとに str() と切り詰めを行う従来の処理と、
+切り詰め済みの文字列をキャッシュする現在の処理を比較する。
+描画命令そのものの時間を除くため、何も描画しない描画先に描画して1フレームあたりの時間を計測する。
+
+実行方法:
+    python benchmarks/bench_list_text_layout.py [--rows N] [--frames N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pyxel
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dialog_manager import DialogManager
+
+
+class NullCanvas:
+    """描画命令を何もしない描画先"""
+
+    def rect(self, *args):
+        pass
+
+    rectb = text = tri = line = rect
+
+
+def legacy_listbox_draw(listbox):
+    """従来の ListBoxWidget.draw()（行ごとに str() と切り詰めを行う）"""
+    canvas = listbox.dialog.canvas
+    x, y = listbox.dialog.x + listbox.x, listbox.dialog.y + listbox.y
+    canvas.rect(x, y, listbox.width, listbox.height, pyxel.COLOR_WHITE)
+    canvas.rectb(x, y, listbox.width, listbox.height, pyxel.COLOR_BLACK)
+    row_count = listbox.get_row_count()
+    for i in range(listbox.visible_items):
+        row = i + listbox.scroll_offset
+        if row >= row_count:
+            break
+        item_index = listbox._row_to_index(row)
+        item_y = y + 2 + i * listbox.item_height
+        item = listbox.items[item_index]
+        if item_index == listbox.selected_index:
+            canvas.rect(x + 1, item_y, listbox.width - 2, listbox.item_height, pyxel.COLOR_NAVY)
+        elif item_index == listbox.hover_index:
+            canvas.rect(x + 1, item_y, listbox.width - 2, listbox.item_height, pyxel.COLOR_LIGHT_BLUE)
+        text_color = pyxel.COLOR_WHITE if item_index == listbox.selected_index else pyxel.COLOR_BLACK
+        display_text = str(item)
+        max_chars = (listbox.width - 8) // 4
+        if len(display_text) > max_chars:
+            display_text = display_text[:max_chars-3] + "..."
+        canvas.text(x + 4, item_y + 2, display_text, text_color)
+    if row_count > listbox.visible_items:
+        listbox._draw_scroll_buttons(x, y)
+
+
+def legacy_dropdown_draw(dropdown):
+    """従来の DropdownWidget.draw()（ボタンと開いたリスト、毎フレーム切り詰めを行う）"""
+    canvas = dropdown.dialog.canvas
+    x, y = dropdown.dialog.x + dropdown.x, dropdown.dialog.y + dropdown.y
+    canvas.rect(x, y, dropdown.width, dropdown.height, pyxel.COLOR_WHITE)
+    canvas.rectb(x, y, dropdown.width, dropdown.height, pyxel.COLOR_BLACK)
+    display_text = dropdown.get_display_text()
+    text_y = y + (dropdown.height - pyxel.FONT_HEIGHT) // 2
+    max_chars = (dropdown.width - 20) // pyxel.FONT_WIDTH
+    if len(display_text) > max_chars:
+        display_text = display_text[:max_chars-3] + "..."
+    canvas.text(x + 2, text_y, display_text, pyxel.COLOR_BLACK)
+    arrow_x, arrow_y = x + dropdown.width - 12, y + dropdown.height // 2
+    canvas.tri(arrow_x, arrow_y - 2, arrow_x - 3, arrow_y + 2, arrow_x + 3, arrow_y + 2, pyxel.COLOR_BLACK)
+
+    list_y = y + dropdown.height
+    canvas.rect(x, list_y, dropdown.width, dropdown.dropdown_height, pyxel.COLOR_WHITE)
+    canvas.rectb(x, list_y, dropdown.width, dropdown.dropdown_height, pyxel.COLOR_BLACK)
+    for i in range(min(len(dropdown.items), dropdown.max_visible_items)):
+        item_y = list_y + i * dropdown.item_height
+        if i == dropdown.selected_index:
+            canvas.rect(x + 1, item_y, dropdown.width - 2, dropdown.item_height, pyxel.COLOR_CYAN)
+        elif i == dropdown.hover_item_index:
+            canvas.rect(x + 1, item_y, dropdown.width - 2, dropdown.item_height, pyxel.COLOR_LIGHT_BLUE)
+        item_text = dropdown.items[i]
+        max_chars = (dropdown.width - 6) // pyxel.FONT_WIDTH
+        if len(item_text) > max_chars:
+            item_text = item_text[:max_chars-3] + "..."
+        canvas.text(x + 3, item_y + (dropdown.item_height - pyxel.FONT_HEIGHT) // 2, item_text, pyxel.COLOR_BLACK)
+
+
+def cached_draw(widget):
+    """現在の draw()（切り詰め済みの文字列をキャッシュする）"""
+    widget.draw()
+
+
+def time_frames(draw, widget, frames: int, scroll: bool) -> float:
+    """1フレームあたりの描画時間（マイクロ秒）"""
+    draw(widget)
+    start = time.perf_counter()
+    for _ in range(frames):
+        if scroll:
+            widget.scroll_down()
+        draw(widget)
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ListBox/Dropdown text layout cache benchmark")
+    parser.add_argument("--rows", type=int, default=40, help="リストボックスの表示行数")
+    parser.add_argument("--items", type=int, default=10000, help="リストボックスのアイテム数")
+    parser.add_argument("--frames", type=int, default=2000, help="描画するフレーム数")
+    args = parser.parse_args()
+
+    manager = DialogManager(os.path.join(ROOT_DIR, "dialogs.json"))
+    manager.show("IDD_FILE_OPEN")
+    dialog = manager.active_dialog
+    dialog.canvas = NullCanvas()
+
+    listbox = dialog.find_widget("IDC_FILE_LIST")
+    listbox.height = args.rows * listbox.item_height + 4
+    listbox.visible_items = args.rows
+    items = [f"directory_{i % 50:02d}/measurement_log_{i:06d}_long_file_name.csv" for i in range(args.items)]
+
+    dropdown = dialog.find_widget("IDC_FILE_FILTER")
+    dropdown.is_open = True
+
+    print(f"listbox {args.rows} rows x {args.items:,} items, {args.frames} frames (us / frame)")
+    print(f"{'scenario':<20}{'legacy':>10}{'cached':>10}")
+    for label, scroll in (("listbox redraw", False), ("listbox scroll", True)):
+        results = []
+        for draw in (legacy_listbox_draw, cached_draw):
+            listbox.set_items(items)
+            results.append(time_frames(draw, listbox, args.frames, scroll))
+        print(f"{label:<20}{results[0]:>10.1f}{results[1]:>10.1f}")
+
+    results = [time_frames(draw, dropdown, args.frames, False) for draw in (legacy_dropdown_draw, cached_draw)]
+    print(f"{'dropdown (open)':<20}{results[0]:>10.1f}{results[1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
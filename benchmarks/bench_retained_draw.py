@@ -0,0 +1,62 @@
+"""
+保持モード描画（dirty rectangle）のベンチマーク
+
+I/Oマップ風の合成ダイアログ（bench_hit_test.py と同じ）を、ポインタが
+セル上を移動してホバー状態が毎フレーム変わる状況で描画し、
+毎フレーム全体を描き直す従来の描画と、変更のあった範囲だけを描き直す保持モードを比較する。
+
+画面の代わりに pyxel.Image に描画するため、ウィンドウを開かずに実行できる。
+
+実行方法:
+    python benchmarks/bench_retained_draw.py [--frames N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pyxel
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hit_test import CELL_HEIGHT, CELL_WIDTH, build_io_map_dialog
+from dialog_input import InputSnapshot
+
+
+def run_frames(dialog, frames: int, cols: int) -> float:
+    """ポインタを1セルずつ動かしながら入力処理と描画を行い、1フレームあたりの描画時間（秒）を返す"""
+    screen = pyxel.Image(dialog.width, dialog.height)
+    dialog.canvas = screen
+    draw_time = 0.0
+    for frame in range(frames):
+        col = frame % cols
+        dialog.dispatch_input(InputSnapshot(4 + col * CELL_WIDTH + 2, 30 + CELL_HEIGHT // 2))
+        start = time.perf_counter()
+        dialog.draw()
+        draw_time += time.perf_counter() - start
+    return draw_time / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retained-mode dialog drawing benchmark")
+    parser.add_argument("--cols", type=int, default=24, help="格子の列数")
+    parser.add_argument("--rows", type=int, default=16, help="格子の行数")
+    parser.add_argument("--frames", type=int, default=300, help="描画するフレーム数")
+    args = parser.parse_args()
+
+    immediate = build_io_map_dialog(args.cols, args.rows)
+    retained = build_io_map_dialog(args.cols, args.rows)
+    retained.retained = True
+
+    immediate_time = run_frames(immediate, args.frames, args.cols)
+    retained_time = run_frames(retained, args.frames, args.cols)
+
+    print(f"{len(immediate.widgets)} widgets, {args.frames} frames (hover moves every frame)")
+    print(f"immediate: {immediate_time * 1000:8.3f} ms / frame")
+    print(f"retained : {retained_time * 1000:8.3f} ms / frame  ({immediate_time / retained_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
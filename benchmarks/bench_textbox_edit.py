@@ -0,0 +1,102 @@
+"""
+テキストボックスの編集のベンチマーク
+
+数KB〜数十KBのテキスト（貼り付けた CSV を想定）の途中で文字を入力・削除する場合の
+1キーあたりの時間を、文字列全体をスライスで作り直す従来の方法と、ギャップバッファ
+（text_buffer.GapBuffer）で比較する。あわせて TextBoxWidget.on_key_down() 経由の時間と、
+キーごとに text を読む場合（描画やコントローラーの入力チェックで毎フレーム読まれる場合の上限）も計測する。
+
+実行方法:
+    python benchmarks/bench_textbox_edit.py [--sizes 1000,10000,100000] [--keys N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pyxel
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dialog_manager import DialogManager
+from text_buffer import GapBuffer
+
+
+def make_csv(size: int) -> str:
+    """size 文字程度の CSV テキスト"""
+    lines = []
+    length = 0
+    index = 0
+    while length < size:
+        line = f"{index},M{index},relay {index % 97}"
+        lines.append(line)
+        length += len(line) + 1
+        index += 1
+    return "\n".join(lines)[:size]
+
+
+def legacy_edit(text: str, cursor: int, keys: int) -> float:
+    """従来の方法（キーごとに文字列全体をスライスで作り直す）で、入力と削除を交互に行う"""
+    start = time.perf_counter()
+    for i in range(keys):
+        if i % 2 == 0:
+            text = text[:cursor] + "x" + text[cursor:]
+            cursor += 1
+        else:
+            text = text[:cursor-1] + text[cursor:]
+            cursor -= 1
+    return time.perf_counter() - start
+
+
+def gap_buffer_edit(text: str, cursor: int, keys: int) -> float:
+    """ギャップバッファで、入力と削除を交互に行う"""
+    buffer = GapBuffer(text)
+    start = time.perf_counter()
+    for i in range(keys):
+        if i % 2 == 0:
+            buffer.insert(cursor, "x")
+            cursor += 1
+        else:
+            buffer.delete(cursor - 1, cursor)
+            cursor -= 1
+    return time.perf_counter() - start
+
+
+def textbox_edit(textbox, keys: int, read_text: bool) -> float:
+    """TextBoxWidget で入力と削除を交互に行う（read_text の場合はキーごとに text を読む）"""
+    start = time.perf_counter()
+    for i in range(keys):
+        textbox.on_key_down(pyxel.KEY_X if i % 2 == 0 else pyxel.KEY_BACKSPACE, False)
+        if read_text:
+            textbox.text
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TextBoxWidget edit benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="テキストの文字数（カンマ区切り）")
+    parser.add_argument("--keys", type=int, default=2000, help="入力・削除するキーの数")
+    args = parser.parse_args()
+
+    manager = DialogManager(os.path.join(ROOT_DIR, "dialogs.json"))
+    manager.show("IDD_TEXT_INPUT")
+    textbox = next(widget for widget in manager.active_dialog.widgets
+                   if widget.__class__.__name__ == "TextBoxWidget")
+    textbox.max_length = 10 ** 9
+
+    print(f"{args.keys} keys at the middle of the text (us / key)")
+    print(f"{'chars':>10}{'str slice':>12}{'gap buffer':>12}{'textbox':>12}{'+ read text':>14}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        text = make_csv(size)
+        results = [legacy_edit(text, size // 2, args.keys), gap_buffer_edit(text, size // 2, args.keys)]
+        for read_text in (False, True):
+            textbox.text = text
+            textbox.cursor_pos = size // 2
+            results.append(textbox_edit(textbox, args.keys, read_text))
+        print(f"{size:>10,}" + "".join(f"{result / args.keys * 1e6:>12.2f}" for result in results[:3]) +
+              f"{results[3] / args.keys * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
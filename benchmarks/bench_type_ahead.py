@@ -0,0 +1,82 @@
+"""
+リストボックスのタイプアヘッド検索のベンチマーク
+
+デバイステーブルを想定した10万件のリストで、キー入力のたびに先頭から表示文字列を
+調べる線形探索と、前方一致検索用索引（ListSearchIndex）の二分探索を比較する。
+索引の作成時間（最初の検索時に1回だけ）と、絞り込み（set_filter）の時間も計測する。
+
+実行方法:
+    python benchmarks/bench_type_ahead.py [--items N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import timeit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dialog_manager import DialogManager
+
+
+def linear_find_prefix(items, prefix: str) -> int:
+    """索引を使わない前方一致検索（表示文字列が最も小さいアイテムを返す）"""
+    prefix = prefix.lower()
+    found = -1
+    found_key = None
+    for index in range(len(items)):
+        key = str(items[index]).lower()
+        if key.startswith(prefix) and (found_key is None or key < found_key):
+            found, found_key = index, key
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ListBoxWidget type-ahead benchmark")
+    parser.add_argument("--items", type=int, default=100000, help="アイテム数")
+    parser.add_argument("--queries", type=int, default=200, help="検索する文字列の数")
+    args = parser.parse_args()
+
+    items = [f"M{number:<6} relay {number % 97}" for number in range(args.items)]
+    rng = random.Random(0)
+    queries = [f"m{rng.randrange(args.items)}"[:rng.randint(2, 5)] for _ in range(args.queries)]
+
+    manager = DialogManager(os.path.join(ROOT_DIR, "dialogs.json"))
+    manager.show("IDD_FILE_OPEN")
+    listbox = manager.active_dialog.find_widget("IDC_FILE_LIST")
+    listbox.set_items(items)
+
+    start = time.perf_counter()
+    listbox.get_search_index()
+    build_time = time.perf_counter() - start
+
+    for query in queries[:20]:
+        assert linear_find_prefix(items, query) == listbox.find_prefix(query)
+
+    def run_linear():
+        for query in queries:
+            linear_find_prefix(items, query)
+
+    def run_indexed():
+        for query in queries:
+            listbox.find_prefix(query)
+
+    linear = min(timeit.repeat(run_linear, number=1, repeat=3)) / args.queries
+    indexed = min(timeit.repeat(run_indexed, number=1, repeat=3)) / args.queries
+
+    start = time.perf_counter()
+    listbox.set_filter("m12")
+    filter_time = time.perf_counter() - start
+    filtered = listbox.get_row_count()
+
+    print(f"{args.items:,} items, {args.queries} prefixes")
+    print(f"index build: {build_time * 1000:8.2f} ms (once per set_items)")
+    print(f"linear     : {linear * 1e6:8.2f} us / search")
+    print(f"indexed    : {indexed * 1e6:8.2f} us / search  ({linear / indexed:.0f}x)")
+    print(f"set_filter : {filter_time * 1000:8.2f} ms ('m12' -> {filtered:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
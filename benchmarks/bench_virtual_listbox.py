@@ -0,0 +1,86 @@
+"""
+仮想リストボックスのベンチマーク
+
+デバイステーブルを想定した10万件のリストで、表示文字列のリストを作る従来の
+set_items() と、表示範囲の行だけを生成する set_virtual_items() を比較する。
+設定にかかる時間・メモリ（tracemalloc）と、1行ずつスクロールしながら描画する
+1フレームあたりの時間を計測する。
+
+画面の代わりに pyxel.Image に描画するため、ウィンドウを開かずに実行できる。
+
+実行方法:
+    python benchmarks/bench_virtual_listbox.py [--items N]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import pyxel
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dialog_manager import DialogManager
+
+
+class Device:
+    """リストに表示する元データ（デバイス番号とコメント）"""
+    __slots__ = ("number", "comment")
+
+    def __init__(self, number: int):
+        self.number = number
+        self.comment = f"relay {number % 97}"
+
+    def get_display_name(self) -> str:
+        return f"M{self.number:<6} {self.comment}"
+
+
+def measure(label, listbox, setup, frames: int):
+    """アイテムの設定と、スクロールしながらの描画を計測する"""
+    start = time.perf_counter()
+    setup()
+    setup_time = time.perf_counter() - start
+
+    # メモリは時間計測とは別に、もう一度設定して計測する（tracemalloc は処理を遅くするため）
+    listbox.set_items([])
+    tracemalloc.start()
+    setup()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    screen = pyxel.Image(320, 320)
+    listbox.dialog.canvas = screen
+    start = time.perf_counter()
+    for _ in range(frames):
+        listbox.scroll_down()
+        listbox.draw()
+    frame_time = (time.perf_counter() - start) / frames
+
+    print(f"{label:<10}{setup_time * 1000:>14.2f}{memory / 1024:>16,.0f}{frame_time * 1e6:>18.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Virtual ListBoxWidget benchmark")
+    parser.add_argument("--items", type=int, default=100000, help="アイテム数")
+    parser.add_argument("--frames", type=int, default=500, help="スクロールして描画するフレーム数")
+    args = parser.parse_args()
+
+    devices = [Device(i) for i in range(args.items)]
+
+    manager = DialogManager(os.path.join(ROOT_DIR, "dialogs.json"))
+    manager.show("IDD_FILE_OPEN")
+    listbox = manager.active_dialog.find_widget("IDC_FILE_LIST")
+
+    print(f"{args.items:,} items")
+    print(f"{'mode':<10}{'setup (ms)':>14}{'memory (KiB)':>16}{'frame (us)':>18}")
+    measure("list", listbox,
+            lambda: listbox.set_items([device.get_display_name() for device in devices]), args.frames)
+    measure("virtual", listbox,
+            lambda: listbox.set_virtual_items(len(devices), lambda index: devices[index].get_display_name()),
+            args.frames)
+
+
+if __name__ == "__main__":
+    main()
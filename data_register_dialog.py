@@ -10,6 +10,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.base_dialog_controller import PyPlcDialogController
 from .dialog_manager import DialogManager
+from .debug_log import get_logger
+
+logger = get_logger("dialogs")
 
 
 class DataRegisterDialogController(PyPlcDialogController):
@@ -62,11 +65,7 @@ class DataRegisterDialogController(PyPlcDialogController):
         """ウィジェットIDでウィジェットを検索"""
         if not self.active_dialog:
             return None
-            
-        for widget in self.active_dialog.widgets:
-            if hasattr(widget, 'id') and widget.id == widget_id:
-                return widget
-        return None
+        return self.active_dialog.find_widget(widget_id)
     
     def _validate_mitsubishi_data_register_id(self, device_id: str) -> bool:
         """
@@ -121,15 +120,15 @@ class DataRegisterDialogController(PyPlcDialogController):
         # ドロップダウンの選択変更イベント
         operation_widget = self._find_widget("IDC_OPERATION_DROPDOWN")
         if operation_widget:
-            print(f"[DEBUG] Setting up operation dropdown event handler for widget: {operation_widget}")
+            logger.debug("Setting up operation dropdown event handler for widget: %s", operation_widget)
             operation_widget.on_selection_changed = self.handle_operation_changed
-            print(f"[DEBUG] Operation dropdown event handler set successfully")
+            logger.debug("Operation dropdown event handler set successfully")
         else:
-            print(f"[DEBUG] Operation dropdown widget 'IDC_OPERATION_DROPDOWN' not found!")
+            logger.debug("Operation dropdown widget 'IDC_OPERATION_DROPDOWN' not found!")
 
     def handle_operation_changed(self, selected_index: int, selected_value: str):
         """操作種類ドロップダウンの選択が変更された時の処理"""
-        print(f"[DEBUG] Operation changed to: {selected_value} (index: {selected_index})")
+        logger.debug("Operation changed to: %s (index: %d)", selected_value, selected_index)
         
         # オペランド値入力欄にヒントを表示（任意）
         operand_widget = self._find_widget("IDC_OPERAND_INPUT")
@@ -145,7 +144,7 @@ class DataRegisterDialogController(PyPlcDialogController):
             hint = hint_values.get(selected_value, "")
             if hint:
                 operand_widget.text = hint
-                print(f"[DEBUG] Set hint value: {hint} for operation: {selected_value}")
+                logger.debug("Set hint value: %s for operation: %s", hint, selected_value)
     
     def handle_ok_button(self):
         """OKボタンが押された時の処理"""
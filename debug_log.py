@@ -0,0 +1,83 @@
+"""
+デバッグ出力（ログ）の設定
+
+各モジュールはサブシステムごとのロガー（"pydialog.widgets" など）にデバッグ情報を出力する。
+既定ではデバッグ出力は無効で、ファイル一覧などの処理でメッセージの組み立ても行わない。
+
+有効にする方法:
+    import debug_log
+    debug_log.enable_debug()            # すべてのサブシステム
+    debug_log.enable_debug("files")     # ファイル一覧のみ
+
+    # または環境変数で指定（カンマ区切り、"all" ですべて）
+    PYDIALOG_DEBUG=files,widgets python main.py
+
+サブシステム:
+    widgets : ウィジェットのイベント（クリック、選択変更など）
+    files   : ファイル一覧とフィルター
+    dialogs : ダイアログコントローラー
+"""
+import logging
+import os
+import sys
+from typing import Optional
+
+ROOT_LOGGER_NAME = "pydialog"
+SUBSYSTEMS = ("widgets", "files", "dialogs")
+
+_root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+# アプリケーション側でルートロガーを DEBUG にしても、明示的に有効にするまでは出力しない
+_root_logger.setLevel(logging.WARNING)
+_handler: Optional[logging.Handler] = None
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """サブシステムのロガーを取得"""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{subsystem}")
+
+
+def _ensure_handler():
+    """従来の print() と同じく標準出力に出力するハンドラーを追加（1回だけ）"""
+    global _handler
+    if _handler is None:
+        _handler = logging.StreamHandler(sys.stdout)
+        _handler.setFormatter(logging.Formatter("[%(levelname)s] %(name)s: %(message)s"))
+        _root_logger.addHandler(_handler)
+
+
+def set_level(level: int, subsystem: Optional[str] = None):
+    """
+    出力レベルを設定
+
+    Args:
+        level: logging.DEBUG などのレベル
+        subsystem: サブシステム名（省略した場合はすべて）
+    """
+    _ensure_handler()
+    logger = _root_logger if subsystem is None else get_logger(subsystem)
+    logger.setLevel(level)
+
+
+def enable_debug(subsystem: Optional[str] = None):
+    """デバッグ出力を有効にする（subsystem を省略した場合はすべて）"""
+    set_level(logging.DEBUG, subsystem)
+
+
+def disable_debug(subsystem: Optional[str] = None):
+    """デバッグ出力を無効にする（subsystem を省略した場合はすべて）"""
+    set_level(logging.WARNING, subsystem)
+
+
+def _configure_from_environment():
+    """環境変数 PYDIALOG_DEBUG で指定されたサブシステムのデバッグ出力を有効にする"""
+    value = os.environ.get("PYDIALOG_DEBUG", "")
+    for name in (part.strip() for part in value.split(",")):
+        if name == "all":
+            enable_debug()
+        elif name in SUBSYSTEMS:
+            enable_debug(name)
+        elif name:
+            print(f"Warning: Unknown PYDIALOG_DEBUG subsystem: {name} (expected one of {SUBSYSTEMS})")
+
+
+_configure_from_environment()
@@ -4,12 +4,15 @@
 import re
 import pyxel
 from .dialog_manager import DialogManager
+from .debug_log import get_logger
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.base_dialog_controller import PyPlcDialogController
 from config import DeviceType, TimerConfig, CounterConfig
 
+logger = get_logger("dialogs")
+
 class DeviceIdDialogController(PyPlcDialogController):
     """デバイスID編集ダイアログのロジックを管理する"""
 
@@ -20,12 +23,12 @@ class DeviceIdDialogController(PyPlcDialogController):
 
     def show_dialog(self, device_type: DeviceType, initial_value: str = ""):
         """ダイアログを表示する"""
-        print(f"[DEBUG] DeviceIdDialogController.show_dialog called: type={device_type}, initial={initial_value}")
+        logger.debug("DeviceIdDialogController.show_dialog called: type=%s, initial=%s", device_type, initial_value)
         self.result = None
         self.device_type = device_type
         self.last_input_text = initial_value
         if self._safe_show_dialog("IDD_DEVICE_ID_EDIT"):
-            print(f"[DEBUG] Dialog successfully created and assigned")
+            logger.debug("Dialog successfully created and assigned")
             self.active_dialog.title = f"Edit {device_type.name} ID"
             
             # デバイスタイプ表示を更新
@@ -41,7 +44,7 @@ class DeviceIdDialogController(PyPlcDialogController):
             # エラーメッセージをクリア
             self._clear_error_message()
         else:
-            print(f"[DEBUG] ERROR: Failed to create dialog 'IDD_DEVICE_ID_EDIT'")
+            logger.error("Failed to create dialog 'IDD_DEVICE_ID_EDIT'")
 
     # get_result()は基底クラスから継承
 
@@ -1,5 +1,8 @@
-import pyxel
+import math
+import dialog_profiler
+from dialog_backend import get_backend
 from widgets import LabelWidget, ButtonWidget, TextBoxWidget, ListBoxWidget, resolve_color
+from widget_grid import WidgetGrid
 
 class Dialog:
     """
@@ -16,6 +19,15 @@ class Dialog:
         self.dialog_id = dialog_id
         self.definition = definition
         self.is_active = True # モーダルなのでデフォルトでアクティブ
+
+        # 描画・入力のバックエンド（表示時に DialogManager のバックエンドに置き換わる）
+        self.backend = get_backend()
+        # 描画先（通常は画面。保持モードの描画中はオフスクリーン画像）
+        self.canvas = self.backend.screen
+        # 保持モード描画: オフスクリーン画像に描画し、変更のあったウィジェットだけを描き直す
+        self.retained = definition.get("retained_rendering", False)
+        self._framebuffer = None
+        self._drawn_chrome = None
         
         # ダイアログレベルのカラープロパティ（COLOR_xxx文字列対応）
         self.bg_color = resolve_color(definition.get("bg_color", "COLOR_WHITE"))
@@ -23,29 +35,139 @@ class Dialog:
         self.title_text_color = resolve_color(definition.get("title_text_color", "COLOR_WHITE"))
         self.border_color = resolve_color(definition.get("border_color", "COLOR_BLACK"))
 
+    def clone(self):
+        """
+        ダイアログとウィジェットを複製する（テンプレートからの生成用）
+
+        定義の再解釈は行わず、解決済みの属性をそのままコピーする。
+        """
+        new_dialog = self.__class__.__new__(self.__class__)
+        new_dialog.__dict__.update(self.__dict__)
+        new_dialog.widgets = [widget.clone(new_dialog) for widget in self.widgets]
+        return new_dialog
+
+    def reset_from(self, prototype):
+        """
+        プロトタイプの状態に戻す（プールからの再利用用）
+
+        ウィジェットのインスタンスは再生成せず、それぞれをプロトタイプの状態に戻す。
+        ウィジェット構成が変わっている場合は複製し直す。
+        """
+        widgets = self.widgets
+        self.__dict__.clear()
+        self.__dict__.update(prototype.__dict__)
+        if (len(widgets) == len(prototype.widgets) and
+                all(type(w) is type(pw) for w, pw in zip(widgets, prototype.widgets))):
+            for widget, prototype_widget in zip(widgets, prototype.widgets):
+                widget.reset_from(prototype_widget, self)
+            self.widgets = widgets
+        else:
+            self.widgets = [widget.clone(self) for widget in prototype.widgets]
+
     def update(self):
         if not self.is_active:
             return
 
-        # 管理しているウィジェットの更新処理を呼び出す
-        for widget in self.widgets:
-            widget.update()
+        # 入力はフレームごとに1回だけ取得し、対象のウィジェットにだけ配送する
+        profiler = dialog_profiler.profiler
+        if profiler is not None:
+            profiler.start()
+        focus = self._focus_widget
+        snapshot = self.backend.capture_input(focus.input_keys if focus is not None else ())
+        self.dispatch_input(snapshot, profiler)
+        if profiler is not None:
+            profiler.lap(("update", self.dialog_id, self.dialog_id))
+
+    def dispatch_input(self, snapshot, profiler=None):
+        """
+        1フレーム分の入力をウィジェットに配送する
+
+        マウスイベントはポインタ下の最前面のウィジェットに、キーイベントは
+        フォーカス中のウィジェットにだけ送る。update() はフォーカス中のウィジェットのみ呼ぶ。
+        profiler を指定した場合は、ヒットテストをダイアログの、イベントの処理を
+        それぞれのウィジェットの処理時間として計測する。
+        """
+        # 前フレームでクリックされたウィジェットの押下状態を解除
+        clicked = self._clicked_widget
+        if clicked is not None:
+            self._clicked_widget = None
+            clicked.clear_click()
+
+        mx, my = snapshot.mouse_x, snapshot.mouse_y
+        target = self.widget_at(mx, my)
+        if profiler is not None:
+            profiler.lap(("update", self.dialog_id, self.dialog_id))
+        hover = self._hover_widget
+        if target is not hover:
+            self._hover_widget = target
+            if hover is not None:
+                hover.on_mouse_leave()
+        if target is not None:
+            target.on_mouse_move(mx, my)
+
+        if snapshot.clicked:
+            # ウィジェット以外（またはフォーカスしないウィジェット）のクリックでフォーカスを外す
+            self.set_focus(target if target is not None and target.focusable else None)
+            if target is not None:
+                self._clicked_widget = target
+                target.on_mouse_down(mx, my)
+        if profiler is not None and target is not None:
+            profiler.lap(("update", self.dialog_id, _widget_name(target)))
+
+        focus = self._focus_widget
+        if focus is not None:
+            for key in snapshot.keys:
+                focus.on_key_down(key, snapshot.shift)
+            focus.update()
+            if profiler is not None:
+                profiler.lap(("update", self.dialog_id, _widget_name(focus)))
+
+    def widget_at(self, mx, my):
+        """画面座標にある最前面の入力対象ウィジェットを取得（無ければNone）"""
+        grid = self._widget_grid
+        if grid is None:
+            # 索引は最初のヒットテスト時に作成する（テンプレートからの生成を遅くしないため）
+            grid = self._widget_grid = WidgetGrid(self._hit_order)
+        hit = grid.widget_at(mx, my, self.x, self.y)
+
+        # 開いているドロップダウンリストはボタンの矩形からはみ出すため、グリッドとは別に調べる
+        for dropdown in self._dropdowns:
+            if dropdown.is_open and dropdown.contains_point(mx, my):
+                if hit is None or self._hit_rank[dropdown] < self._hit_rank[hit]:
+                    return dropdown
+                break
+        return hit
+
+    def set_focus(self, widget):
+        """フォーカスを指定したウィジェットに移す（Noneでフォーカスを外す）"""
+        old_focus = self._focus_widget
+        if widget is old_focus:
+            return
+        self._focus_widget = widget
+        if old_focus is not None:
+            old_focus.on_blur()
+        if widget is not None:
+            widget.on_focus()
+
+    @property
+    def focused_widget(self):
+        """フォーカス中のウィジェット"""
+        return self._focus_widget
 
     def draw(self):
         if not self.is_active:
             return
 
-        # ダイアログの背景を描画（カラープロパティ対応）
-        pyxel.rect(self.x, self.y, self.width, self.height, self.bg_color)
-        
-        # タイトルバー
-        pyxel.rect(self.x, self.y, self.width, 12, self.title_bg_color)
-        
-        # 枠線
-        pyxel.rectb(self.x, self.y, self.width, self.height, self.border_color)
-        
-        # タイトルテキスト
-        pyxel.text(self.x + 4, self.y + 3, self.title, self.title_text_color)
+        profiler = dialog_profiler.profiler
+        if profiler is not None:
+            self._draw_profiled(profiler)
+            return
+
+        if self.retained:
+            self._draw_retained()
+            return
+
+        self._draw_frame()
 
         # 管理しているウィジェットの描画処理を呼び出す
         # ドロップダウンウィジェット以外を先に描画
@@ -59,10 +181,200 @@ class Dialog:
         # ドロップダウンウィジェットを最後に描画（Z-orderを最前面にするため）
         for dropdown in dropdown_widgets:
             dropdown.draw()
-    
+
+    def _draw_profiled(self, profiler):
+        """ウィジェットごとの描画時間を計測しながら描画する（プロファイラーが有効な場合）"""
+        dialog_key = ("draw", self.dialog_id, self.dialog_id)
+        profiler.start()
+        if self.retained:
+            self._draw_retained(profiler)
+            profiler.lap(dialog_key)
+            return
+
+        self._draw_frame()
+        profiler.lap(dialog_key)
+        for widget in self._paint_order + self._dropdowns[::-1]:
+            widget.draw()
+            profiler.lap(("draw", self.dialog_id, _widget_name(widget)))
+
+    def _draw_frame(self):
+        """ダイアログの背景・タイトルバー・枠線を描画"""
+        canvas = self.canvas
+
+        # ダイアログの背景を描画（カラープロパティ対応）
+        canvas.rect(self.x, self.y, self.width, self.height, self.bg_color)
+        
+        # タイトルバー
+        canvas.rect(self.x, self.y, self.width, 12, self.title_bg_color)
+        
+        # 枠線
+        canvas.rectb(self.x, self.y, self.width, self.height, self.border_color)
+        
+        # タイトルテキスト
+        canvas.text(self.x + 4, self.y + 3, self.title, self.title_text_color)
+
+    def _draw_retained(self, profiler=None):
+        """
+        保持モードの描画
+
+        ダイアログをオフスクリーン画像に描画しておき、前フレームから変更のあった
+        ウィジェットの範囲だけを描き直して画面に転送する。ドロップダウンは
+        リストがダイアログの外にはみ出すため、従来どおり毎フレーム画面に直接描画する。
+        profiler を指定した場合は、描き直したウィジェットごとの描画時間を計測する。
+        """
+        chrome = (self.width, self.height, self.title, self.bg_color,
+                  self.title_bg_color, self.title_text_color, self.border_color)
+        framebuffer = self._framebuffer
+        full_redraw = framebuffer is None or chrome != self._drawn_chrome
+        if framebuffer is None or framebuffer.width != self.width or framebuffer.height != self.height:
+            framebuffer = self._framebuffer = self.backend.create_image(self.width, self.height)
+
+        # ウィジェットは画面座標で描画するため、カメラでダイアログの位置を原点に合わせる
+        screen = self.canvas
+        framebuffer.camera(self.x, self.y)
+        self.canvas = framebuffer
+        try:
+            if full_redraw:
+                self._drawn_chrome = chrome
+                self._repaint(None, profiler)
+            else:
+                region = self._dirty_region()
+                if region is not None:
+                    framebuffer.clip(*region)
+                    self._repaint(region, profiler)
+                    framebuffer.clip()
+        finally:
+            self.canvas = screen
+            framebuffer.camera()
+
+        screen.blt(self.x, self.y, framebuffer, 0, 0, self.width, self.height)
+        for dropdown in self._dropdowns[::-1]:
+            if profiler is not None:
+                profiler.lap(("draw", self.dialog_id, self.dialog_id))
+            dropdown.draw()
+            if profiler is not None:
+                profiler.lap(("draw", self.dialog_id, _widget_name(dropdown)))
+
+    def _dirty_region(self):
+        """
+        前回の描画から状態が変わったウィジェットの範囲をまとめた矩形（変更が無ければNone）
+
+        状態の変化は、描画時に保存したインスタンス辞書の浅いコピーとの比較で判定する。
+        移動・サイズ変更したウィジェットは移動前の範囲も含める。
+        """
+        drawn_states = self._drawn_states
+        drawn_bounds = self._drawn_bounds
+        region = None
+        for widget in self._paint_order:
+            if widget.__dict__ == drawn_states.get(widget):
+                continue
+            bounds = _int_rect(widget.draw_bounds())
+            old_bounds = drawn_bounds.get(widget)
+            if old_bounds is not None and old_bounds != bounds:
+                region = _union(region, old_bounds)
+            region = _union(region, bounds)
+            drawn_bounds[widget] = bounds
+        return region
+
+    def _repaint(self, region, profiler=None):
+        """
+        指定範囲（ダイアログ相対、Noneで全体）の背景と、範囲に重なるウィジェットを描画順に描き直す
+        """
+        self._draw_frame()
+        drawn_states = self._drawn_states
+        drawn_bounds = self._drawn_bounds
+        for widget in self._paint_order:
+            if region is None:
+                drawn_bounds[widget] = _int_rect(widget.draw_bounds())
+            elif not _intersects(drawn_bounds[widget], region):
+                continue
+            if profiler is not None:
+                profiler.lap(("draw", self.dialog_id, self.dialog_id))
+                widget.draw()
+                profiler.lap(("draw", self.dialog_id, _widget_name(widget)))
+            else:
+                widget.draw()
+            drawn_states[widget] = widget.__dict__.copy()
+
+    def invalidate(self):
+        """保持モード描画で、次のフレームにダイアログ全体を描き直す"""
+        self._drawn_chrome = None
+
+    @property
+    def widgets(self):
+        """管理しているウィジェットのリスト"""
+        return self._widgets
+
+    @widgets.setter
+    def widgets(self, widgets):
+        # 再代入時にID索引を再構築し、入力の配送状態をリセットする
+        self._widgets = widgets
+        self._hover_widget = None
+        self._focus_widget = None
+        self._clicked_widget = None
+        self._drawn_states = {}
+        self._drawn_bounds = {}
+        self.rebuild_widget_index()
+
+    def rebuild_widget_index(self):
+        """
+        ウィジェットIDの索引とヒットテスト・描画順の索引を再構築する
+
+        widgets リストを再代入せずに直接変更（append など）した場合や、
+        ウィジェットを移動・サイズ変更した場合に呼び出す。
+        同じIDが複数ある場合は、リストの先頭に近いものを優先する（従来の線形探索と同じ）。
+        """
+        index = {}
+        for widget in self._widgets:
+            widget_id = getattr(widget, 'id', None)
+            if widget_id is not None and widget_id not in index:
+                index[widget_id] = widget
+        self._widget_index = index
+
+        # ヒットテストの順序（描画の逆順: ドロップダウンは最後に描画されるので最前面）
+        interactive = [widget for widget in self._widgets if widget.interactive]
+        dropdowns = [widget for widget in interactive if widget.__class__.__name__ == 'DropdownWidget']
+        others = [widget for widget in interactive if widget.__class__.__name__ != 'DropdownWidget']
+        self._dropdowns = dropdowns[::-1]
+        # 描画順（ドロップダウン以外、リストの順）
+        self._paint_order = [widget for widget in self._widgets
+                             if widget.__class__.__name__ != 'DropdownWidget']
+        self._hit_order = self._dropdowns + others[::-1]
+        self._hit_rank = {widget: rank for rank, widget in enumerate(self._hit_order)}
+        self._widget_grid = None
+
+        # 保持モード描画では次のフレームで全体を描き直す
+        self._drawn_chrome = None
+
     def find_widget(self, widget_id):
         """指定されたIDのウィジェットを検索"""
-        for widget in self.widgets:
-            if hasattr(widget, 'id') and widget.id == widget_id:
-                return widget
-        return None
\ No newline at end of file
+        return self._widget_index.get(widget_id)
+
+
+def _widget_name(widget):
+    """プロファイラーの項目名（IDの無いウィジェットはクラス名）"""
+    return widget.id or widget.__class__.__name__
+
+
+def _int_rect(rect):
+    """矩形を整数座標に丸める（外側に広げる）"""
+    x, y, width, height = rect
+    left, top = math.floor(x), math.floor(y)
+    return (left, top, math.ceil(x + width) - left, math.ceil(y + height) - top)
+
+
+def _intersects(a, b):
+    """2つの矩形（x, y, width, height）が重なるか"""
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+def _union(a, b):
+    """2つの矩形を囲む矩形（a がNoneの場合は b）"""
+    if a is None:
+        return b
+    left = min(a[0], b[0])
+    top = min(a[1], b[1])
+    right = max(a[0] + a[2], b[0] + b[2])
+    bottom = max(a[1] + a[3], b[1] + b[3])
+    return (left, top, right - left, bottom - top)
@@ -0,0 +1,186 @@
+"""
+ダイアログの描画・入力のバックエンド
+
+Dialog は描画先（screen）、入力の取得（capture_input）、時刻（time）をバックエンド経由で使う。
+
+- PyxelBackend: pyxel の画面と入力を使う（既定）
+- HeadlessBackend: ウィンドウを開かずに動かす。描画先はメモリ上の画像で、入力はスクリプトで与える。
+  ディスプレイの無い環境でのベンチマークや、操作を再生するテストに使う。
+
+使い方:
+    backend = HeadlessBackend()
+    manager = DialogManager("dialogs.json", backend=backend)
+    manager.show("IDD_TEXT_INPUT")
+    backend.click(60, 40)
+    backend.type_text("hello")
+    backend.run(manager.update, manager.draw)
+"""
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import pyxel
+
+from dialog_input import InputSnapshot, TEXT_CHAR_KEYS
+
+
+class PyxelBackend:
+    """
+    pyxel の画面と入力を使うバックエンド
+
+    Attributes:
+        screen: 描画先（pyxel モジュール。rect() や text() などの描画関数を持つ）
+    """
+
+    def __init__(self):
+        self.screen = pyxel
+
+    def capture_input(self, watched_keys=()) -> InputSnapshot:
+        """このフレームの入力を取得（watched_keys はフォーカス中のウィジェットが監視するキー）"""
+        return InputSnapshot.capture(watched_keys)
+
+    def create_image(self, width: int, height: int):
+        """オフスクリーンの描画先を作成（保持モード描画用）"""
+        return pyxel.Image(width, height)
+
+    def time(self) -> float:
+        """現在時刻（ダブルクリック・タイプアヘッド・カーソル点滅の判定用、秒）"""
+        return time.time()
+
+
+# 文字 -> (キーコード, Shift押下) の対応表（type_text() 用）
+_CHAR_TO_KEY = {}
+for _key, (_char, _shift_char) in sorted(TEXT_CHAR_KEYS.items()):
+    _CHAR_TO_KEY.setdefault(_shift_char, (_key, True))
+    _CHAR_TO_KEY[_char] = (_key, False)
+
+
+class HeadlessBackend:
+    """
+    ウィンドウを開かずに動かすバックエンド
+
+    描画先はメモリ上の画像（pyxel.Image、pyxel.init() は不要）で、描画結果は screen.pget() で調べられる。
+    入力はフレームごとのスクリプトとして登録し、next_frame() で1フレーム分ずつ取り出す
+    （run() は毎フレーム next_frame() を呼び出す）。
+    時刻は実時間ではなくフレーム数から計算するため、ダブルクリックなどの判定も再生のたびに同じになる。
+
+    Attributes:
+        screen: 描画先の画像
+        fps: 1秒あたりのフレーム数（時刻の計算に使う）
+        frame_count: 経過したフレーム数
+        mouse_x, mouse_y: 現在のマウス座標
+    """
+
+    def __init__(self, width: int = 256, height: int = 256, fps: int = 30):
+        self.screen = pyxel.Image(width, height)
+        self.fps = fps
+        self.frame_count = 0
+        self.mouse_x = 0
+        self.mouse_y = 0
+        self._start_time = time.time()
+        self._frames = deque()  # フレームごとの入力（mouse_x, mouse_y, clicked, keys, shift）、None は入力なし
+        self._current = None  # 現在のフレームの入力
+
+    @property
+    def pending_frames(self) -> int:
+        """まだ取り出していない入力のフレーム数"""
+        return len(self._frames)
+
+    def move_mouse(self, x: int, y: int):
+        """マウスを移動するフレームを追加"""
+        self._frames.append((x, y, False, (), False))
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None):
+        """左クリックするフレームを追加（座標を省略した場合は現在の位置）"""
+        self._frames.append((x, y, True, (), False))
+
+    def double_click(self, x: Optional[int] = None, y: Optional[int] = None):
+        """連続した2フレームのクリックを追加"""
+        self.click(x, y)
+        self.click(x, y)
+
+    def press_key(self, key: int, shift: bool = False):
+        """キーを押すフレームを追加"""
+        self._frames.append((None, None, False, (key,), shift))
+
+    def type_text(self, text: str):
+        """文字列を1文字ずつ入力するフレームを追加（入力できない文字は ValueError）"""
+        for char in text:
+            key = _CHAR_TO_KEY.get(char)
+            if key is None:
+                raise ValueError(f"Cannot type character: {char!r}")
+            self.press_key(*key)
+
+    def wait(self, frames: int = 1):
+        """入力の無いフレームを追加"""
+        self._frames.extend([None] * frames)
+
+    def next_frame(self):
+        """次のフレームに進み、スクリプトから1フレーム分の入力を取り出す（update の前に呼び出す）"""
+        self.frame_count += 1
+        frame = self._current = self._frames.popleft() if self._frames else None
+        if frame is not None:
+            x, y = frame[0], frame[1]
+            if x is not None:
+                self.mouse_x = x
+            if y is not None:
+                self.mouse_y = y
+
+    def capture_input(self, watched_keys=()) -> InputSnapshot:
+        """現在のフレームの入力を取得"""
+        frame = self._current
+        if frame is None:
+            return InputSnapshot(self.mouse_x, self.mouse_y)
+        clicked, pressed, shift = frame[2], frame[3], frame[4]
+        # pyxel と同様に、監視しているキーだけを監視順で返す
+        keys = tuple(key for key in watched_keys if key in pressed) if pressed else ()
+        return InputSnapshot(self.mouse_x, self.mouse_y, clicked, keys, shift and bool(keys))
+
+    def create_image(self, width: int, height: int):
+        """オフスクリーンの描画先を作成（保持モード描画用）"""
+        return pyxel.Image(width, height)
+
+    def time(self) -> float:
+        """フレーム数から計算した時刻（秒）"""
+        return self._start_time + self.frame_count / self.fps
+
+    def run(self, update: Callable[[], None], draw: Optional[Callable[[], None]] = None,
+            frames: Optional[int] = None) -> int:
+        """
+        pyxel.run() の代わりに update / draw を繰り返し呼び出す
+
+        Args:
+            update: フレームごとの更新処理（DialogManager.update など）
+            draw: フレームごとの描画処理（省略可）
+            frames: 実行するフレーム数（省略した場合は登録した入力をすべて取り出すまで）
+
+        Returns:
+            int: 実行したフレーム数
+        """
+        count = 0
+        while count < frames if frames is not None else self._frames:
+            self.next_frame()
+            update()
+            if draw is not None:
+                draw()
+            count += 1
+        return count
+
+
+_backend = PyxelBackend()
+
+
+def get_backend():
+    """既定のバックエンド（DialogManager で指定しなかった場合に使う）"""
+    return _backend
+
+
+def set_backend(backend):
+    """
+    既定のバックエンドを設定する
+
+    ダイアログやテンプレートを生成する前に呼び出す（生成済みのダイアログは DialogManager の
+    backend が表示時に設定される）。
+    """
+    global _backend
+    _backend = backend
@@ -0,0 +1,225 @@
+"""
+ダイアログ定義ファイルの遅延読み込み
+
+起動時にはファイル全体を読み込むだけで JSON としては解析せず、
+トップレベルのダイアログIDと値のバイト範囲（オフセット）だけを索引化する。
+個々のダイアログ定義は最初にアクセスされた時点（通常は初回 show()）で解析する。
+数百〜数千のダイアログを含む定義ファイルで起動時間を短縮するために使用する。
+"""
+import json
+import re
+from collections.abc import Mapping
+from typing import Dict, Iterator, Tuple
+
+# JSON文字列（エスケープを含む）
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+
+# 括弧を含まない範囲（文字列と、括弧・引用符以外の文字の連続）
+# 正規表現のバックトラックが爆発しないよう、曖昧さのない展開形で記述している
+_FLAT = rb'[^"{}\[\]]*(?:' + _STRING + rb'[^"{}\[\]]*)*'
+
+# トップレベル用: 括弧を含まない範囲を読み飛ばす
+_SKIP_SHALLOW = re.compile(_FLAT, re.DOTALL)
+
+# ダイアログ内部用: 上記に加えて、入れ子を含まないオブジェクト・配列も丸ごと読み飛ばす
+# ウィジェット定義の大半は入れ子を含まないため、括弧ごとのループ回数を大きく減らせる
+_SKIP_DEEP = re.compile(
+    _FLAT + rb'(?:(?:\{' + _FLAT + rb'\}|\[' + _FLAT + rb'\])' + _FLAT + rb')*',
+    re.DOTALL,
+)
+
+# 値の直前にあるキー文字列（"KEY" :）
+_KEY_BEFORE_VALUE = re.compile(rb'"([^"\\]*(?:\\.[^"\\]*)*)"\s*:\s*\Z', re.DOTALL)
+
+# トップレベルのキーとスカラー値（文字列・数値・true/false/null）の組（"KEY" : 値）
+_SCALAR_PAIR = re.compile(rb'"([^"\\]*(?:\\.[^"\\]*)*)"\s*:\s*(' + _STRING + rb'|[^\s,"{}\[\]]+)', re.DOTALL)
+
+
+# 対応する閉じ括弧
+_CLOSERS = {0x7B: 0x7D, 0x5B: 0x5D}  # '{' -> '}', '[' -> ']'
+
+# JSONの空白文字
+_WHITESPACE = frozenset(b' \t\r\n')
+
+
+def build_offset_index(data: bytes) -> Dict[str, Tuple[int, int]]:
+    """
+    JSONオブジェクトのトップレベルのキーと、値のバイト範囲を索引化する
+
+    値は通常はオブジェクト（ダイアログ定義）だが、json.load() で読み込む場合と同じ内容になるよう
+    スカラー値のキーも索引化する。
+
+    整形済み（改行とインデントのある）ファイルでは行頭のキーだけを探す高速な方法を使い、
+    検証に失敗した場合や整形されていないファイルでは括弧を走査する方法に切り替える。
+
+    Args:
+        data: ファイル全体のバイト列（トップレベルがオブジェクトであること）
+
+    Returns:
+        Dict[str, Tuple[int, int]]: キー -> (開始オフセット, 終了オフセット)
+
+    Raises:
+        ValueError: トップレベルがオブジェクトでない、または括弧の対応が取れない場合
+    """
+    start = data.find(b'{')
+    if start < 0 or data[:start].strip(b' \t\r\n\xef\xbb\xbf'):
+        raise ValueError("Dialog definition file must contain a JSON object at the top level.")
+
+    index = _index_by_indentation(data, start)
+    if index is None:
+        index = _index_by_scanning(data, start)
+    return index
+
+
+def _index_by_indentation(data: bytes, start: int):
+    """
+    整形済みファイル用の索引作成（高速版）
+
+    JSON文字列は生の改行を含められないため、「改行 + トップレベルのインデント + キー」
+    の並びはトップレベルのキーにしか現れない（インデントが一貫している場合）。
+    各値の範囲は括弧の種類と個数で検証し、不整合があればNoneを返す。
+    """
+    first_key = data.find(b'"', start + 1)
+    if first_key < 0:
+        return None
+    leading = data[start + 1:first_key]
+    newline = leading.rfind(b'\n')
+    if newline < 0 or leading.strip():
+        return None
+    indent = leading[newline + 1:]
+
+    key_pattern = re.compile(b'\n' + re.escape(indent) + rb'"([^"\\\n]*(?:\\.[^"\\\n]*)*)"[ \t]*:\s*')
+    matches = list(key_pattern.finditer(data, start + 1 + newline))
+    if not matches:
+        return None
+
+    end = data.rstrip().rfind(b'}')
+    boundaries = [match.start() for match in matches[1:]] + [end]
+
+    index = {}
+    for match, boundary in zip(matches, boundaries):
+        value_start = match.end()
+        if value_start >= len(data):
+            return None
+        closer = _CLOSERS.get(data[value_start])
+
+        # 値の末尾（次のキーとの間の区切り ',' と空白を除く）
+        value_end = _skip_whitespace_backward(data, boundary, value_start)
+        if boundary != end:
+            if data[value_end - 1] != 0x2C:  # ','
+                return None
+            value_end = _skip_whitespace_backward(data, value_end - 1, value_start)
+
+        if closer is None:
+            # スカラー値（小さいのでその場で検証する）
+            try:
+                json.loads(data[value_start:value_end])
+            except ValueError:
+                return None
+        else:
+            if data[value_end - 1] != closer:
+                return None
+            # 括弧の個数が釣り合っているか（文字列中の括弧で釣り合わない場合も安全側に倒す）
+            if (data.count(b'{', value_start, value_end) != data.count(b'}', value_start, value_end) or
+                    data.count(b'[', value_start, value_end) != data.count(b']', value_start, value_end)):
+                return None
+
+        raw_key = match.group(1)
+        key = json.loads(b'"' + raw_key + b'"') if b'\\' in raw_key else raw_key.decode('utf-8')
+        index[key] = (value_start, value_end)
+    return index
+
+
+def _skip_whitespace_backward(data: bytes, pos: int, limit: int) -> int:
+    """pos の直前から空白を読み飛ばし、空白でない最後の文字の直後の位置を返す"""
+    while pos > limit and data[pos - 1] in _WHITESPACE:
+        pos -= 1
+    return pos
+
+
+def _index_by_scanning(data: bytes, start: int) -> Dict[str, Tuple[int, int]]:
+    """括弧を走査する索引作成（任意の書式に対応）"""
+    index = {}
+    length = len(data)
+    depth = 1
+    pos = start + 1
+    segment_start = pos  # 次のキーが現れる範囲の先頭
+    value_start = 0
+    key = None
+
+    while True:
+        skip = _SKIP_DEEP if depth >= 2 else _SKIP_SHALLOW
+        pos = skip.match(data, pos).end()
+        if pos >= length:
+            raise ValueError("Unexpected end of dialog definition file.")
+
+        char = data[pos]
+        if char == 0x7B or char == 0x5B:  # '{' または '['
+            depth += 1
+            if depth == 2:
+                _index_scalars(data, segment_start, pos, index)
+                match = _KEY_BEFORE_VALUE.search(data, segment_start, pos)
+                if not match:
+                    raise ValueError(f"Malformed dialog definition near offset {pos}.")
+                key = json.loads(b'"' + match.group(1) + b'"')
+                value_start = pos
+        else:  # '}' または ']'
+            depth -= 1
+            if depth == 1:
+                index[key] = (value_start, pos + 1)
+                segment_start = pos + 1
+            elif depth == 0:
+                _index_scalars(data, segment_start, pos, index)
+                break
+        pos += 1
+
+    return index
+
+
+def _index_scalars(data: bytes, start: int, end: int, index: Dict[str, Tuple[int, int]]):
+    """トップレベルの括弧を含まない範囲 [start, end) にある、スカラー値のキーを索引化する"""
+    for match in _SCALAR_PAIR.finditer(data, start, end):
+        index[json.loads(b'"' + match.group(1) + b'"')] = match.span(2)
+
+
+class LazyDialogDefinitions(Mapping):
+    """
+    ダイアログ定義の遅延解析マッピング
+
+    dict と同様に get()/in/反復 が使え、値は初回アクセス時に解析してキャッシュする。
+    """
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._index = build_offset_index(data)
+        self._parsed = {}
+
+    @classmethod
+    def from_file(cls, json_path: str) -> "LazyDialogDefinitions":
+        """定義ファイルを1回の読み込みで取得し、索引を作成する"""
+        with open(json_path, 'rb') as f:
+            return cls(f.read())
+
+    def __getitem__(self, dialog_id):
+        definition = self._parsed.get(dialog_id)
+        if definition is not None:
+            return definition
+
+        start, end = self._index[dialog_id]  # 未定義の場合はKeyError
+        definition = json.loads(self._data[start:end])
+        self._parsed[dialog_id] = definition
+        return definition
+
+    def __contains__(self, dialog_id) -> bool:
+        return dialog_id in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def parsed_count(self) -> int:
+        """解析済みのダイアログ定義の数"""
+        return len(self._parsed)
@@ -0,0 +1,83 @@
+"""
+ダイアログの入力スナップショット
+
+マウスとキーボードの状態を1フレームに1回だけ取得し、Dialog が
+対象のウィジェット（ポインタ下のウィジェット・フォーカス中のウィジェット）へ配送する。
+各ウィジェットが個別に pyxel.mouse_x や pyxel.btnp() を調べる必要はない。
+
+pyxel にはキー入力のイベントキューが無いため、キーボードはフォーカス中の
+ウィジェットが必要とするキー（input_keys）だけを、フォーカスがある間のみ調べる。
+"""
+import pyxel
+
+# テキスト編集キー（文字キーより先に処理する）
+TEXT_EDIT_KEYS = (
+    pyxel.KEY_BACKSPACE,
+    pyxel.KEY_DELETE,
+    pyxel.KEY_LEFT,
+    pyxel.KEY_RIGHT,
+)
+
+
+def _build_char_keys():
+    """文字キー -> (通常の文字, Shift押下時の文字) の対応表を作成"""
+    char_keys = {}
+    for offset in range(26):
+        char = chr(ord('a') + offset)
+        char_keys[pyxel.KEY_A + offset] = (char, char.upper())
+    for offset, symbol in enumerate(')!@#$%^&*('):
+        char_keys[pyxel.KEY_0 + offset] = (chr(ord('0') + offset), symbol)
+    char_keys.update({
+        pyxel.KEY_SPACE: (' ', ' '),
+        pyxel.KEY_PERIOD: ('.', '>'),
+        pyxel.KEY_COMMA: (',', '<'),
+        pyxel.KEY_MINUS: ('-', '_'),
+        pyxel.KEY_EQUALS: ('=', '+'),
+        pyxel.KEY_SLASH: ('/', '?'),
+        pyxel.KEY_SEMICOLON: (';', ':'),
+        pyxel.KEY_QUOTE: ("'", '"'),
+        pyxel.KEY_LEFTBRACKET: ('[', '{'),
+        pyxel.KEY_RIGHTBRACKET: (']', '}'),
+        pyxel.KEY_BACKSLASH: ('\\', '|'),
+        pyxel.KEY_BACKQUOTE: ('`', '~'),
+    })
+    return char_keys
+
+
+# 文字キー -> (通常の文字, Shift押下時の文字)
+TEXT_CHAR_KEYS = _build_char_keys()
+
+# テキスト入力ウィジェットが監視するキー（同一フレームの文字はキーコード順に入力される）
+TEXT_INPUT_KEYS = TEXT_EDIT_KEYS + tuple(sorted(TEXT_CHAR_KEYS))
+
+
+class InputSnapshot:
+    """
+    1フレーム分の入力状態
+
+    Attributes:
+        mouse_x, mouse_y: マウス座標
+        clicked: 左ボタンがこのフレームで押されたか
+        keys: このフレームで押されたキー（監視対象のキーのみ、監視順）
+        shift: Shiftキーが押されているか（keys が空の場合は常にFalse）
+    """
+    __slots__ = ("mouse_x", "mouse_y", "clicked", "keys", "shift")
+
+    def __init__(self, mouse_x: int, mouse_y: int, clicked: bool = False, keys=(), shift: bool = False):
+        self.mouse_x = mouse_x
+        self.mouse_y = mouse_y
+        self.clicked = clicked
+        self.keys = tuple(keys)
+        self.shift = shift
+
+    @classmethod
+    def capture(cls, watched_keys=()) -> "InputSnapshot":
+        """
+        現在の pyxel の入力状態を取得する
+
+        Args:
+            watched_keys: 押下を調べるキー（フォーカス中のウィジェットの input_keys）
+        """
+        keys = tuple(key for key in watched_keys if pyxel.btnp(key)) if watched_keys else ()
+        shift = bool(keys) and bool(pyxel.btn(pyxel.KEY_SHIFT))
+        return cls(pyxel.mouse_x, pyxel.mouse_y, bool(pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT)), keys, shift)
@@ -1,6 +1,11 @@
 import json
 import pyxel
-from dialog import Dialog
+from dialog_template import DialogTemplate, build_dialog
+from dialog_pool import DialogPool, POOL_POLICIES
+from dialog_index import LazyDialogDefinitions
+from dialog_resource import load_compiled_definitions
+from dialog_backend import get_backend
+import dialog_profiler
 from widgets import LabelWidget, ButtonWidget, TextBoxWidget, ListBoxWidget, DropdownWidget, CheckboxWidget
 
 
@@ -54,13 +59,37 @@ class DialogManager:
     """
     dialogs.json を読み込み、ダイアログの生成と管理を行うクラス
     """
-    def __init__(self, json_path):
+    def __init__(self, json_path, use_templates=True, lazy=False, use_compiled=True, compiled_path=None,
+                 retained_rendering=False, backend=None):
+        # コンパイル済みリソース（dialog_resource.py で生成）があり、JSONより新しければそれを使用
+        definitions = load_compiled_definitions(json_path, compiled_path) if use_compiled else None
+        if definitions is not None:
+            self.definitions = definitions
         # JSONファイルからダイアログ定義を読み込む
-        with open(json_path, 'r') as f:
-            self.definitions = json.load(f)
+        # lazy=True の場合はダイアログIDの索引だけを作成し、各定義は初回 show() 時に解析する
+        elif lazy:
+            self.definitions = LazyDialogDefinitions.from_file(json_path)
+        else:
+            with open(json_path, 'r') as f:
+                self.definitions = json.load(f)
         
         self.active_dialog = None
 
+        # コンパイル済みテンプレートのキャッシュ（ダイアログIDごと、初回show()時に生成）
+        # use_templates=False の場合は毎回定義から生成する（従来動作）
+        self.use_templates = use_templates
+        self._templates = {}
+
+        # ダイアログIDごとのインスタンスプール（configure_pool() または定義の "pool" で有効化）
+        self._pools = {}
+
+        # 保持モード描画（変更のあったウィジェットだけを描き直す）をすべてのダイアログで使うか
+        # False の場合も、定義に "retained_rendering": true があるダイアログでは有効になる
+        self.retained_rendering = retained_rendering
+
+        # 描画・入力のバックエンド（省略時は dialog_backend の既定。HeadlessBackend でウィンドウなしで動かせる）
+        self.backend = backend if backend is not None else get_backend()
+
         # ウィジェットのタイプ名とクラスをマッピング
         self.widget_factory = {
             "label": LabelWidget,
@@ -73,37 +102,129 @@ class DialogManager:
 
     def show(self, dialog_id):
         """指定されたIDのダイアログを表示する"""
+        if self.use_templates:
+            template = self.get_template(dialog_id)
+            if not template:
+                return
+            # 表示中のダイアログはプールに戻してから切り替える
+            self._release_active_dialog()
+
+            # プールに待機中のインスタンスがあれば初期状態に戻して再利用
+            pool = self._pools.get(dialog_id)
+            dialog = pool.acquire() if pool is not None else None
+            if dialog:
+                template.reset(dialog)
+            else:
+                # テンプレートから複製（定義の再解釈は行わない）
+                dialog = template.instantiate()
+            self._activate(dialog)
+            return
+
         dialog_def = self.definitions.get(dialog_id)
         if not dialog_def:
             print(f"Error: Dialog definition for '{dialog_id}' not found.")
             return
 
-        # Dialogインスタンスを先に仮作成（ウィジェットが親ダイアログを参照できるようにするため）
-        # この時点ではウィジェットリストは空
-        new_dialog = Dialog(dialog_def, [], dialog_id)
-
-        # ウィジェット定義からインスタンスを作成
-        widgets = []
-        for widget_def in dialog_def.get("widgets", []):
-            widget_type = widget_def.get("type")
-            widget_class = self.widget_factory.get(widget_type)
-            if widget_class:
-                # ウィジェットのコンストラクタに、親となるダイアログインスタンスを渡す
-                widgets.append(widget_class(new_dialog, widget_def))
-            else:
-                print(f"Warning: Widget type '{widget_type}' is not supported.")
-        
-        # 作成したウィジェットリストをダイアログに設定
-        new_dialog.widgets = widgets
-        
-        self.active_dialog = new_dialog
+        self._activate(build_dialog(dialog_id, dialog_def, self.widget_factory))
+
+    def _activate(self, dialog):
+        """ダイアログをアクティブにする"""
+        dialog.backend = self.backend
+        dialog.canvas = self.backend.screen
+        if self.retained_rendering:
+            dialog.retained = True
+        self.active_dialog = dialog
+
+    def get_template(self, dialog_id):
+        """
+        指定されたIDのコンパイル済みテンプレートを取得する
+
+        初回呼び出し時に定義を検証・変換してキャッシュする。
+
+        Returns:
+            DialogTemplate: テンプレート（定義が存在しない・不正な場合はNone）
+        """
+        template = self._templates.get(dialog_id)
+        if template:
+            return template
+
+        dialog_def = self.definitions.get(dialog_id)
+        if not dialog_def:
+            print(f"Error: Dialog definition for '{dialog_id}' not found.")
+            return None
+
+        template = DialogTemplate.compile(dialog_id, dialog_def, self.widget_factory)
+        if template:
+            self._templates[dialog_id] = template
+            # 定義側でプールが指定されている場合は有効化（configure_pool()の設定が優先）
+            pool_def = dialog_def.get("pool")
+            if isinstance(pool_def, dict) and dialog_id not in self._pools:
+                self.configure_pool(dialog_id, pool_def.get("max_size", 1), pool_def.get("policy", "lru"))
+        return template
+
+    def precompile(self):
+        """すべてのダイアログ定義を事前にテンプレートへ変換する"""
+        for dialog_id in self.definitions:
+            self.get_template(dialog_id)
+
+    def clear_template_cache(self):
+        """
+        テンプレートキャッシュを破棄する
+
+        definitions や widget_factory を実行中に変更した場合に呼び出す。
+        """
+        self._templates.clear()
+        # 古いテンプレートから生成されたインスタンスは再利用できない
+        for pool in self._pools.values():
+            pool.clear()
+
+    def configure_pool(self, dialog_id, max_size=1, policy="lru"):
+        """
+        ダイアログIDごとのインスタンスプールを設定する
+
+        閉じたダイアログを保持し、次回の show() で定義の初期状態に戻して再利用する。
+        テンプレート有効時（use_templates=True）のみ機能する。
+
+        Args:
+            dialog_id: 対象のダイアログID
+            max_size: 保持するインスタンスの最大数（0でプール無効）
+            policy: 退避ポリシー（"lru" または "fifo"）
+        """
+        if policy not in POOL_POLICIES:
+            print(f"Invalid pool policy: {policy}")
+            return
+        if not self.use_templates:
+            print(f"Warning: Dialog pool for '{dialog_id}' requires use_templates=True.")
+            return
+
+        if max_size <= 0:
+            self._pools.pop(dialog_id, None)
+            return
+        self._pools[dialog_id] = DialogPool(max_size, policy)
+
+    def get_pool(self, dialog_id):
+        """指定されたIDのプールを取得（未設定の場合はNone）"""
+        return self._pools.get(dialog_id)
+
+    def _release_active_dialog(self):
+        """アクティブなダイアログをプールに戻す（プール未設定の場合は何もしない）"""
+        dialog = self.active_dialog
+        if not dialog:
+            return
+        pool = self._pools.get(dialog.dialog_id)
+        if pool is not None:
+            pool.release(dialog)
 
     def close(self):
         """現在アクティブなダイアログを閉じる"""
+        self._release_active_dialog()
         self.active_dialog = None
 
     def update(self):
-        """アクティブなダイアログの更新処理を呼び出す"""
+        """アクティブなダイアログの更新処理を呼び出す（プロファイラーが有効な場合はフレームの区切り）"""
+        profiler = dialog_profiler.profiler
+        if profiler is not None:
+            profiler.begin_frame()
         if self.active_dialog:
             self.active_dialog.update()
 
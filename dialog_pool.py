@@ -0,0 +1,76 @@
+"""
+ダイアログインスタンスのプール
+
+閉じたダイアログを破棄せずに保持し、次回の show() でテンプレートの初期状態に
+戻して再利用する。同じダイアログを頻繁に開閉するコントローラーで、
+インスタンス生成とガベージコレクションの負荷を抑えるために使用する。
+"""
+from collections import deque
+
+# 利用可能な退避ポリシー
+#   "lru"  : 最後に閉じたインスタンスから再利用し、満杯時は最も古いものを破棄
+#   "fifo" : 最も古いインスタンスから順に再利用し、満杯時は閉じたインスタンスを破棄
+POOL_POLICIES = ("lru", "fifo")
+
+
+class DialogPool:
+    """ダイアログIDごとの待機中インスタンスを保持するプール"""
+
+    def __init__(self, max_size: int = 1, policy: str = "lru"):
+        if policy not in POOL_POLICIES:
+            raise ValueError(f"Unknown pool policy: {policy} (expected one of {POOL_POLICIES})")
+        self.max_size = max(0, int(max_size))
+        self.policy = policy
+        self._idle = deque()
+
+        # 統計情報（デバッグ用）
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def acquire(self):
+        """
+        待機中のインスタンスを取り出す
+
+        Returns:
+            Dialog: 再利用可能なインスタンス（空の場合はNone）
+        """
+        if not self._idle:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == "lru":
+            return self._idle.pop()
+        return self._idle.popleft()
+
+    def release(self, dialog) -> bool:
+        """
+        閉じたインスタンスをプールに戻す
+
+        Returns:
+            bool: プールに保持された場合True（破棄された場合False）
+        """
+        if self.max_size == 0:
+            return False
+        if any(idle is dialog for idle in self._idle):
+            return True
+
+        if len(self._idle) >= self.max_size:
+            self.evictions += 1
+            if self.policy == "fifo":
+                return False
+            self._idle.popleft()
+        self._idle.append(dialog)
+        return True
+
+    def clear(self):
+        """待機中のインスタンスをすべて破棄する"""
+        self._idle.clear()
+
+    def get_stats(self) -> str:
+        """統計情報の文字列を取得"""
+        return (f"idle={len(self._idle)}/{self.max_size} policy={self.policy} "
+                f"hits={self.hits} misses={self.misses} evictions={self.evictions}")
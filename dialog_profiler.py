@@ -0,0 +1,206 @@
+"""
+ウィジェット・コントローラーごとの処理時間の計測（プロファイラー）
+
+有効にすると、Dialog.update() / Dialog.draw() がウィジェットごとの処理時間を、
+DialogSystem.update() がコントローラーごとの処理時間を計測し、直近のフレームの統計を集計する。
+既定では無効で、無効の間は計測用の処理を一切行わない（update / draw ごとに有効かどうかを1回調べるだけ）。
+
+有効にする方法:
+    import dialog_profiler
+    profiler = dialog_profiler.enable_profiling()   # 計測を開始
+    profiler.draw_overlay(pyxel, 5, 200)             # 遅いウィジェットとフレーム予算の使用率を表示
+    dialog_profiler.disable_profiling()             # 計測を終了
+
+    # または環境変数で指定
+    PYDIALOG_PROFILE=1 python main.py
+
+フレームの区切りは DialogManager.update() の呼び出しで、1フレームは update から次の update の
+直前まで（draw を含む）。計測の項目は (区分, ダイアログID, 名前) で、区分は次のとおり。
+    update     : ウィジェットの入力処理と update()（名前がダイアログIDの項目はヒットテストなどダイアログ自体の処理）
+    draw       : ウィジェットの draw()（名前がダイアログIDの項目は背景・枠線などダイアログ自体の描画）
+    controller : コントローラーの update()（ダイアログIDは空文字列）
+IDの無いウィジェットはクラス名でまとめて集計する。
+"""
+import os
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+import pyxel
+
+# 区分の短縮表示（オーバーレイ用）
+PHASE_LABELS = {"update": "U", "draw": "D", "controller": "C"}
+
+
+def format_time(seconds: float) -> str:
+    """時間の表示（1ミリ秒未満はマイクロ秒）"""
+    if seconds < 0.001:
+        return f"{seconds * 1000000:.0f}us"
+    return f"{seconds * 1000:.2f}ms"
+
+
+class DialogProfiler:
+    """
+    直近のフレームの処理時間を項目ごとに集計するクラス
+
+    Attributes:
+        window: 統計に使うフレーム数
+        fps: フレームレート（フレーム予算 = 1 / fps 秒）
+        frame_count: 集計を終えたフレーム数
+    """
+
+    def __init__(self, window: int = 60, fps: int = 30):
+        self.window = window
+        self.fps = fps
+        self.frame_count = 0
+        self._current = {}  # 現在のフレームの項目ごとの時間（秒）
+        self._frames = deque()  # 直近のフレームの項目ごとの時間
+        self._totals = {}  # 直近のフレームでの項目ごとの合計
+        self._counts = {}  # 直近のフレームで項目が現れたフレーム数
+        self._frame_times = deque(maxlen=window)  # 直近のフレームの計測時間の合計
+        self._mark = time.perf_counter()
+
+    def begin_frame(self):
+        """現在のフレームの集計を終えて、次のフレームを開始する"""
+        current = self._current
+        self._current = {}
+        self._frames.append(current)
+        self._frame_times.append(sum(current.values()))
+        totals = self._totals
+        counts = self._counts
+        for key, seconds in current.items():
+            totals[key] = totals.get(key, 0.0) + seconds
+            counts[key] = counts.get(key, 0) + 1
+        if len(self._frames) > self.window:
+            for key, seconds in self._frames.popleft().items():
+                if counts[key] == 1:
+                    del counts[key]
+                    del totals[key]
+                else:
+                    counts[key] -= 1
+                    totals[key] -= seconds
+        self.frame_count += 1
+
+    def start(self):
+        """区間の計測を開始する"""
+        self._mark = time.perf_counter()
+
+    def lap(self, key: Tuple[str, str, str]):
+        """前回の start() / lap() からの時間を項目に加算し、次の区間の計測を開始する"""
+        now = time.perf_counter()
+        current = self._current
+        current[key] = current.get(key, 0.0) + (now - self._mark)
+        self._mark = now
+
+    def reset(self):
+        """集計した統計を破棄する"""
+        self._current = {}
+        self._frames.clear()
+        self._totals.clear()
+        self._counts.clear()
+        self._frame_times.clear()
+        self.frame_count = 0
+
+    def frame_time(self) -> float:
+        """直近のフレームでの、1フレームあたりの計測時間の平均（秒）"""
+        if not self._frame_times:
+            return 0.0
+        return sum(self._frame_times) / len(self._frame_times)
+
+    def budget_used(self) -> float:
+        """フレーム予算（1 / fps 秒）に対する計測時間の割合（1.0 で予算を使い切る）"""
+        return self.frame_time() * self.fps
+
+    def slowest(self, count: int = 5) -> List[Tuple[Tuple[str, str, str], float]]:
+        """
+        1フレームあたりの平均時間が長い項目
+
+        Returns:
+            List[Tuple[key, float]]: (項目, 平均時間（秒）) のリスト（長い順）
+        """
+        frames = len(self._frames)
+        if not frames:
+            return []
+        items = sorted(self._totals.items(), key=lambda item: item[1], reverse=True)
+        return [(key, total / frames) for key, total in items[:count]]
+
+    def stats(self) -> List[Tuple[Tuple[str, str, str], float, float]]:
+        """
+        すべての項目の統計（デバッグ出力用）
+
+        Returns:
+            List[Tuple[key, float, float]]: (項目, 1フレームあたりの平均時間, 最大時間)（秒、平均の長い順）
+        """
+        frames = len(self._frames)
+        if not frames:
+            return []
+        peaks = {}
+        for frame in self._frames:
+            for key, seconds in frame.items():
+                if seconds > peaks.get(key, 0.0):
+                    peaks[key] = seconds
+        items = sorted(self._totals.items(), key=lambda item: item[1], reverse=True)
+        return [(key, total / frames, peaks[key]) for key, total in items]
+
+    def overlay_lines(self, count: int = 3) -> List[str]:
+        """オーバーレイに表示する文字列（1行目がフレーム予算、続いて遅い項目）"""
+        lines = [f"Dialogs {format_time(self.frame_time())}/{format_time(1.0 / self.fps)} "
+                 f"({self.budget_used() * 100:.1f}%)"]
+        for (phase, _dialog_id, name), seconds in self.slowest(count):
+            lines.append(f"{PHASE_LABELS.get(phase, phase)} {name[:40]} {format_time(seconds)}")
+        return lines
+
+    def draw_overlay(self, canvas, x: int, y: int, count: int = 3,
+                     color: int = pyxel.COLOR_WHITE, bg_color: Optional[int] = pyxel.COLOR_BLACK):
+        """
+        オーバーレイを描画する
+
+        Args:
+            canvas: 描画先（pyxel モジュール、またはバックエンドの screen）
+            x, y: 左上の座標
+            count: 表示する項目の数
+            color: 文字色
+            bg_color: 背景色（None で背景を描画しない）
+        """
+        lines = self.overlay_lines(count)
+        line_height = 8
+        if bg_color is not None:
+            width = max(len(line) for line in lines) * 4 + 3
+            canvas.rect(x - 1, y - 1, width, len(lines) * line_height + 1, bg_color)
+        for row, line in enumerate(lines):
+            canvas.text(x, y + row * line_height, line, color)
+
+
+# 有効なプロファイラー（無効の場合はNone）
+profiler: Optional[DialogProfiler] = None
+
+
+def get_profiler() -> Optional[DialogProfiler]:
+    """有効なプロファイラーを取得（無効の場合はNone）"""
+    return profiler
+
+
+def enable_profiling(window: int = 60, fps: int = 30) -> DialogProfiler:
+    """計測を開始する（すでに有効な場合はそのプロファイラーを返す）"""
+    global profiler
+    if profiler is None:
+        profiler = DialogProfiler(window, fps)
+    return profiler
+
+
+def disable_profiling():
+    """計測を終了する"""
+    global profiler
+    profiler = None
+
+
+def toggle_profiling() -> Optional[DialogProfiler]:
+    """計測の有効・無効を切り替える（有効になった場合はプロファイラーを返す）"""
+    if profiler is None:
+        return enable_profiling()
+    disable_profiling()
+    return None
+
+
+if os.environ.get("PYDIALOG_PROFILE", "") not in ("", "0"):
+    enable_profiling()
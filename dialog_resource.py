@@ -0,0 +1,178 @@
+"""
+コンパイル済みダイアログリソース
+
+dialogs.json を事前にバイナリ形式（marshal）へ変換し、DialogManager が
+1回の読み込みでダイアログ定義を取得できるようにする。
+変換時に "COLOR_xxx" 文字列は pyxel の色番号に解決しておくため、
+起動時の JSON 解析と色文字列の解決を省略できる。
+
+元の JSON が更新されている場合（mtime/サイズ不一致かつハッシュ不一致）は
+コンパイル済みリソースを使用せず、JSON から読み込む。
+
+ビルド方法:
+    python dialog_resource.py dialogs.json [-o dialogs.dlgc]
+"""
+import hashlib
+import json
+import marshal
+import os
+import struct
+import sys
+from typing import Optional
+
+from widgets import resolve_color
+
+# ファイル形式: MAGIC + ヘッダー長(uint32) + ヘッダー(marshal) + 定義本体(marshal)
+RESOURCE_MAGIC = b"PYDLGRES"
+RESOURCE_FORMAT_VERSION = 1
+RESOURCE_EXTENSION = ".dlgc"
+
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+def default_resource_path(json_path: str) -> str:
+    """JSONファイルに対応するコンパイル済みリソースのパスを取得"""
+    return os.path.splitext(json_path)[0] + RESOURCE_EXTENSION
+
+
+def _file_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _resolve_colors(value):
+    """定義中の色プロパティ（color / xxx_color）の COLOR_xxx 文字列を色番号に解決する"""
+    if isinstance(value, dict):
+        resolved = {}
+        for key, item in value.items():
+            if ((key == "color" or key.endswith("_color")) and
+                    isinstance(item, str) and item.startswith("COLOR_")):
+                resolved[key] = resolve_color(item)
+            else:
+                resolved[key] = _resolve_colors(item)
+        return resolved
+    if isinstance(value, list):
+        return [_resolve_colors(item) for item in value]
+    return value
+
+
+def compile_resource(json_path: str, resource_path: Optional[str] = None) -> str:
+    """
+    dialogs.json をコンパイル済みリソースに変換して保存する
+
+    Args:
+        json_path: 変換元のJSONファイル
+        resource_path: 出力先（省略時は拡張子を .dlgc に変えたパス）
+
+    Returns:
+        str: 出力したリソースファイルのパス
+    """
+    resource_path = resource_path or default_resource_path(json_path)
+
+    with open(json_path, 'rb') as f:
+        source = f.read()
+    source_stat = os.stat(json_path)
+    definitions = _resolve_colors(json.loads(source))
+
+    header = {
+        "format_version": RESOURCE_FORMAT_VERSION,
+        "python_version": tuple(sys.version_info[:2]),
+        "marshal_version": marshal.version,
+        "source_mtime_ns": source_stat.st_mtime_ns,
+        "source_size": source_stat.st_size,
+        "source_sha256": _file_digest(source),
+    }
+    header_bytes = marshal.dumps(header)
+    payload = marshal.dumps(definitions)
+
+    # 書き込み途中のファイルを読まれないよう、一時ファイルに書いてから置き換える
+    temp_path = resource_path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(RESOURCE_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(payload)
+    os.replace(temp_path, resource_path)
+    return resource_path
+
+
+def _is_header_compatible(header) -> bool:
+    """ヘッダーの形式・Pythonバージョンが現在の環境で読めるものかチェック"""
+    return (isinstance(header, dict) and
+            header.get("format_version") == RESOURCE_FORMAT_VERSION and
+            tuple(header.get("python_version", ())) == tuple(sys.version_info[:2]) and
+            header.get("marshal_version") == marshal.version)
+
+
+def _is_source_unchanged(header: dict, json_path: str) -> bool:
+    """
+    変換元のJSONが変換時から変わっていないかチェック
+
+    mtime とサイズが一致すれば変更なしとみなす。mtime だけが異なる場合
+    （チェックアウトやコピーで更新された場合など）は内容のハッシュで判定する。
+    """
+    try:
+        source_stat = os.stat(json_path)
+    except OSError:
+        # 元のJSONが無い場合はコンパイル済みリソースだけで動作させる
+        return True
+
+    if source_stat.st_size != header.get("source_size"):
+        return False
+    if source_stat.st_mtime_ns == header.get("source_mtime_ns"):
+        return True
+
+    with open(json_path, 'rb') as f:
+        return _file_digest(f.read()) == header.get("source_sha256")
+
+
+def load_compiled_definitions(json_path: str, resource_path: Optional[str] = None) -> Optional[dict]:
+    """
+    コンパイル済みリソースからダイアログ定義を読み込む
+
+    Args:
+        json_path: 変換元のJSONファイル（鮮度チェックに使用）
+        resource_path: リソースファイル（省略時は拡張子を .dlgc に変えたパス）
+
+    Returns:
+        dict: ダイアログ定義（リソースが無い・古い・壊れている場合はNone）
+    """
+    resource_path = resource_path or default_resource_path(json_path)
+    try:
+        with open(resource_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    try:
+        if not data.startswith(RESOURCE_MAGIC):
+            raise ValueError("bad magic")
+        offset = len(RESOURCE_MAGIC)
+        (header_length,) = _HEADER_LENGTH.unpack_from(data, offset)
+        offset += _HEADER_LENGTH.size
+        header = marshal.loads(data[offset:offset + header_length])
+        if not _is_header_compatible(header):
+            print(f"Compiled dialog resource '{resource_path}' was built for another format/Python version; using JSON.")
+            return None
+        if not _is_source_unchanged(header, json_path):
+            print(f"Compiled dialog resource '{resource_path}' is stale; using JSON.")
+            return None
+        definitions = marshal.loads(data[offset + header_length:])
+    except (ValueError, EOFError, TypeError, struct.error) as e:
+        print(f"Warning: Failed to load compiled dialog resource '{resource_path}': {e}")
+        return None
+
+    if not isinstance(definitions, dict):
+        return None
+    return definitions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile dialogs.json into a binary dialog resource")
+    parser.add_argument("json_path", help="変換元の dialogs.json")
+    parser.add_argument("-o", "--output", help="出力先（省略時は拡張子を .dlgc に変えたパス）")
+    args = parser.parse_args()
+
+    output_path = compile_resource(args.json_path, args.output)
+    print(f"Compiled {args.json_path} -> {output_path}")
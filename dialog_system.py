@@ -7,6 +7,8 @@ DialogSystem - ダイアログコントローラー一元管理システム
 
 from typing import List, Any, Protocol
 
+import dialog_profiler
+
 
 class DialogController(Protocol):
     """ダイアログコントローラーが実装すべきインターフェース"""
@@ -53,10 +55,17 @@ class DialogSystem:
         
         各コントローラーのupdate()メソッドを順次呼び出す
         update()メソッドを持たないコントローラーは安全にスキップされる
+        プロファイラーが有効な場合は、コントローラーごとの処理時間を計測する
         """
+        profiler = dialog_profiler.profiler
         for controller in self.controllers:
             if hasattr(controller, 'update') and callable(getattr(controller, 'update')):
-                controller.update()
+                if profiler is None:
+                    controller.update()
+                else:
+                    profiler.start()
+                    controller.update()
+                    profiler.lap(("controller", "", controller.__class__.__name__))
                 
     @property
     def has_active_dialogs(self) -> bool:
@@ -0,0 +1,121 @@
+"""
+ダイアログテンプレート（コンパイル済みダイアログ定義）
+
+dialogs.json の生の定義を一度だけ検証・変換（色の解決、ウィジェットクラスの決定、
+座標の確定）し、プロトタイプのダイアログとして保持する。
+DialogManager.show() はテンプレートから複製するだけで済むため、
+同じダイアログを何度も開閉する場合のコストを抑えられる。
+"""
+from typing import Dict, List, Optional
+from dialog import Dialog
+
+# 数値であるべきジオメトリ系プロパティ
+_GEOMETRY_KEYS = ("x", "y", "width", "height")
+
+
+def validate_dialog_definition(dialog_id: str, definition) -> List[str]:
+    """
+    ダイアログ定義を検証し、問題点のリストを返す
+
+    Args:
+        dialog_id: ダイアログID
+        definition: dialogs.json 内のダイアログ定義
+
+    Returns:
+        List[str]: 警告メッセージのリスト（問題がなければ空）
+    """
+    if not isinstance(definition, dict):
+        return [f"Dialog definition for '{dialog_id}' must be an object."]
+
+    problems = []
+    for key in _GEOMETRY_KEYS:
+        value = definition.get(key)
+        if value is not None and not isinstance(value, (int, float)):
+            problems.append(f"Dialog '{dialog_id}': '{key}' must be a number (got {value!r}).")
+
+    widget_defs = definition.get("widgets", [])
+    if not isinstance(widget_defs, list):
+        problems.append(f"Dialog '{dialog_id}': 'widgets' must be a list.")
+        return problems
+
+    for index, widget_def in enumerate(widget_defs):
+        if not isinstance(widget_def, dict):
+            problems.append(f"Dialog '{dialog_id}': widget #{index} must be an object.")
+            continue
+        for key in _GEOMETRY_KEYS:
+            value = widget_def.get(key)
+            if value is not None and not isinstance(value, (int, float)):
+                problems.append(
+                    f"Dialog '{dialog_id}': widget '{widget_def.get('id')}' '{key}' must be a number (got {value!r})."
+                )
+    return problems
+
+
+class DialogTemplate:
+    """
+    コンパイル済みのダイアログ定義
+
+    色の解決済み・ウィジェット生成済みのプロトタイプを保持し、
+    instantiate() で新しいDialogインスタンスを複製する。
+    プロトタイプ自体は表示されることも変更されることもない。
+    """
+    __slots__ = ("dialog_id", "_prototype")
+
+    def __init__(self, dialog_id: str, prototype: Dialog):
+        self.dialog_id = dialog_id
+        self._prototype = prototype
+
+    @classmethod
+    def compile(cls, dialog_id: str, definition, widget_factory: Dict[str, type]) -> Optional["DialogTemplate"]:
+        """
+        ダイアログ定義を検証してテンプレートに変換する
+
+        Returns:
+            DialogTemplate: 変換結果（定義が不正な場合はNone）
+        """
+        problems = validate_dialog_definition(dialog_id, definition)
+        if not isinstance(definition, dict) or not isinstance(definition.get("widgets", []), list):
+            print(f"Error: Invalid dialog definition for '{dialog_id}': {problems[0]}")
+            return None
+        for problem in problems:
+            print(f"Warning: {problem}")
+
+        prototype = build_dialog(dialog_id, definition, widget_factory)
+        return cls(dialog_id, prototype)
+
+    def instantiate(self) -> Dialog:
+        """テンプレートから新しいDialogインスタンスを複製する"""
+        return self._prototype.clone()
+
+    def reset(self, dialog: Dialog):
+        """既存のDialogインスタンスをテンプレートの初期状態に戻す"""
+        dialog.reset_from(self._prototype)
+
+
+def build_dialog(dialog_id: str, definition: dict, widget_factory: Dict[str, type]) -> Dialog:
+    """
+    ダイアログ定義から Dialog とウィジェットを生成する
+
+    定義の解釈（色の解決やウィジェットの生成）を毎回行う。
+    テンプレートのプロトタイプ生成と、テンプレートを使わない場合の両方で使用する。
+    """
+    # Dialogインスタンスを先に仮作成（ウィジェットが親ダイアログを参照できるようにするため）
+    # この時点ではウィジェットリストは空
+    new_dialog = Dialog(definition, [], dialog_id)
+
+    # ウィジェット定義からインスタンスを作成
+    widgets = []
+    for widget_def in definition.get("widgets", []):
+        if not isinstance(widget_def, dict):
+            continue
+        widget_type = widget_def.get("type")
+        widget_class = widget_factory.get(widget_type)
+        if widget_class:
+            # ウィジェットのコンストラクタに、親となるダイアログインスタンスを渡す
+            widgets.append(widget_class(new_dialog, widget_def))
+        else:
+            print(f"Warning: Widget type '{widget_type}' is not supported.")
+
+    # 作成したウィジェットリストをダイアログに設定
+    new_dialog.widgets = widgets
+    return new_dialog
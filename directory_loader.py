@@ -0,0 +1,200 @@
+"""
+ファイルダイアログ用のディレクトリのバックグラウンド読み込み
+
+ディレクトリの走査をスレッドプールで実行し、読み込んだアイテムを一定数ずつ
+メインスレッド（pyxel の update ループ）に渡す。大きなディレクトリや
+ネットワークドライブでも、読み込み中に画面が固まらない。
+
+読み込みのたびに世代番号を進め、古い世代の走査は次の区切りで打ち切り、その結果は捨てる。
+走査結果は FileManager のキャッシュに保存し、ディレクトリが変わっていなければ再利用する。
+サブディレクトリを含めたファイルの検索（start_search）も同じ仕組みで行う。
+"""
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from file_utils import FileItem, FileManager
+
+# 同時に走査できるディレクトリの数（打ち切り待ちの古い走査が新しい走査を妨げないように複数）
+MAX_WORKERS = 2
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """読み込み用のスレッドプール（全てのローダーで共有し、最初の読み込み時に作成）"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="DirectoryLoader")
+    return _executor
+
+
+class DirectoryLoader:
+    """
+    FileManager の現在のディレクトリをバックグラウンドで読み込むクラス
+
+    start() / start_search() で読み込みを開始し、update ループから毎フレーム poll() を呼び出す。
+    読み込み中の items は走査順で、読み込みが完了すると並べ替え済みのリストに置き換わる。
+
+    Attributes:
+        items: 読み込んだアイテム
+        loading: 読み込み中かどうか
+        error: 読み込みに失敗した場合の例外
+        path: 読み込み中（読み込んだ）ディレクトリのパス
+        recursive: サブディレクトリを含めた検索かどうか
+        truncated: 検索結果が上限に達して検索を打ち切ったかどうか
+        prefetch_stats: 読み込みの完了前に、並べ替え用のサイズと更新時刻もワーカースレッドで取得するかどうか
+        apply_filter: ディレクトリの読み込み結果にファイルフィルターを適用するかどうか
+            （False の場合はフィルター適用前の全エントリを返す。検索は常にフィルターを適用する）
+    """
+    # ワーカーからメインスレッドに渡すアイテム数の単位
+    CHUNK_SIZE = 256
+
+    def __init__(self, file_manager: FileManager):
+        self.file_manager = file_manager
+        self.items: List[FileItem] = []
+        self.loading = False
+        self.error: Optional[Exception] = None
+        self.path: Optional[str] = None
+        self.recursive = False
+        self.truncated = False
+        self.prefetch_stats = False
+        self.apply_filter = True
+        self._generation = 0
+        self._results = queue.SimpleQueue()
+
+    def start(self):
+        """現在のディレクトリの読み込みを開始（読み込み中の走査は打ち切る）"""
+        self._start(False, self._scan)
+
+    def start_search(self, max_results: int):
+        """
+        現在のディレクトリ以下（サブディレクトリを含む）のファイルの検索を開始
+
+        ファイルフィルターにマッチするファイルだけを対象とし、max_results 件見つかった時点で打ち切る。
+        """
+        self._start(True, self._search, max_results)
+
+    def start_stats(self, items: List[FileItem]):
+        """
+        読み込み済みのアイテムのサイズと更新時刻の取得を開始
+
+        サイズ・更新時刻での並べ替えに切り替えた時に、アイテムごとの stat をワーカースレッドで行う。
+        完了すると items は渡したリストそのものになる。
+        """
+        self._start(False, self._load_stats, items)
+
+    def _start(self, recursive: bool, worker, *args):
+        self._generation += 1
+        self.items = []
+        self.loading = True
+        self.error = None
+        self.recursive = recursive
+        self.truncated = False
+        self.path = self.file_manager.get_current_path()
+        _get_executor().submit(worker, self._generation, self.path, *args)
+
+    def cancel(self):
+        """読み込みを中止する"""
+        self._generation += 1
+        self.loading = False
+
+    def poll(self) -> bool:
+        """
+        ワーカーから届いた結果を items に反映（update ループから呼び出す）
+
+        Returns:
+            bool: items / loading / error のいずれかが変わった場合True
+        """
+        changed = False
+        while True:
+            try:
+                generation, kind, payload = self._results.get_nowait()
+            except queue.Empty:
+                return changed
+            if generation != self._generation:
+                continue  # 打ち切った読み込みの結果
+
+            if kind == "chunk":
+                self.items.extend(payload)
+            elif kind == "done":
+                self.items = payload
+                self.loading = False
+            elif kind == "truncated":
+                self.truncated = True
+            else:
+                self.error = payload
+                self.loading = False
+            changed = True
+
+    def _scan(self, generation: int, path: str):
+        """ワーカースレッドでディレクトリを走査し、結果をキューに送る"""
+        file_manager = self.file_manager
+        try:
+            # 更新時刻が変わっていなければキャッシュした走査結果を使う（フィルターの変更など）
+            mtime = os.stat(path).st_mtime_ns
+            items = file_manager.get_cached_items(path, mtime)
+            if items is None:
+                items = []
+                for chunk in file_manager.scan_directory(path, self.CHUNK_SIZE):
+                    if generation != self._generation:
+                        return  # 新しい読み込みが始まったので打ち切る
+                    items.extend(chunk)
+                    if self.apply_filter:
+                        chunk = file_manager.filter_items(chunk)
+                    self._results.put((generation, "chunk", chunk))
+                file_manager.cache_items(path, mtime, FileManager.sort_items(items))
+            if self.apply_filter:
+                items = file_manager.filter_items(items)
+            if self.prefetch_stats and not self._prefetch_stats(generation, items):
+                return
+            self._results.put((generation, "done", items))
+        except Exception as e:
+            self._results.put((generation, "error", e))
+
+    def _search(self, generation: int, path: str, max_results: int):
+        """ワーカースレッドでサブディレクトリを含めて検索し、結果をキューに送る"""
+        items = []
+        try:
+            for chunk in self.file_manager.walk_files(path, self.CHUNK_SIZE):
+                if generation != self._generation:
+                    return  # 新しい読み込みが始まったので打ち切る
+                if not chunk:
+                    continue
+                remaining = max_results - len(items)
+                if len(chunk) >= remaining:
+                    chunk = chunk[:remaining]
+                    items.extend(chunk)
+                    self._results.put((generation, "chunk", chunk))
+                    self._results.put((generation, "truncated", True))
+                    break
+                items.extend(chunk)
+                self._results.put((generation, "chunk", chunk))
+            items.sort(key=lambda item: (item.directory, item.name))
+            if self.prefetch_stats and not self._prefetch_stats(generation, items):
+                return
+            self._results.put((generation, "done", items))
+        except Exception as e:
+            self._results.put((generation, "error", e))
+
+    def _load_stats(self, generation: int, path: str, items: List[FileItem]):
+        """ワーカースレッドでアイテムのサイズと更新時刻を取得し、完了をキューに送る"""
+        try:
+            if self._prefetch_stats(generation, items):
+                self._results.put((generation, "done", items))
+        except Exception as e:
+            self._results.put((generation, "error", e))
+
+    def _prefetch_stats(self, generation: int, items: List[FileItem]) -> bool:
+        """
+        サイズと更新時刻を取得しておく（新しい読み込みが始まって打ち切った場合False）
+
+        キャッシュした走査結果のアイテムは、書き込まれたファイルの値が古い場合があるため、
+        取得済みのアイテムも取得し直す。
+        """
+        for index, item in enumerate(items):
+            if index % self.CHUNK_SIZE == 0 and generation != self._generation:
+                return False
+            item._load_stat()
+        return True
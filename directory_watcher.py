@@ -0,0 +1,212 @@
+"""
+ファイルダイアログ用のディレクトリ監視
+
+表示中のディレクトリでファイルの追加・削除・名前の変更・書き込みがあったことを検出する。
+Linux では inotify（ctypes 経由、追加のパッケージは不要）で変更のあったエントリ名を取得し、
+使えない環境ではディレクトリの更新時刻を一定間隔で調べる。
+どちらも POLL_HZ 回/秒までしか調べないため、連続した書き込みは1回の変更にまとめられる。
+
+使用方法:
+    watcher = create_directory_watcher()
+    watcher.watch(path)
+    # update ループで
+    changed, names = watcher.poll()   # names が None の場合は変更のあったエントリ名が不明
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+import time
+from typing import Optional, Set, Tuple
+
+from debug_log import get_logger
+
+logger = get_logger("files")
+
+# 1秒あたりにディレクトリの変更を調べる回数
+POLL_HZ = 4
+
+# inotify の定数（<sys/inotify.h>）
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ONLYDIR = 0x01000000
+# 書き込みを終えたファイル（作成後に書き込み続けた場合や上書き）と、更新時刻の変更も検出する
+_WATCH_MASK = (_IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO |
+               _IN_CLOSE_WRITE | _IN_ATTRIB |
+               _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class PollingWatcher:
+    """ディレクトリの更新時刻を一定間隔で調べる監視（変更のあったエントリ名は不明）"""
+
+    def __init__(self, poll_hz: float = POLL_HZ):
+        self.interval = 1.0 / poll_hz
+        self.path: Optional[str] = None
+        self._mtime: Optional[int] = None
+        self._next_check = 0.0
+
+    def watch(self, path: str):
+        """監視するディレクトリを設定（以前のディレクトリの監視は解除）"""
+        self.path = path
+        self._mtime = self._get_mtime()
+        self._next_check = time.monotonic() + self.interval
+
+    def poll(self) -> Tuple[bool, Optional[Set[str]]]:
+        """
+        前回からの変更を取得
+
+        Returns:
+            (changed, names): 変更があったかどうかと、変更のあったエントリ名（不明な場合はNone）
+        """
+        if self.path is None:
+            return False, None
+        now = time.monotonic()
+        if now < self._next_check:
+            return False, None
+        self._next_check = now + self.interval
+
+        mtime = self._get_mtime()
+        if mtime == self._mtime:
+            return False, None
+        self._mtime = mtime
+        return True, None
+
+    def unwatch(self):
+        """ディレクトリの監視を解除する"""
+        self.path = None
+
+    def close(self):
+        """監視を終了する"""
+        self.unwatch()
+
+    def _get_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+
+class InotifyWatcher:
+    """
+    inotify による監視（Linux）
+
+    監視を追加できないディレクトリ（監視数の上限 ENOSPC など）は、更新時刻のポーリングで監視する。
+    """
+
+    def __init__(self, poll_hz: float = POLL_HZ):
+        self.interval = 1.0 / poll_hz
+        self.path: Optional[str] = None
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wd = -1
+        self._fallback: Optional[PollingWatcher] = None  # inotify で監視できない場合のポーリング
+        self._next_check = 0.0
+
+    def watch(self, path: str):
+        """監視するディレクトリを設定（以前のディレクトリの監視は解除）"""
+        self._remove_watch()
+        self.path = path
+        if self._fd < 0:
+            return
+        self._wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if self._wd < 0:
+            logger.debug("inotify_add_watch failed: %s (errno %d), using polling watcher",
+                         path, ctypes.get_errno())
+            self._fallback = PollingWatcher(1.0 / self.interval)
+            self._fallback.watch(path)
+        self._read_events()  # 以前のディレクトリのイベントを捨てる
+        self._next_check = time.monotonic() + self.interval
+
+    def poll(self) -> Tuple[bool, Optional[Set[str]]]:
+        """
+        前回からの変更を取得
+
+        Returns:
+            (changed, names): 変更があったかどうかと、変更のあったエントリ名（不明な場合はNone）
+        """
+        if self._fallback is not None:
+            return self._fallback.poll()
+        if self._wd < 0:
+            return False, None
+        now = time.monotonic()
+        if now < self._next_check:
+            return False, None
+        self._next_check = now + self.interval
+
+        names: Optional[Set[str]] = set()
+        changed = False
+        for wd, mask, name in self._read_events():
+            if mask & _IN_Q_OVERFLOW:
+                changed, names = True, None
+            elif wd == self._wd:
+                changed = True
+                if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF) or not name:
+                    names = None
+                elif names is not None:
+                    names.add(name)
+        return changed, names if changed else None
+
+    def unwatch(self):
+        """ディレクトリの監視を解除する"""
+        self._remove_watch()
+        self.path = None
+
+    def close(self):
+        """監視を終了する（以降は watch() できない）"""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._wd = -1
+        self._fallback = None
+        self.path = None
+
+    def _remove_watch(self):
+        self._fallback = None
+        if self._wd >= 0 and self._fd >= 0:
+            self._libc.inotify_rm_watch(self._fd, self._wd)
+            self._wd = -1
+
+    def _read_events(self):
+        """読み込めるイベントをすべて (wd, mask, name) で返す"""
+        events = []
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+
+
+def _load_libc():
+    """inotify 関数を持つ C ライブラリを読み込む（無い場合は OSError）"""
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    for name in ("inotify_init1", "inotify_add_watch", "inotify_rm_watch"):
+        if not hasattr(libc, name):
+            raise OSError(f"{name} is not available")
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+def create_directory_watcher(poll_hz: float = POLL_HZ):
+    """使用できる監視方法（inotify、使えない場合は更新時刻のポーリング）で監視オブジェクトを作成"""
+    try:
+        return InotifyWatcher(poll_hz)
+    except (OSError, AttributeError) as e:
+        logger.debug("inotify is not available (%s), using polling watcher", e)
+        return PollingWatcher(poll_hz)
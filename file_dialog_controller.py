@@ -0,0 +1,433 @@
+"""
+ファイルダイアログ（開く・保存）の共通の連携機能
+
+ディレクトリの読み込みと監視、一覧のフィルターと並べ替え、リストボックスへの表示、
+ボタンとファイルリストのイベント処理をまとめたコントローラーの基底クラスを提供
+"""
+from dialog_manager import DialogManager
+from file_utils import FileItem, FileManager
+from file_list_pipeline import FileListPipeline
+from directory_loader import DirectoryLoader
+from directory_watcher import create_directory_watcher
+from system_settings import settings
+
+
+class FileDialogController:
+    """
+    ファイルダイアログのコントローラーの基底クラス
+
+    一覧は走査 → フィルター → 並べ替え → 表示の順に処理し、各段の結果は FileListPipeline が保持する。
+    ディレクトリの移動では走査から、フィルターの変更ではフィルターから、並べ替えの変更では並べ替えから
+    やり直し、それより前の段の結果はそのまま使う。
+    サブクラスは DIALOG_ID と BUTTON_HANDLERS を定義し、ダイアログ固有の処理を追加する。
+    """
+
+    # 表示するダイアログのID
+    DIALOG_ID = None
+    # ログに表示するダイアログの名前
+    DIALOG_NAME = "File dialog"
+    # ボタンのIDと、押された時に呼び出すメソッド名（メソッドがパスを返した場合は結果としてダイアログを閉じる）
+    BUTTON_HANDLERS = {"IDC_UP_BUTTON": "handle_up_button", "IDCANCEL": "handle_cancel_button"}
+
+    # 並べ替えドロップダウンの項目と並べ替えの列（file_utils.SORT_FIELDS）
+    SORT_FIELD_MAPPING = {"Name": "name", "Size": "size", "Date": "mtime", "Type": "extension"}
+    # リストボックスの1行に表示する文字数（並べ替えの列を右端に表示する）
+    LIST_TEXT_COLUMNS = 50
+
+    def __init__(self, dialog_manager: DialogManager, initial_directory: str = None):
+        self.dialog_manager = dialog_manager
+        self.active_dialog = None
+        self.result = None
+        self.file_manager = FileManager(initial_directory)
+        self.pipeline = FileListPipeline(self.file_manager)  # 一覧の走査・フィルター・並べ替えの結果
+        self.directory_loader = DirectoryLoader(self.file_manager)  # ディレクトリのバックグラウンド読み込み
+        self.directory_loader.apply_filter = False  # フィルターはパイプラインで適用する
+        # 表示中のディレクトリの走査し直し（変更のあったエントリ名が分からない場合）と、
+        # 読み込み済みの一覧のサイズ・更新時刻の取得（サイズ・更新時刻での並べ替えに切り替えた場合）
+        self.refresh_loader = DirectoryLoader(self.file_manager)
+        self.refresh_loader.apply_filter = False
+        # 表示中のディレクトリの変更の監視（inotify のファイル記述子を使うため、ダイアログの表示中だけ作成する）
+        self.directory_watcher = None
+        self._last_selected_index = -1
+
+    @property
+    def file_items(self):
+        """リストボックスの表示順のFileItem"""
+        return self.pipeline.items
+
+    def _show_file_dialog(self) -> bool:
+        """ダイアログを表示し、初期化とイベントハンドラーの設定を行って一覧の読み込みを開始"""
+        if not self._safe_show_dialog(self.DIALOG_ID):
+            return False
+        self._initialize_dialog()
+        self._setup_event_handlers()
+        self._start_scan()
+        return True
+
+    def _safe_show_dialog(self, dialog_id):
+        """安全にダイアログを表示"""
+        self.result = None
+        self.dialog_manager.show(dialog_id)
+        self.active_dialog = self.dialog_manager.active_dialog
+        return self.active_dialog is not None
+
+    def _find_widget(self, widget_id):
+        """ウィジェットを検索"""
+        if not self.active_dialog:
+            return None
+        return self.active_dialog.find_widget(widget_id)
+
+    def is_active(self):
+        """ダイアログがアクティブかチェック"""
+        return (self.dialog_manager.active_dialog is not None and
+                self.active_dialog is not None and
+                self.active_dialog is self.dialog_manager.active_dialog)
+
+    def get_result(self):
+        """結果を取得"""
+        return self.result
+
+    def _initialize_dialog(self):
+        """ダイアログの初期化（表示時とディレクトリの移動時）"""
+        if not self.active_dialog:
+            return
+
+        # パス表示ウィジェットを見つけて現在パスを設定
+        path_widget = self._find_widget("IDC_PATH_DISPLAY")
+        if path_widget:
+            path_widget.text = self.file_manager.get_display_path()
+
+    def _setup_event_handlers(self):
+        """イベントハンドラーを設定（ダイアログの表示時に1回だけ）"""
+        file_list_widget = self._find_widget("IDC_FILE_LIST")
+        if file_list_widget:
+            # クリックモードに応じたイベントハンドラーを設定
+            if settings.is_single_click_mode():
+                # シングルクリックモード: アクティベートで即座に処理
+                file_list_widget.on_item_activated = self.handle_file_activation
+            else:
+                # ダブルクリックモード: 選択とアクティベートを分離
+                file_list_widget.on_selection_changed = self.handle_file_selection
+                file_list_widget.on_item_activated = self.handle_file_activation
+
+        # 並べ替えのドロップダウンとチェックボックスのイベントハンドラーを設定
+        sort_field_widget = self._find_widget("IDC_SORT_FIELD")
+        if sort_field_widget:
+            sort_field_widget.on_selection_changed = self.handle_sort_field_changed
+        sort_order_widget = self._find_widget("IDC_SORT_DESCENDING")
+        if sort_order_widget:
+            sort_order_widget.on_checked_changed = self.handle_sort_order_changed
+
+    # --- 走査段 ---
+
+    def _start_scan(self):
+        """現在のディレクトリの走査を開始（バックグラウンドで読み込み、update() で反映）"""
+        file_list_widget = self._find_widget("IDC_FILE_LIST")
+        if not file_list_widget:
+            return
+
+        self.pipeline.reset()
+        self.refresh_loader.cancel()
+        self._read_sort_settings()
+        self._begin_scan()
+        self._last_selected_index = -1
+
+        # リストボックスは仮想モードで、表示範囲の行だけ表示名を生成する（読み込み中は末尾に状態の行）
+        file_list_widget.set_virtual_items(1, self._get_file_display_name)
+
+    def _begin_scan(self):
+        """DirectoryLoader での読み込みを開始"""
+        # 読み込み中の変更も検出できるよう、読み込みの前に監視を始める
+        if self.directory_watcher is None:
+            self.directory_watcher = create_directory_watcher()
+        self.directory_watcher.watch(self.file_manager.get_current_path())
+        self.directory_loader.start()
+
+    def _apply_loaded_items(self):
+        """バックグラウンドで読み込んだディレクトリの内容をパイプラインに渡して表示"""
+        loader = self.directory_loader
+        if not loader.poll():
+            return
+
+        if loader.error is not None:
+            print(f"Error loading directory: {loader.error}")
+            self.pipeline.reset()
+            file_list_widget = self._find_widget("IDC_FILE_LIST")
+            if file_list_widget:
+                file_list_widget.set_items([f"Error: {str(loader.error)}"])
+            return
+
+        self.pipeline.set_scanned(loader.items, complete=not loader.loading)
+        self._present()
+        if not loader.loading:
+            print(f"Loaded {len(self.file_items)} items from {loader.path}")
+
+    def _apply_directory_changes(self):
+        """
+        表示中のディレクトリの変更（ファイルの追加・削除・書き込み）を、選択とスクロール位置を維持して反映
+
+        変更のあったエントリ名が分かる場合はそのエントリだけをその場で反映する。
+        分からない場合（更新時刻のポーリング、inotify のイベントのあふれ）はディレクトリ全体を
+        refresh_loader のワーカースレッドで走査し直し、届いた時に反映する。
+        """
+        loader = self.directory_loader
+        if (loader.loading or loader.recursive or loader.error is not None or
+                self.directory_watcher is None):
+            return
+        refresh_loader = self.refresh_loader
+        changed, names = self.directory_watcher.poll()
+        if changed:
+            if names is None or refresh_loader.loading:
+                # 走査し直している間の変更は、走査をやり直して反映する
+                refresh_loader.prefetch_stats = loader.prefetch_stats
+                refresh_loader.start()
+            else:
+                try:
+                    scanned = self.file_manager.update_items(self.pipeline.scanned, loader.path, names,
+                                                             apply_filter=False)
+                except OSError as e:
+                    print(f"Error updating directory: {e}")
+                    return
+                self.pipeline.set_scanned(scanned)
+                self._present(keep_scroll=True)
+
+    def _apply_refreshed_items(self):
+        """refresh_loader の結果（走査し直したディレクトリ、またはサイズと更新時刻の取得）を反映"""
+        refresh_loader = self.refresh_loader
+        if not refresh_loader.poll() or refresh_loader.loading:
+            return
+        if refresh_loader.error is not None:
+            print(f"Error updating directory: {refresh_loader.error}")
+            return
+
+        # 取得を待っていた並べ替えの設定もここで反映する
+        self._read_sort_settings()
+        scanned = self.pipeline.scanned
+        if refresh_loader.items is scanned:
+            # サイズと更新時刻を取得し終えたので、並べ替え直す
+            self.pipeline.set_scanned(scanned)
+            self._present()
+        else:
+            scanned = self.file_manager.merge_items(scanned, refresh_loader.items, apply_filter=False)
+            self.pipeline.set_scanned(scanned)
+            self._present(keep_scroll=True)
+
+    # --- フィルター段・並べ替え段 ---
+
+    def _read_sort_settings(self):
+        """並べ替えのウィジェットから列と順序を取得"""
+        pipeline = self.pipeline
+        field_widget = self._find_widget("IDC_SORT_FIELD")
+        if field_widget:
+            pipeline.sort_field = self.SORT_FIELD_MAPPING.get(field_widget.get_selected_value(), "name")
+        order_widget = self._find_widget("IDC_SORT_DESCENDING")
+        if order_widget:
+            pipeline.sort_descending = order_widget.is_checked
+        # サイズ・更新時刻で並べ替える場合は、読み込みと一緒にワーカースレッドで取得しておく
+        self.directory_loader.prefetch_stats = pipeline.sort_field in ("size", "mtime")
+
+    # --- 表示段 ---
+
+    def _present(self, keep_scroll: bool = False):
+        """
+        パイプラインの入力の変わった段から後を計算し直し、リストボックスに反映
+
+        選択中のアイテムは同一性で探して維持する。keep_scroll がTrueの場合は表示範囲の先頭のアイテムも維持し、
+        Falseの場合は選択中のアイテムが見えるようにスクロールする。
+        """
+        loader = self.directory_loader
+        file_list_widget = self._find_widget("IDC_FILE_LIST")
+        if not file_list_widget or loader.error is not None:
+            return
+
+        old_items = self.pipeline.items
+        selected_index = file_list_widget.selected_index
+        selected_item = old_items[selected_index] if 0 <= selected_index < len(old_items) else None
+        top_index = file_list_widget.scroll_offset
+        top_item = old_items[top_index] if keep_scroll and top_index < len(old_items) else None
+
+        items = self.pipeline.run()
+        has_status_row = loader.loading or loader.truncated
+        file_list_widget.set_virtual_count(len(items) + (1 if has_status_row else 0))
+        if items is old_items:
+            return  # 走査中に追加されただけなので、表示位置は変わらない
+
+        new_index = self._index_of(items, selected_item)
+        file_list_widget.selected_index = new_index
+        self._last_selected_index = new_index
+        if keep_scroll:
+            new_top = self._index_of(items, top_item)
+            if new_top >= 0:
+                max_scroll = max(0, len(items) - file_list_widget.visible_items)
+                file_list_widget.scroll_offset = min(new_top, max_scroll)
+        elif new_index >= 0:
+            file_list_widget.scroll_to_item(new_index)
+
+    @staticmethod
+    def _index_of(items, item) -> int:
+        """アイテムのインデックス（無い場合は-1）"""
+        if item is None:
+            return -1
+        try:
+            return items.index(item)
+        except ValueError:
+            return -1
+
+    def _get_file_display_name(self, index: int) -> str:
+        """リストボックスの行の表示名（表示インデックスがそのまま file_items のインデックスになる）"""
+        loader = self.directory_loader
+        file_items = self.pipeline.items
+        if index < len(file_items):
+            item = file_items[index]
+            return self._add_sort_column(self._get_item_display_name(item), item)
+        if loader.loading:
+            return "Searching..." if loader.recursive else "Loading..."
+        return f"(First {len(file_items)} matches)"
+
+    def _get_item_display_name(self, item: FileItem) -> str:
+        """アイテムの表示名"""
+        return item.get_display_name()
+
+    def _add_sort_column(self, name: str, item: FileItem) -> str:
+        """並べ替えの列（サイズ・更新時刻）の値を行の右端に追加"""
+        column = item.get_column_text(self.pipeline.sort_field)
+        if not column:
+            return name
+        width = self.LIST_TEXT_COLUMNS - len(column) - 1
+        return f"{name[:width]:<{width}} {column}"
+
+    # --- イベント処理 ---
+
+    def handle_file_selection(self, selected_index: int):
+        """ファイル選択時の処理（ダブルクリックモードでの選択のみ）"""
+        if not 0 <= selected_index < len(self.file_items):
+            return
+
+        # ダブルクリックモードでは、ファイルの場合のみファイル名を設定
+        # ディレクトリの場合はダブルクリック待ち
+        selected_item = self.file_items[selected_index]
+        if not selected_item.is_directory:
+            self._set_filename_from_item(selected_item, "Selected")
+
+    def handle_file_activation(self, selected_index: int):
+        """ファイルアクティベート時の処理（実際の動作実行）"""
+        if not 0 <= selected_index < len(self.file_items):
+            return
+
+        selected_item = self.file_items[selected_index]
+        if selected_item.is_directory:
+            # ディレクトリの場合は移動
+            self._navigate_to_directory(selected_item.path)
+        else:
+            # ファイルの場合はファイル名入力ボックスに設定
+            self._set_filename_from_item(selected_item, "Activated")
+
+    def _set_filename_from_item(self, item: FileItem, action: str):
+        """ファイルリストから選ばれたファイルの名前をファイル名入力欄に設定"""
+        filename_widget = self._find_widget("IDC_FILENAME_INPUT")
+        if filename_widget:
+            filename_widget.text = self._get_item_filename(item)
+            print(f"{action} file: {filename_widget.text}")
+
+    def _get_item_filename(self, item: FileItem) -> str:
+        """ファイル名入力欄に設定する名前"""
+        return item.name
+
+    def _navigate_to_directory(self, directory_path: str):
+        """ディレクトリに移動"""
+        if self.file_manager.set_current_path(directory_path):
+            print(f"Navigated to: {directory_path}")
+            self._enter_directory()
+        else:
+            print(f"Failed to navigate to: {directory_path}")
+
+    def handle_up_button(self):
+        """上ディレクトリボタンが押された時の処理"""
+        if self.file_manager.go_up():
+            print(f"Moved up to: {self.file_manager.get_current_path()}")
+            self._enter_directory()
+        else:
+            print("Already at root directory")
+
+    def _enter_directory(self):
+        """移動先のディレクトリの表示を始める（イベントハンドラーは設定済みのまま）"""
+        self._initialize_dialog()
+        self._start_scan()
+
+    def handle_cancel_button(self):
+        """Cancelボタンが押された時の処理"""
+        print(f"{self.DIALOG_NAME} cancelled")
+        self.result = None
+        self.dialog_manager.close()
+        return None
+
+    def handle_sort_field_changed(self, selected_index: int, selected_value: str):
+        """並べ替えドロップダウンの選択が変更された時の処理"""
+        loader = self.directory_loader
+        field = self.SORT_FIELD_MAPPING.get(selected_value, "name")
+        if field in ("size", "mtime") and not loader.loading and loader.error is None:
+            # 読み込み済みの一覧は、サイズと更新時刻をワーカースレッドで取得してから並べ替える
+            # （_apply_refreshed_items() で並べ替えの設定を反映する）
+            loader.prefetch_stats = True
+            self.refresh_loader.prefetch_stats = True
+            if not self.refresh_loader.loading:  # 走査し直している場合は、その結果と一緒に取得する
+                self.refresh_loader.start_stats(self.pipeline.scanned)
+            return
+        self._read_sort_settings()
+        self._present()
+
+    def handle_sort_order_changed(self, descending: bool):
+        """降順チェックボックスの状態が変更された時の処理"""
+        self._read_sort_settings()
+        self._present()
+
+    def close(self):
+        """
+        読み込みを中止し、ディレクトリの監視を終了する
+
+        ダイアログが閉じられた時に update() から呼び出す。ダイアログの表示中にコントローラーを
+        破棄する場合は、呼び出し側で呼び出す（次に表示した時に監視を作り直す）。
+        """
+        self.directory_loader.cancel()
+        self.refresh_loader.cancel()
+        if self.directory_watcher is not None:
+            self.directory_watcher.close()
+            self.directory_watcher = None
+
+    def update(self):
+        """フレームごとの更新処理"""
+        # マネージャーと自身のアクティブダイアログが一致しない場合、自身を非アクティブ化
+        if self.active_dialog and self.active_dialog != self.dialog_manager.active_dialog:
+            self.active_dialog = None
+            self.close()
+
+        if not self.active_dialog:
+            return
+
+        # バックグラウンドで読み込んだディレクトリの内容と、その後のディレクトリの変更を反映
+        self._apply_loaded_items()
+        self._apply_directory_changes()
+        self._apply_refreshed_items()
+
+        # ボタンクリックのチェック
+        self._check_button_clicks()
+
+        # ファイルリストの選択状態をチェック
+        file_list_widget = self._find_widget("IDC_FILE_LIST")
+        if file_list_widget:
+            selected_index = file_list_widget.selected_index
+            if selected_index >= 0 and selected_index != self._last_selected_index:
+                # 選択が変わった場合
+                self.handle_file_selection(selected_index)
+                self._last_selected_index = selected_index
+
+    def _check_button_clicks(self):
+        """ボタンクリックをチェックして対応する処理を実行"""
+        for widget_id, handler_name in self.BUTTON_HANDLERS.items():
+            widget = self._find_widget(widget_id)
+            if widget and getattr(widget, 'is_pressed', False):
+                result = getattr(self, handler_name)()
+                if result:
+                    print(f"File selected: {result}")
+                    self.result = result
+                    self.dialog_manager.close()
@@ -0,0 +1,87 @@
+"""
+ファイル一覧の段階的な処理（走査 → フィルター → 並べ替え）
+
+ファイルダイアログの一覧は、ディレクトリの走査結果にファイルフィルターとディレクトリ表示の設定を適用し、
+並べ替えてからリストボックスに表示する。FileListPipeline は各段の結果と、その結果を計算した時の入力を保持し、
+入力の変わった段から後だけを計算し直す。
+フィルターの変更ではディレクトリを走査し直さず、並べ替えの変更ではフィルターを適用し直さない。
+
+走査（DirectoryLoader）とリストボックスへの表示は FileDialogController が行う。
+"""
+from typing import List, Optional, Tuple
+
+from file_utils import FileItem, FileManager, FileSorter
+
+
+class FileListPipeline:
+    """
+    ファイル一覧の走査・フィルター・並べ替えの結果を保持するクラス
+
+    Attributes:
+        scanned: 走査段の結果（フィルター適用前。完了時はディレクトリが先・名前順、走査中は走査順）
+        complete: 走査が完了しているかどうか
+        filtered: フィルター段の結果（scanned の順序のまま）
+        items: 並べ替え段の結果（表示順。走査中は並べ替えずに filtered のまま）
+        sort_field: 並べ替えの列（file_utils.SORT_FIELDS のいずれか）
+        sort_descending: 降順にするかどうか
+    """
+
+    def __init__(self, file_manager: FileManager):
+        self.file_manager = file_manager
+        self.sorter = FileSorter()
+        self.sort_field = "name"
+        self.sort_descending = False
+        self.reset()
+
+    def reset(self):
+        """結果を破棄する（別のディレクトリの走査を始める場合）"""
+        self.sorter.clear()  # 保持した並びはサイズと更新時刻が古い場合がある
+        self.scanned: List[FileItem] = []
+        self.complete = False
+        self.filtered: List[FileItem] = []
+        self.items: List[FileItem] = []
+        self._filter_key: Optional[Tuple] = None  # filtered を計算した時のフィルターの設定
+        self._filtered_count = 0  # フィルターを適用済みの scanned のアイテム数
+        self._sort_key: Optional[Tuple] = None  # items を計算した時の並べ替えの設定
+
+    def set_scanned(self, scanned: List[FileItem], complete: bool = True):
+        """
+        走査段の結果を設定する
+
+        走査中は、前回と同じリストに追加したものを渡すと、追加分にだけフィルターを適用する。
+
+        Args:
+            scanned: 走査したアイテム（完了時はディレクトリが先・名前順）
+            complete: 走査が完了している場合True
+        """
+        if scanned is not self.scanned or complete != self.complete:
+            self.scanned = scanned
+            self.complete = complete
+            self._filter_key = None
+        if complete:
+            # 同じアイテムでもサイズと更新時刻を取得し直している場合があるので、並べ替え直す
+            self.sorter.clear()
+            self._sort_key = None
+
+    def run(self) -> List[FileItem]:
+        """入力の変わった段から後を計算し直し、表示順のアイテムを返す"""
+        file_manager = self.file_manager
+        filter_key = (tuple(file_manager.file_filters), file_manager.show_directories)
+        if filter_key != self._filter_key:
+            self.filtered = file_manager.filter_items(self.scanned)
+            self._filter_key = filter_key
+            self._sort_key = None
+        elif self._filtered_count < len(self.scanned):
+            # 走査中に追加されたアイテムにだけフィルターを適用する
+            self.filtered.extend(file_manager.filter_items(self.scanned[self._filtered_count:]))
+        self._filtered_count = len(self.scanned)
+
+        if not self.complete:
+            self.items = self.filtered  # 並べ替えは走査の完了後に1回だけ行う
+            return self.items
+
+        sort_key = (self.sort_field, self.sort_descending)
+        if sort_key != self._sort_key:
+            self.items = self.sorter.sort(self.filtered, self.sort_field, self.sort_descending)
+            self._sort_key = sort_key
+        return self.items
@@ -4,18 +4,19 @@
 ファイルシステムとダイアログウィジェットを連携させる機能を提供
 """
 import os
-from file_utils import FileManager
+from file_utils import FileItem
 from dialog_manager import DialogManager
-from system_settings import settings
+from file_dialog_controller import FileDialogController
 
-class FileSaveDialogController:
+class FileSaveDialogController(FileDialogController):
     """ファイル保存ダイアログのコントローラークラス"""
+
+    DIALOG_ID = "IDD_SAVE_AS"
+    DIALOG_NAME = "Save dialog"
+    BUTTON_HANDLERS = {**FileDialogController.BUTTON_HANDLERS, "IDOK": "handle_save_button"}
     
     def __init__(self, dialog_manager: DialogManager, initial_directory: str = None):
-        self.dialog_manager = dialog_manager
-        self.active_dialog = None
-        self.result = None
-        self.file_manager = FileManager(initial_directory)
+        super().__init__(dialog_manager, initial_directory)
         
         # デフォルト拡張子（空文字列なら拡張子なし）
         self.default_extension = ".txt"
@@ -23,113 +24,35 @@ class FileSaveDialogController:
         
     def show_save_dialog(self, default_filename: str = "", default_extension: str = None):
         """ファイル保存ダイアログを表示し、ファイルシステムと連携"""
-        self.result = None # 表示時に結果をリセット
         # デフォルト拡張子の設定
         if default_extension is not None:
             self.default_extension = default_extension
             
         # ダイアログを表示
-        if self._safe_show_dialog("IDD_SAVE_AS"):
-            # 初期化処理
-            self._initialize_dialog(default_filename)
-            self._refresh_file_list()
-            self._setup_event_handlers()
-    
-    def _safe_show_dialog(self, dialog_id):
-        """安全にダイアログを表示"""
-        self.result = None
-        self.dialog_manager.show(dialog_id)
-        self.active_dialog = self.dialog_manager.active_dialog
-        return self.active_dialog is not None
-    
-    def _find_widget(self, widget_id):
-        """ウィジェットを検索"""
-        if not self.active_dialog:
-            return None
-        return self.active_dialog.find_widget(widget_id)
-    
-    def is_active(self):
-        """ダイアログがアクティブかチェック"""
-        return (self.dialog_manager.active_dialog is not None and 
-                self.active_dialog is not None and
-                self.active_dialog is self.dialog_manager.active_dialog)
-    
-    def get_result(self):
-        """結果を取得"""
-        return self.result
-
-    def _initialize_dialog(self, default_filename: str):
-        """ダイアログの初期化"""
-        if not self.active_dialog:
-            return
-            
-        # パス表示ウィジェットを見つけて現在パスを設定
-        path_widget = self._find_widget("IDC_PATH_DISPLAY")
-        if path_widget:
-            display_path = self.file_manager.get_display_path()
-            path_widget.text = display_path
-            
-        # ファイル名入力ウィジェットにデフォルトファイル名を設定
-        filename_widget = self._find_widget("IDC_FILENAME_INPUT")
-        if filename_widget:
-            if default_filename:
-                # 表示用ファイル名を取得（+ [.ext] 形式）
+        if self._show_file_dialog() and default_filename:
+            # 表示用ファイル名を取得（+ [.ext] 形式）
+            filename_widget = self._find_widget("IDC_FILENAME_INPUT")
+            if filename_widget:
                 display_filename = self._get_display_filename(default_filename)
                 filename_widget.text = display_filename
                 self.last_filename = display_filename
-            elif not filename_widget.text:
-                # デフォルトファイル名
-                base_name = "untitled"
-                display_filename = self._get_display_filename(base_name)
-                filename_widget.text = display_filename
-                self.last_filename = display_filename
-    
-    # _find_widget()は基底クラスから継承
-    
-    def _refresh_file_list(self):
-        """ファイルリストを更新"""
+
+    def _initialize_dialog(self):
+        """ダイアログの初期化"""
         if not self.active_dialog:
             return
+        super()._initialize_dialog()
             
-        # ファイルリストウィジェットを取得
-        file_list_widget = self._find_widget("IDC_FILE_LIST")
-        if not file_list_widget:
-            return
-            
-        try:
-            # ディレクトリ内容を取得
-            file_items = self.file_manager.list_directory()
-            
-            # 表示用の文字列リストを作成
-            display_items = []
-            self.file_items_map = {}  # 表示インデックスと実際のFileItemのマッピング
-            
-            for i, item in enumerate(file_items):
-                display_name = item.get_display_name()
-                display_items.append(display_name)
-                self.file_items_map[i] = item
-            
-            # リストボックスにアイテムを設定
-            file_list_widget.set_items(display_items)
-            
-            print(f"Loaded {len(display_items)} items from {self.file_manager.get_current_path()}")
-            
-        except Exception as e:
-            print(f"Error loading directory: {e}")
-            file_list_widget.set_items([f"Error: {str(e)}"])
-    
+        # ファイル名が空の場合はデフォルトファイル名を設定
+        filename_widget = self._find_widget("IDC_FILENAME_INPUT")
+        if filename_widget and not filename_widget.text:
+            display_filename = self._get_display_filename("untitled")
+            filename_widget.text = display_filename
+            self.last_filename = display_filename
+
     def _setup_event_handlers(self):
         """イベントハンドラーを設定"""
-        file_list_widget = self._find_widget("IDC_FILE_LIST")
-        if file_list_widget:
-            # クリックモードに応じたイベントハンドラーを設定
-            if settings.is_single_click_mode():
-                # シングルクリックモード: アクティベートで即座に処理
-                file_list_widget.on_item_activated = self.handle_file_activation
-            else:
-                # ダブルクリックモード: 選択とアクティベートを分離
-                file_list_widget.on_selection_changed = self.handle_file_selection
-                file_list_widget.on_item_activated = self.handle_file_activation
+        super()._setup_event_handlers()
         
         # ファイル名入力ウィジェットのイベントハンドラー
         filename_widget = self._find_widget("IDC_FILENAME_INPUT")
@@ -137,63 +60,11 @@ class FileSaveDialogController:
             # テキスト変更時にプレビューを更新
             filename_widget.on_text_changed = self._on_filename_changed
 
-    def handle_file_selection(self, selected_index: int):
-        """ファイル選択時の処理（ダブルクリックモードでの選択のみ）"""
-        if selected_index < 0 or selected_index not in self.file_items_map:
-            return
-            
-        selected_item = self.file_items_map[selected_index]
-        
-        # ダブルクリックモードでは、ファイルの場合のみファイル名を設定
-        # ディレクトリの場合はダブルクリック待ち
-        if not selected_item.is_directory:
-            filename_widget = self._find_widget("IDC_FILENAME_INPUT")
-            if filename_widget:
-                # ファイルリストから選択された場合は、元のファイル名をそのまま使用
-                display_name = selected_item.name
-                filename_widget.text = display_name
-                self.last_filename = display_name
-                print(f"Selected file: {display_name}")
-    
-    def handle_file_activation(self, selected_index: int):
-        """ファイルアクティベート時の処理（実際の動作実行）"""
-        if selected_index < 0 or selected_index not in self.file_items_map:
-            return
-            
-        selected_item = self.file_items_map[selected_index]
-        
-        if selected_item.is_directory:
-            # ディレクトリの場合は移動
-            self._navigate_to_directory(selected_item.path)
-        else:
-            # ファイルの場合はファイル名入力ボックスに設定
-            filename_widget = self._find_widget("IDC_FILENAME_INPUT")
-            if filename_widget:
-                # ファイルリストから選択された場合は、元のファイル名をそのまま使用
-                display_name = selected_item.name
-                filename_widget.text = display_name
-                self.last_filename = display_name
-                print(f"Activated file: {display_name}")
-    
-    def _navigate_to_directory(self, directory_path: str):
-        """ディレクトリに移動"""
-        if self.file_manager.set_current_path(directory_path):
-            print(f"Navigated to: {directory_path}")
-            self._initialize_dialog("")
-            self._refresh_file_list()
-            self._setup_event_handlers()  # イベントハンドラーを再設定
-        else:
-            print(f"Failed to navigate to: {directory_path}")
-    
-    def handle_up_button(self):
-        """上ディレクトリボタンが押された時の処理"""
-        if self.file_manager.go_up():
-            print(f"Moved up to: {self.file_manager.get_current_path()}")
-            self._initialize_dialog("")
-            self._refresh_file_list()
-            self._setup_event_handlers()  # イベントハンドラーを再設定
-        else:
-            print("Already at root directory")
+    def _set_filename_from_item(self, item: FileItem, action: str):
+        """ファイルリストから選ばれたファイルの名前をファイル名入力欄に設定"""
+        # ファイルリストから選択された場合は、元のファイル名をそのまま使用
+        super()._set_filename_from_item(item, action)
+        self.last_filename = item.name
     
     def _get_display_filename(self, base_filename: str) -> str:
         """表示用ファイル名を取得（拡張子付き形式）"""
@@ -288,57 +159,4 @@ class FileSaveDialogController:
         print(f"Default extension: {self.default_extension if self.default_extension else 'None'}")
         return full_path
     
-    def handle_cancel_button(self):
-        """Cancelボタンが押された時の処理"""
-        print("Save dialog cancelled")
-        self.result = None
-        self.dialog_manager.close()
-        return None
-    
-    def update(self):
-        """フレームごとの更新処理"""
-        # マネージャーと自身のアクティブダイアログが一致しない場合、自身を非アクティブ化
-        if self.active_dialog and self.active_dialog != self.dialog_manager.active_dialog:
-            self.active_dialog = None
-
-        if not self.active_dialog:
-            return
-            
-            
-        # ボタンクリックのチェック
-        self._check_button_clicks()
-            
-        # ファイルリストの選択状態をチェック
-        file_list_widget = self._find_widget("IDC_FILE_LIST")
-        if file_list_widget and hasattr(file_list_widget, 'selected_index'):
-            if (file_list_widget.selected_index >= 0 and 
-                hasattr(self, '_last_selected_index') and
-                file_list_widget.selected_index != self._last_selected_index):
-                
-                # 選択が変わった場合
-                self.handle_file_selection(file_list_widget.selected_index)
-                self._last_selected_index = file_list_widget.selected_index
-            
-            if not hasattr(self, '_last_selected_index'):
-                self._last_selected_index = -1
-    
-    def _check_button_clicks(self):
-        """ボタンクリックをチェックして対応する処理を実行"""
-        if not self.active_dialog:
-            return
-            
-        # 各ボタンのクリック状態をチェック
-        for widget in self.active_dialog.widgets:
-            if hasattr(widget, 'id') and hasattr(widget, 'is_pressed') and widget.is_pressed:
-                if widget.id == "IDC_UP_BUTTON":
-                    self.handle_up_button()
-                elif widget.id == "IDOK":
-                    result = self.handle_save_button()
-                    if result:
-                        print(f"File selected for saving: {result}")
-                        self.result = result
-                        self.dialog_manager.close()
-                elif widget.id == "IDCANCEL":
-                    self.handle_cancel_button()
-
-    # is_active()は基底クラスから継承（Stale参照検出機能付き）
\ No newline at end of file
+    # _find_widget() / is_active() / update() は FileDialogController から継承
\ No newline at end of file
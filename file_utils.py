@@ -3,26 +3,120 @@
 
 シンプルなファイル操作とディレクトリ一覧機能を提供
 """
+import fnmatch
+import logging
 import os
-from typing import List, Dict, Optional
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Dict, Optional, Set, Tuple
 from pathlib import Path
+from debug_log import get_logger
+
+logger = get_logger("files")
+
+# FileItem の種別フラグ
+_DIRECTORY = 1
+_FILE = 2
+
+# 更新時刻の分解能が粗いファイルシステム（FAT は2秒）で、同じ時刻内の変更を見逃さないよう、
+# 更新からこの時間（ナノ秒）以内のディレクトリはキャッシュしない
+_RECENT_MTIME_NS = 2_000_000_000
+
 
 class FileItem:
-    """ファイルまたはディレクトリの情報を保持するクラス"""
+    """
+    ファイルまたはディレクトリの情報を保持するクラス
+
+    大きなディレクトリの一覧でもメモリを抑えるため __slots__ を使い、
+    ディレクトリのパス（同じ一覧の全アイテムで共有）と名前、種別フラグだけを保持する。
+    フルパスと表示名は参照時に生成し、サイズと更新時刻は最初に参照した時に取得する。
+    """
+    __slots__ = ("directory", "name", "_flags", "_size", "_mtime")
+
     def __init__(self, path: str):
-        self.path = path
-        self.name = os.path.basename(path)
-        self.is_directory = os.path.isdir(path)
-        self.is_file = os.path.isfile(path)
-        
-        # サイズ情報
+        self.directory, self.name = os.path.split(path)
+        self._flags = ((_DIRECTORY if os.path.isdir(path) else 0) |
+                       (_FILE if os.path.isfile(path) else 0))
+        self._size = None
+        self._mtime = None
+
+    @classmethod
+    def from_entry(cls, entry: os.DirEntry, directory: str) -> "FileItem":
+        """
+        os.scandir(directory) の DirEntry から作成
+
+        種別は DirEntry がディレクトリ走査時に取得した情報を使うため、追加のシステムコールは発生しない。
+        """
+        item = cls.__new__(cls)
+        item.directory = directory
+        item.name = entry.name
+        item._flags = ((_DIRECTORY if entry.is_dir() else 0) |
+                       (_FILE if entry.is_file() else 0))
+        item._size = None
+        item._mtime = None
+        return item
+
+    @property
+    def path(self) -> str:
+        """フルパス"""
+        return os.path.join(self.directory, self.name)
+
+    @property
+    def is_directory(self) -> bool:
+        return bool(self._flags & _DIRECTORY)
+
+    @property
+    def is_file(self) -> bool:
+        return bool(self._flags & _FILE)
+
+    @property
+    def size(self) -> int:
+        """ファイルサイズ（ディレクトリは0）"""
+        if self._size is None:
+            self._load_stat()
+        return self._size
+
+    @property
+    def mtime(self) -> float:
+        """更新時刻（エポック秒）"""
+        if self._mtime is None:
+            self._load_stat()
+        return self._mtime
+
+    @property
+    def extension(self) -> str:
+        """拡張子（小文字、ドットを含む。無い場合は空文字列）"""
+        # os.path.splitext() と同じく、先頭のドット（".bashrc" など）は拡張子とみなさない
+        name = self.name
+        dot = name.rfind(".")
+        if dot <= 0 or not name[:dot].lstrip("."):
+            return ""
+        return name[dot:].lower()
+
+    def _load_stat(self):
+        """サイズと更新時刻を1回のシステムコールで取得"""
         try:
-            if self.is_file:
-                self.size = os.path.getsize(path)
-            else:
-                self.size = 0
-        except:
-            self.size = 0
+            stat = os.stat(self.path)
+            self._size = stat.st_size if self._flags & _FILE else 0
+            self._mtime = stat.st_mtime
+        except OSError:
+            self._size = 0
+            self._mtime = 0.0
+
+    def clear_stat(self):
+        """取得したサイズと更新時刻を破棄する（次に参照した時に取得し直す）"""
+        self._size = None
+        self._mtime = None
+
+    def get_column_text(self, field: str) -> str:
+        """一覧の列に表示する値（field は SORT_FIELDS のいずれか、名前と拡張子の場合は空文字列）"""
+        if field == "size":
+            return "" if self._flags & _DIRECTORY else _format_size(self.size)
+        if field == "mtime":
+            return time.strftime("%Y-%m-%d %H:%M", time.localtime(self.mtime))
+        return ""
     
     def get_display_name(self) -> str:
         """表示用の名前を取得（ディレクトリには[DIR]プレフィックス）"""
@@ -31,8 +125,131 @@ class FileItem:
         else:
             return self.name
 
+def _format_size(size: int) -> str:
+    """ファイルサイズを短い文字列にする（例: 512B, 12.3K, 4.0M）"""
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024 or unit == "G":
+            return f"{size}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+# 並べ替えの列（FileSorter / FileItem.get_column_text）
+SORT_FIELDS = ("name", "size", "mtime", "extension")
+
+# 列ごとの並べ替えのキー（一覧は名前順で、並べ替えは安定なので、同じ値の場合は名前順になる）
+_SORT_KEYS = {
+    "name": None,
+    "size": lambda item: item.size,
+    "mtime": lambda item: item.mtime,
+    "extension": lambda item: item.extension,
+}
+
+
+class FileSorter:
+    """
+    ファイル一覧の並べ替え（ディレクトリが先、それぞれ指定した列の順）
+
+    並べ替えのキーは一覧（アイテムのリスト）と列ごとに1回だけ計算し、昇順の並びを保持する。
+    一覧は名前順である必要がある（同じ値のアイテムは名前順のまま残る）。
+    降順への切り替えや、一度並べ替えた列に戻す場合は、保持した並びをつなぎ直すだけで済む。
+    サイズと更新時刻は FileItem が保持する。取得し直した場合は clear() で保持した並びを破棄する。
+    """
+
+    def __init__(self):
+        self._items = None
+        self._orders = {}
+
+    def clear(self):
+        """保持した並びを破棄する"""
+        self._items = None
+        self._orders = {}
+
+    def sort(self, items: List[FileItem], field: str = "name", descending: bool = False) -> List[FileItem]:
+        """
+        並べ替えたリストを返す
+
+        Args:
+            items: 名前順の一覧（FileManager.list_directory() などの結果）
+            field: SORT_FIELDS のいずれか
+            descending: 降順にする場合True（ディレクトリが先なのは変わらない）
+        """
+        if field not in _SORT_KEYS:
+            raise ValueError(f"Unknown sort field: {field} (expected one of {SORT_FIELDS})")
+        if field == "name" and not descending:
+            return items
+        if items is not self._items:
+            self._items = items
+            self._orders = {}
+
+        order = self._orders.get(field)
+        if order is None:
+            key = _SORT_KEYS[field]
+            directories = [item for item in items if item._flags & _DIRECTORY]
+            files = [item for item in items if not item._flags & _DIRECTORY]
+            if key is not None:
+                directories.sort(key=key)
+                files.sort(key=key)
+            order = self._orders[field] = (directories, files)
+
+        directories, files = order
+        if descending:
+            return directories[::-1] + files[::-1]
+        return directories + files
+
+
+class FileFilter:
+    """
+    ファイルフィルター（fnmatch 形式のパターン、大文字小文字は区別しない）
+
+    パターンは作成時に1回だけ変換する。"*.csv" のように "*" と固定の文字列からなるパターンは
+    末尾の比較（str.endswith）で、"*.*" は "." を含むかどうかで、
+    それ以外のパターンはまとめて1つの正規表現で判定する。
+    "*.csv;*.txt" のように ";" で区切って複数のパターンを指定できる。
+    """
+    __slots__ = ("patterns", "_match_all", "_match_dotted", "_suffixes", "_regex")
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = [pattern.strip().lower()
+                         for text in patterns for pattern in text.split(";") if pattern.strip()]
+        self._match_all = "*" in self.patterns
+        self._match_dotted = "*.*" in self.patterns
+
+        suffixes = []
+        regex_patterns = []
+        for pattern in self.patterns:
+            suffix = pattern[1:]
+            if pattern == "*.*":
+                continue
+            if pattern.startswith("*") and not any(char in suffix for char in "*?["):
+                suffixes.append(suffix)
+            else:
+                regex_patterns.append(fnmatch.translate(pattern))
+        self._suffixes = tuple(suffixes)
+        self._regex = re.compile("|".join(regex_patterns)) if regex_patterns else None
+
+    def matches(self, filename: str) -> bool:
+        """ファイル名がいずれかのパターンにマッチするかチェック"""
+        if self._match_all:
+            return True
+        if self._match_dotted and "." in filename:
+            return True
+        name = filename.lower()
+        if self._suffixes and name.endswith(self._suffixes):
+            return True
+        return self._regex is not None and self._regex.match(name) is not None
+
+
 class FileManager:
-    """ファイルマネージャークラス"""
+    """
+    ファイルマネージャークラス
+
+    ディレクトリの走査結果（フィルター適用前の全エントリ）をパスごとにLRUでキャッシュし、
+    ディレクトリの更新時刻が変わっていなければ再利用する。
+    フィルターとディレクトリ表示の設定は、キャッシュした走査結果に対して適用する。
+    """
+    # キャッシュするディレクトリの数
+    CACHE_SIZE = 16
+
     def __init__(self, initial_path: Optional[str] = None):
         # 初期パスが指定されていない場合はカレントディレクトリから開始
         if initial_path and os.path.exists(initial_path) and os.path.isdir(initial_path):
@@ -40,7 +257,12 @@ class FileManager:
         else:
             self.current_path = os.getcwd()  # カレントディレクトリから開始
         self.file_filters = ["*.*"]  # デフォルトはすべてのファイル
+        self._file_filter = FileFilter(self.file_filters)  # file_filters を変換したフィルター
+        self._file_filter_source = self.file_filters
         self.show_directories = True  # ディレクトリ表示フラグ
+        # パス -> (更新時刻, 並べ替え済みの全エントリ)。バックグラウンドの読み込みからも使うためロックで保護
+        self._scan_cache: "OrderedDict[str, Tuple[int, List[FileItem]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def get_current_path(self) -> str:
         """現在のパスを取得"""
@@ -71,48 +293,225 @@ class FileManager:
         return False
     
     def list_directory(self) -> List[FileItem]:
-        """現在のディレクトリの内容を取得"""
-        items = []
+        """現在のディレクトリの内容を取得（ディレクトリが先、それぞれ名前順）"""
         try:
-            # ディレクトリとファイルを分けて取得
-            entries = os.listdir(self.current_path)
-            
-            # ディレクトリを先に追加（表示フラグがTrueの場合のみ）
-            if self.show_directories:
-                for entry in sorted(entries):
-                    full_path = os.path.join(self.current_path, entry)
-                    if os.path.isdir(full_path):
-                        items.append(FileItem(full_path))
-                        print(f"[DEBUG] Added directory: {entry}")
-            else:
-                print(f"[DEBUG] Directories hidden by user setting")
-            
-            # ファイルを後に追加
-            for entry in sorted(entries):
-                full_path = os.path.join(self.current_path, entry)
-                if os.path.isfile(full_path):
-                    # フィルターチェック
-                    if self._matches_filter(entry):
-                        items.append(FileItem(full_path))
+            return self.filter_items(self.get_directory_items(self.current_path))
         except:
-            pass  # アクセス権限エラーなどは無視
-        
+            return []  # アクセス権限エラーなどは無視
+
+    def get_directory_items(self, path: str) -> List[FileItem]:
+        """
+        ディレクトリの全エントリ（フィルター適用前、並べ替え済み）を取得
+
+        キャッシュがあり、ディレクトリの更新時刻が変わっていなければ走査しない。
+        アクセス権限エラーなどは OSError として送出する。
+        """
+        mtime = os.stat(path).st_mtime_ns
+        items = self.get_cached_items(path, mtime)
+        if items is None:
+            items = []
+            for chunk in self.scan_directory(path):
+                items.extend(chunk)
+            self.cache_items(path, mtime, self.sort_items(items))
+        return items
+
+    def get_cached_items(self, path: str, mtime: int) -> Optional[List[FileItem]]:
+        """
+        キャッシュした全エントリを取得（無い場合、更新時刻が変わった場合はNone）
+
+        ファイルへの書き込みではディレクトリの更新時刻は変わらないため、アイテムが保持するサイズと
+        更新時刻は古い場合がある。サイズ・更新時刻で並べ替える場合は DirectoryLoader が
+        ワーカースレッドで取得し直す。
+        """
+        with self._cache_lock:
+            cached = self._scan_cache.get(path)
+            if cached is None or cached[0] != mtime:
+                return None
+            self._scan_cache.move_to_end(path)
+            return cached[1]
+
+    def cache_items(self, path: str, mtime: int, items: List[FileItem]):
+        """
+        走査した全エントリ（並べ替え済み）をキャッシュする
+
+        mtime は走査を始める前に取得した更新時刻を渡す（走査中の変更は次回の走査で反映される）。
+        """
+        if time.time_ns() - mtime < _RECENT_MTIME_NS:
+            return
+        with self._cache_lock:
+            self._scan_cache[path] = (mtime, items)
+            self._scan_cache.move_to_end(path)
+            while len(self._scan_cache) > self.CACHE_SIZE:
+                self._scan_cache.popitem(last=False)
+
+    def clear_cache(self, path: Optional[str] = None):
+        """キャッシュを破棄する（path を省略した場合はすべて）"""
+        with self._cache_lock:
+            if path is None:
+                self._scan_cache.clear()
+            else:
+                self._scan_cache.pop(path, None)
+
+    def scan_directory(self, path: str, chunk_size: int = 256) -> Iterator[List[FileItem]]:
+        """
+        ディレクトリの全エントリ（フィルター適用前）を走査順に chunk_size 件ずつ返す（並べ替えはしない）
+
+        os.scandir() の1回の走査でエントリの種別も取得するため、エントリごとのシステムコールは発生しない。
+        アクセス権限エラーなどは OSError として送出する。
+        """
+        chunk = []
+        with os.scandir(path) as scanner:
+            for entry in scanner:
+                if not entry.is_dir() and not entry.is_file():
+                    continue  # リンク切れのシンボリックリンクなど
+                chunk.append(FileItem.from_entry(entry, path))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def walk_files(self, root: str, chunk_size: int = 256) -> Iterator[List[FileItem]]:
+        """
+        root 以下のサブディレクトリを含めて、ファイルフィルターにマッチするファイルを返す
+
+        ディレクトリを1つ走査するごとに、それまでに見つかったファイルを返す（chunk_size 件未満は次回にまとめる）。
+        走査の打ち切りを早く判定できるよう、見つからなかった場合も空のリストを返す。
+        シンボリックリンクのディレクトリはたどらず、読み込めないサブディレクトリは無視する。
+        """
+        matches = self._get_file_filter().matches
+        debug = logger.isEnabledFor(logging.DEBUG)
+        chunk = []
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as scanner:
+                    for entry in scanner:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file() and matches(entry.name):
+                            chunk.append(FileItem.from_entry(entry, directory))
+            except OSError as e:
+                if directory == root:
+                    raise
+                if debug:
+                    logger.debug("Skipped directory: %s (%s)", directory, e)
+            if len(chunk) >= chunk_size or not pending:
+                yield chunk
+                chunk = []
+            else:
+                yield []
+
+    def update_items(self, items: List[FileItem], directory: str,
+                     names: Optional[Set[str]] = None, apply_filter: bool = True) -> List[FileItem]:
+        """
+        表示中のアイテム（filter_items() の結果）にディレクトリの変更を反映したリストを返す
+
+        変わっていないアイテムと、書き込まれただけ（種別が同じ）のアイテムは同じオブジェクトのまま残すため、
+        呼び出し側は選択中のアイテムを同一性で探せる（書き込まれたアイテムのサイズと更新時刻は取得し直す）。
+
+        Args:
+            items: 表示中のアイテム（ディレクトリが先、それぞれ名前順）
+            directory: アイテムのディレクトリ
+            names: 変更のあったエントリ名（None の場合はディレクトリ全体を走査して比較する）
+            apply_filter: False の場合は追加したアイテムにフィルターを適用しない（items がフィルター適用前の場合）
+        """
+        if names is None:
+            return self.merge_items(items, self.get_directory_items(directory), apply_filter)
+
+        fresh = {}
+        for name in names:
+            item = FileItem(os.path.join(directory, name))
+            if item._flags:
+                fresh[name] = item
+        result = []
+        for item in items:
+            if item.name in names:
+                new = fresh.get(item.name)
+                if new is None or new._flags != item._flags:
+                    continue  # 削除された（種別が変わった）アイテム
+                # 書き込まれただけのアイテムは同じオブジェクトのまま、サイズと更新時刻を取得し直す
+                del fresh[item.name]
+                item.clear_stat()
+            result.append(item)
+        added = list(fresh.values())
+        if added:
+            result.extend(self.filter_items(added) if apply_filter else added)
+            # 追加分以外は並べ替え済みなので、ほぼ線形時間で並べ替えられる
+            self.sort_items(result)
+        return result
+
+    def merge_items(self, items: List[FileItem], fresh: List[FileItem],
+                    apply_filter: bool = True) -> List[FileItem]:
+        """
+        表示中のアイテムに、ディレクトリを走査し直した結果を反映したリストを返す
+
+        走査はワーカースレッド（DirectoryLoader）で行い、結果をここで突き合わせる。
+        種別の変わっていないアイテムは表示中のオブジェクトのまま残し、サイズと更新時刻は
+        走査し直した結果のもの（取得していなければ未取得）にする。
+
+        Args:
+            items: 表示中のアイテム
+            fresh: 走査し直した全エントリ（get_directory_items() の結果と同じく、ディレクトリが先・名前順）
+            apply_filter: False の場合は fresh にフィルターを適用しない（items がフィルター適用前の場合）
+        """
+        if apply_filter:
+            fresh = self.filter_items(fresh)
+        current = {item.name: item for item in items}
+        result = []
+        for item in fresh:
+            old = current.get(item.name)
+            if old is not None and old._flags == item._flags:
+                old._size, old._mtime = item._size, item._mtime
+                item = old
+            result.append(item)
+        return result
+
+    def filter_items(self, items: List[FileItem]) -> List[FileItem]:
+        """ディレクトリ表示の設定とファイルフィルターを適用したアイテムを取得（順序は維持）"""
+        # デバッグ出力が無効な場合は、エントリごとのログ呼び出しも行わない
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug and not self.show_directories:
+            logger.debug("Directories hidden by user setting")
+
+        matches = self._get_file_filter().matches
+        result = []
+        for item in items:
+            if item._flags & _DIRECTORY:
+                # ディレクトリは表示フラグがTrueの場合のみ追加
+                if self.show_directories:
+                    result.append(item)
+                    if debug:
+                        logger.debug("Added directory: %s", item.name)
+            elif matches(item.name):
+                # フィルターチェック
+                result.append(item)
+        return result
+
+    @staticmethod
+    def sort_items(items: List[FileItem]) -> List[FileItem]:
+        """アイテムをディレクトリが先、それぞれ名前順に並べ替える（リスト自体を並べ替えて返す）"""
+        items.sort(key=lambda item: (not item._flags & _DIRECTORY, item.name))
         return items
     
     def _matches_filter(self, filename: str) -> bool:
         """ファイルがフィルターにマッチするかチェック"""
-        import fnmatch
-        for filter_pattern in self.file_filters:
-            if fnmatch.fnmatch(filename.lower(), filter_pattern.lower()):
-                print(f"[DEBUG] File '{filename}' matches filter '{filter_pattern}'")
-                return True
-        print(f"[DEBUG] File '{filename}' does not match any filters: {self.file_filters}")
-        return False
+        return self._get_file_filter().matches(filename)
+
+    def _get_file_filter(self) -> FileFilter:
+        """変換済みのファイルフィルターを取得（file_filters が直接置き換えられた場合は変換し直す）"""
+        if self._file_filter_source is not self.file_filters:
+            self._file_filter = FileFilter(self.file_filters)
+            self._file_filter_source = self.file_filters
+        return self._file_filter
     
     def set_file_filter(self, filters: List[str]):
-        """ファイルフィルターを設定"""
+        """ファイルフィルターを設定（"*.csv;*.txt" のように ";" 区切りで複数指定可能）"""
         self.file_filters = filters if filters else ["*.*"]
-        print(f"[DEBUG] FileManager filters set to: {self.file_filters}")
+        self._file_filter = FileFilter(self.file_filters)
+        self._file_filter_source = self.file_filters
+        logger.debug("FileManager filters set to: %s", self.file_filters)
     
     def get_display_path(self) -> str:
         """表示用のパスを取得（短縮版）"""
@@ -0,0 +1,59 @@
+"""
+リストボックスの前方一致検索用索引
+
+アイテムの表示文字列（小文字化）を並べ替えた配列と、元のインデックスの配列を持ち、
+前方一致するアイテムの範囲を二分探索で求める。
+タイプアヘッド（キー入力でのジャンプ）と絞り込みで使用し、索引はアイテムが
+変わるまで作り直さない（キー入力ごとの検索は O(log n)）。
+"""
+from bisect import bisect_left
+from typing import List, Tuple
+
+# 前方一致の範囲の上限に使う文字（どの文字よりも大きい）
+_MAX_CHAR = "\U0010ffff"
+
+
+class ListSearchIndex:
+    """
+    表示文字列の前方一致検索用索引
+
+    Attributes:
+        keys: 小文字化した表示文字列（昇順）
+        positions: keys の各要素の、元のアイテムでのインデックス
+    """
+    __slots__ = ("_source", "_count", "keys", "positions")
+
+    def __init__(self, items):
+        """
+        Args:
+            items: len() とインデックスアクセスができるアイテム列（表示文字列は str(item)）
+        """
+        count = len(items)
+        keys = [str(items[i]).lower() for i in range(count)]
+        positions = sorted(range(count), key=keys.__getitem__)
+        self._source = items
+        self._count = count
+        self.keys: List[str] = [keys[i] for i in positions]
+        self.positions: List[int] = positions
+
+    def is_current(self, items) -> bool:
+        """指定したアイテム列から作成した索引かどうか（アイテム数の変化も検出する）"""
+        return self._source is items and self._count == len(items)
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """前方一致するアイテムの keys/positions 上の範囲 [start, end)"""
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + _MAX_CHAR, start)
+        return start, end
+
+    def find_first(self, prefix: str) -> int:
+        """前方一致するアイテムのうち、表示文字列が最も小さいもののインデックス（無ければ-1）"""
+        start, end = self.prefix_range(prefix)
+        return self.positions[start] if start < end else -1
+
+    def matching_indexes(self, prefix: str) -> List[int]:
+        """前方一致するアイテムのインデックス（元の並び順）"""
+        start, end = self.prefix_range(prefix)
+        # 元のアイテムが並べ替え済みなら既に昇順のため、sorted() はほぼ線形時間で終わる
+        return sorted(self.positions[start:end])
@@ -1,7 +1,9 @@
 # PyPlcシステムにpyDialogManagerを移行後、このファイルは不要になります
 
 import pyxel
+import dialog_profiler
 from dialog_manager import DialogManager
+from dialog_system import DialogSystem
 from file_open_dialog import FileOpenDialogController
 from file_save_dialog import FileSaveDialogController
 from system_settings import settings
@@ -18,6 +20,11 @@ class App:
         
         # ファイル保存ダイアログコントローラーを初期化（カレントディレクトリから開始）
         self.file_save_controller = FileSaveDialogController(self.dialog_manager, ".")
+
+        # コントローラーの更新を一括で行う（プロファイラーが有効な場合はコントローラーごとに計測）
+        self.dialog_system = DialogSystem()
+        self.dialog_system.register_controller(self.file_open_controller)
+        self.dialog_system.register_controller(self.file_save_controller)
         
         # 最初のダイアログを表示
         self.dialog_manager.show("IDD_MAIN_DIALOG")
@@ -54,14 +61,15 @@ class App:
             settings.toggle_click_mode()
             print(f"Click mode switched to: {settings.get_click_mode()}")
 
+        # プロファイラー（ウィジェットごとの処理時間の表示）の切り替え
+        if pyxel.btnp(pyxel.KEY_F9):
+            dialog_profiler.toggle_profiling()
+
         # ダイアログマネージャーの更新処理を呼び出す
         self.dialog_manager.update()
         
-        # ファイルオープンダイアログコントローラーの更新
-        self.file_open_controller.update()
-        
-        # ファイル保存ダイアログコントローラーの更新
-        self.file_save_controller.update()
+        # ファイルオープン・ファイル保存ダイアログコントローラーの更新
+        self.dialog_system.update()
 
     def draw(self):
         # 背景を少し暗い色で塗りつぶし
@@ -73,6 +81,11 @@ class App:
         # システム設定情報を画面下部に表示
         settings_text = settings.get_settings_info()
         pyxel.text(5, 240, settings_text, pyxel.COLOR_WHITE)
-        pyxel.text(5, 250, "TAB: Toggle click mode", pyxel.COLOR_GRAY)
+        pyxel.text(5, 250, "TAB: Toggle click mode  F9: Profiler", pyxel.COLOR_GRAY)
+
+        # プロファイラーが有効な場合は、フレーム予算の使用率と遅いウィジェットを設定情報の上に表示
+        profiler = dialog_profiler.get_profiler()
+        if profiler is not None:
+            profiler.draw_overlay(pyxel, 5, 204, count=3)
 
 App()
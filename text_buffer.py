@@ -0,0 +1,124 @@
+"""
+テキストボックスの編集用バッファ（ギャップバッファ）
+
+文字の配列の途中に空き領域（ギャップ）を持ち、ギャップをカーソル位置に移動して
+そこに挿入・削除を行う。カーソル位置での1文字の挿入・削除は償却 O(1)（ギャップの
+移動はカーソルが移動した距離に比例）で、文字列全体を作り直さない。
+文字列全体は get_text() で必要になった時に組み立てる。
+
+文字は bytearray に符号化して保持する。通常は1文字1バイトの Latin-1 で、Latin-1 で
+表せない文字が挿入された時に1文字4バイトの UTF-32 に切り替える（以後は切り替えたまま）。
+ギャップの移動はメモリのコピー、文字列の組み立てはデコード1回で済む。
+"""
+
+
+class GapBuffer:
+    """
+    ギャップバッファ
+
+    _data[:_gap_start] と _data[_gap_end:] がテキストで、その間がギャップ（未使用）。
+    位置はいずれもバイト単位（文字の位置 × _char_size）。
+    """
+    __slots__ = ("_data", "_gap_start", "_gap_end", "_encoding", "_char_size")
+
+    # ギャップが無くなった時に確保する最小の文字数
+    MIN_GAP = 16
+
+    def __init__(self, text: str = ""):
+        self.set_text(text)
+
+    def __len__(self) -> int:
+        return (len(self._data) - (self._gap_end - self._gap_start)) // self._char_size
+
+    def set_text(self, text: str):
+        """テキスト全体を置き換える（ギャップは末尾）"""
+        try:
+            data = bytearray(text.encode("latin-1"))
+            self._encoding, self._char_size = "latin-1", 1
+        except UnicodeEncodeError:
+            data = bytearray(text.encode("utf-32-le"))
+            self._encoding, self._char_size = "utf-32-le", 4
+        self._gap_start = len(data)
+        data.extend(bytes(self.MIN_GAP * self._char_size))
+        self._gap_end = len(data)
+        self._data = data
+
+    def get_text(self) -> str:
+        """テキスト全体の文字列を組み立てる"""
+        data = self._data
+        return (data[:self._gap_start].decode(self._encoding) +
+                data[self._gap_end:].decode(self._encoding))
+
+    def get_range(self, start: int, end: int) -> str:
+        """テキストの [start, end) の部分の文字列"""
+        size = self._char_size
+        start, end = start * size, end * size
+        gap_start, gap_end = self._gap_start, self._gap_end
+        data = self._data
+        if end <= gap_start:
+            return data[start:end].decode(self._encoding)
+        gap_size = gap_end - gap_start
+        if start >= gap_start:
+            return data[start + gap_size:end + gap_size].decode(self._encoding)
+        return (data[start:gap_start].decode(self._encoding) +
+                data[gap_end:end + gap_size].decode(self._encoding))
+
+    def _move_gap(self, pos: int):
+        """ギャップをバイト位置 pos に移動する"""
+        gap_start, gap_end = self._gap_start, self._gap_end
+        data = self._data
+        if pos < gap_start:
+            # pos からギャップの先頭までをギャップの後ろに移す
+            count = gap_start - pos
+            data[gap_end - count:gap_end] = data[pos:gap_start]
+            self._gap_start = pos
+            self._gap_end = gap_end - count
+        elif pos > gap_start:
+            # ギャップの後ろを pos までギャップの前に移す
+            count = pos - gap_start
+            data[gap_start:pos] = data[gap_end:gap_end + count]
+            self._gap_start = pos
+            self._gap_end = gap_end + count
+
+    def _ensure_gap(self, size: int):
+        """ギャップを size バイト以上にする（テキストの長さに比例して広げるため償却 O(1)）"""
+        gap_size = self._gap_end - self._gap_start
+        if gap_size >= size:
+            return
+        grow = max(size - gap_size, len(self._data) - gap_size, self.MIN_GAP * self._char_size)
+        self._data[self._gap_end:self._gap_end] = bytes(grow)
+        self._gap_end += grow
+
+    def _widen(self):
+        """UTF-32 に切り替える（Latin-1 で表せない文字を挿入する場合。ギャップの位置は維持する）"""
+        before = self._data[:self._gap_start].decode(self._encoding)
+        after = self._data[self._gap_end:].decode(self._encoding)
+        self._encoding, self._char_size = "utf-32-le", 4
+        data = bytearray(before.encode("utf-32-le"))
+        self._gap_start = len(data)
+        data.extend(bytes(self.MIN_GAP * self._char_size))
+        self._gap_end = len(data)
+        data.extend(after.encode("utf-32-le"))
+        self._data = data
+
+    def insert(self, pos: int, text: str):
+        """位置 pos に文字列を挿入する"""
+        if not text:
+            return
+        try:
+            encoded = text.encode(self._encoding)
+        except UnicodeEncodeError:
+            self._widen()
+            encoded = text.encode(self._encoding)
+        self._move_gap(pos * self._char_size)
+        self._ensure_gap(len(encoded))
+        end = self._gap_start + len(encoded)
+        self._data[self._gap_start:end] = encoded
+        self._gap_start = end
+
+    def delete(self, start: int, end: int):
+        """テキストの [start, end) を削除する"""
+        if end <= start:
+            return
+        self._move_gap(start * self._char_size)
+        self._gap_end += (end - start) * self._char_size
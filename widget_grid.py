@@ -0,0 +1,59 @@
+"""
+ウィジェットのヒットテスト用空間索引
+
+ダイアログ座標系を一定サイズのセルに分割し、各セルに重なるウィジェットを
+Z-order（最前面が先頭）の順で登録する。「座標 (mx, my) にあるウィジェット」の検索は
+1セル分の候補を調べるだけで済むため、ウィジェット数が数百あっても一定時間で完了する。
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+# セルの一辺（ピクセル）。一般的なボタン・セルの大きさと同程度にする
+DEFAULT_CELL_SIZE = 32
+
+
+class WidgetGrid:
+    """
+    ダイアログ相対座標の一様グリッド
+
+    ウィジェットの矩形（x, y, width, height）は構築時の値で登録する。
+    ウィジェットを移動・サイズ変更した場合は索引を作り直すこと。
+    """
+    __slots__ = ("cell_size", "_cells")
+
+    def __init__(self, widgets, cell_size: int = DEFAULT_CELL_SIZE):
+        """
+        Args:
+            widgets: 登録するウィジェット（最前面が先頭の順）
+            cell_size: セルの一辺（ピクセル）
+        """
+        self.cell_size = cell_size
+        cells: Dict[Tuple[int, int], List] = {}
+        for widget in widgets:
+            if widget.width <= 0 or widget.height <= 0:
+                continue
+            # 右端・下端は矩形に含まれない（x + width 未満）
+            first_col = int(widget.x // cell_size)
+            last_col = math.ceil((widget.x + widget.width) / cell_size) - 1
+            first_row = int(widget.y // cell_size)
+            last_row = math.ceil((widget.y + widget.height) / cell_size) - 1
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    cell = cells.get((col, row))
+                    if cell is None:
+                        cells[(col, row)] = [widget]
+                    else:
+                        cell.append(widget)
+        self._cells = cells
+
+    def candidates(self, rel_x: int, rel_y: int) -> List:
+        """ダイアログ相対座標を含む可能性のあるウィジェット（最前面が先頭）"""
+        cell_size = self.cell_size
+        return self._cells.get((rel_x // cell_size, rel_y // cell_size), ())
+
+    def widget_at(self, mx: int, my: int, dialog_x: int, dialog_y: int) -> Optional[object]:
+        """画面座標にある最前面のウィジェットを取得（無ければNone）"""
+        for widget in self.candidates(mx - dialog_x, my - dialog_y):
+            if widget.contains_point(mx, my):
+                return widget
+        return None
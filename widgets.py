@@ -1,7 +1,14 @@
 import pyxel
-import time
-from typing import List, Optional
+from bisect import bisect_left
+from collections.abc import Sequence
+from typing import Callable, List, Optional
 from system_settings import settings
+from dialog_input import TEXT_CHAR_KEYS, TEXT_INPUT_KEYS
+from list_search_index import ListSearchIndex
+from text_buffer import GapBuffer
+from debug_log import get_logger
+
+logger = get_logger("widgets")
 
 
 def resolve_color(color_value):
@@ -50,6 +57,13 @@ def resolve_color(color_value):
     # その他の場合は白をデフォルトに
     return pyxel.COLOR_WHITE
 
+def truncate_text(text, max_chars):
+    """表示できる文字数を超える文字列を切り詰めて末尾を "..." にする"""
+    if len(text) > max_chars:
+        return text[:max_chars-3] + "..."
+    return text
+
+
 class WidgetBase:
     """すべてのウィジェットの基底クラス"""
     def __init__(self, dialog, definition):
@@ -61,7 +75,89 @@ class WidgetBase:
         self.height = definition.get("height", 0)
         self.text = definition.get("text", "")
 
+    def invalidate(self):
+        """
+        再描画を要求する（保持モード描画用）
+
+        属性の代入は自動的に検出されるため、リストの要素を直接変更した場合など
+        属性の代入を伴わない変更の後にだけ呼び出せばよい。
+        """
+        self._revision = self.__dict__.get('_revision', 0) + 1
+
+    def draw_bounds(self):
+        """
+        draw() が描画する範囲（ダイアログ相対の x, y, width, height）
+
+        保持モード描画で再描画する範囲に使う。枠の外側1ピクセルと、
+        領域からはみ出すテキストを含める。
+        """
+        text_width = len(str(self.text)) * pyxel.FONT_WIDTH + 4
+        return (self.x - 1, self.y - 1,
+                max(self.width, text_width) + 2, max(self.height, pyxel.FONT_HEIGHT) + 2)
+
+    def clone(self, dialog):
+        """ウィジェットを複製して新しい親ダイアログに結び付ける"""
+        new_widget = self.__class__.__new__(self.__class__)
+        new_widget.reset_from(self, dialog)
+        return new_widget
+
+    def reset_from(self, prototype, dialog):
+        """
+        プロトタイプの状態に戻して親ダイアログに結び付ける
+
+        解決済みの属性はインスタンス辞書の浅いコピーで引き継ぐ。
+        イベントハンドラーなど後から追加された属性は破棄される。
+        変更可能な状態を持つサブクラスは、この関数をオーバーライドして個別にコピーする。
+        """
+        self.__dict__.clear()
+        self.__dict__.update(prototype.__dict__)
+        self.dialog = dialog
+
+    # 入力イベントの対象になるか（ヒットテストの対象）
+    interactive = False
+    # クリックでフォーカスを受け取るか
+    focusable = False
+    # フォーカス中に押下を調べるキー
+    input_keys = ()
+
+    def contains_point(self, mx, my):
+        """画面座標がウィジェットの領域内かどうか"""
+        x = self.dialog.x + self.x
+        y = self.dialog.y + self.y
+        return x <= mx < x + self.width and y <= my < y + self.height
+
+    # --- 入力イベント（Dialog が対象のウィジェットにだけ配送する） ---
+
+    def on_mouse_move(self, mx, my):
+        """マウスがウィジェット上にある間、毎フレーム呼ばれる"""
+        pass
+
+    def on_mouse_leave(self):
+        """マウスがウィジェットの外に出た時に呼ばれる"""
+        pass
+
+    def on_mouse_down(self, mx, my):
+        """ウィジェット上で左クリックされた時に呼ばれる"""
+        pass
+
+    def clear_click(self):
+        """クリックされた次のフレームで呼ばれる（押下状態の解除用）"""
+        pass
+
+    def on_focus(self):
+        """フォーカスを受け取った時に呼ばれる"""
+        pass
+
+    def on_blur(self):
+        """フォーカスを失った時に呼ばれる"""
+        pass
+
+    def on_key_down(self, key, shift):
+        """フォーカス中に input_keys のキーが押された時に呼ばれる"""
+        pass
+
     def update(self):
+        """フォーカス中のみ毎フレーム呼ばれる（カーソル点滅など時間経過の処理用）"""
         pass
 
     def draw(self):
@@ -80,9 +176,10 @@ class LabelWidget(WidgetBase):
         self.color = resolve_color(definition.get("color", "COLOR_BLACK"))
 
     def draw(self):
+        canvas = self.dialog.canvas
         # ダイアログの座標系に合わせて描画
         if self.text:  # テキストが空でない場合のみ描画
-            pyxel.text(self.dialog.x + self.x, self.dialog.y + self.y, self.text, self.color)
+            canvas.text(self.dialog.x + self.x, self.dialog.y + self.y, self.text, self.color)
 
 class ButtonWidget(WidgetBase):
     """クリック可能なボタンウィジェット"""
@@ -98,23 +195,25 @@ class ButtonWidget(WidgetBase):
         self.pressed_color = resolve_color(definition.get("pressed_color", "COLOR_DARK_BLUE"))
         self.border_color = resolve_color(definition.get("border_color", "COLOR_BLACK"))
 
-    def update(self):
-        # マウスカーソルがボタンの領域内にあるかチェック
-        mx, my = pyxel.mouse_x, pyxel.mouse_y
-        dx, dy = self.dialog.x, self.dialog.y
-        
-        self.is_hover = (dx + self.x <= mx < dx + self.x + self.width and
-                         dy + self.y <= my < dy + self.y + self.height)
+    interactive = True
 
-        # ホバー中に左クリックされたかチェック
-        if self.is_hover and pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-            self.is_pressed = True
-            # ここでコールバックなどを呼び出すことができる
-            print(f"Button '{self.id}' pressed!")
-        else:
-            self.is_pressed = False
+    def on_mouse_move(self, mx, my):
+        self.is_hover = True
+
+    def on_mouse_leave(self):
+        self.is_hover = False
+
+    def on_mouse_down(self, mx, my):
+        # is_pressed はクリックされたフレームの間だけTrueになる
+        self.is_pressed = True
+        # ここでコールバックなどを呼び出すことができる
+        logger.debug("Button '%s' pressed!", self.id)
+
+    def clear_click(self):
+        self.is_pressed = False
 
     def draw(self):
+        canvas = self.dialog.canvas
         dx, dy = self.dialog.x, self.dialog.y
         x, y = dx + self.x, dy + self.y
         
@@ -128,24 +227,32 @@ class ButtonWidget(WidgetBase):
             bg_color = self.hover_color
 
         # ボタンの描画
-        pyxel.rect(x, y, self.width, self.height, bg_color)
-        pyxel.rectb(x, y, self.width, self.height, self.border_color)
+        canvas.rect(x, y, self.width, self.height, bg_color)
+        canvas.rectb(x, y, self.width, self.height, self.border_color)
 
         # テキストを中央に配置
         text_x = x + (self.width - len(self.text) * pyxel.FONT_WIDTH) / 2
         text_y = y + (self.height - pyxel.FONT_HEIGHT) / 2
-        pyxel.text(text_x, text_y, self.text, text_color)
+        canvas.text(text_x, text_y, self.text, text_color)
 
 class TextBoxWidget(WidgetBase):
-    """テキスト入力が可能なテキストボックスウィジェット"""
+    """
+    テキスト入力が可能なテキストボックスウィジェット
+
+    テキストはギャップバッファ（text_buffer.GapBuffer）に保持し、カーソル位置での入力・削除では
+    文字列全体を作り直さない（数KBのテキストでも1文字の編集は償却 O(1)）。
+    text 属性は従来どおり文字列として読み書きでき、編集後に最初に読まれた時に組み立てる。
+    選択範囲は selection_anchor（起点）と cursor_pos の間で、Shift + 左右キーで広げる。
+    """
     def __init__(self, dialog, definition):
         super().__init__(dialog, definition)
         self.has_focus = False
         self.cursor_pos = len(self.text)
+        self.selection_anchor = None  # 選択範囲の起点（Noneで選択なし）
         self.cursor_visible = True
         self.cursor_blink_timer = 0
         self.cursor_blink_interval = 0.5
-        self.last_blink_time = time.time()
+        self.last_blink_time = self.dialog.backend.time()
         self.max_length = definition.get("max_length", 50)
         self.readonly = definition.get("readonly", False)
         
@@ -155,133 +262,276 @@ class TextBoxWidget(WidgetBase):
         if self.height == 0:
             self.height = 20
 
-    def update(self):
-        # マウスクリックでフォーカス取得
-        mx, my = pyxel.mouse_x, pyxel.mouse_y
-        dx, dy = self.dialog.x, self.dialog.y
-        
-        # フォーカス制御（読み取り専用の場合はフォーカスしない）
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-            if (dx + self.x <= mx < dx + self.x + self.width and
-                dy + self.y <= my < dy + self.y + self.height):
-                if not self.readonly:
-                    self.has_focus = True
-                    # クリック位置にカーソルを移動
-                    click_x = mx - (dx + self.x) - 4  # パディングを考慮
-                    char_index = max(0, min(click_x // 4, len(self.text)))  # 4は文字幅
-                    self.cursor_pos = char_index
-            else:
-                self.has_focus = False
+    def reset_from(self, prototype, dialog):
+        super().reset_from(prototype, dialog)
+        # バッファはプロトタイプと共有せず、同じテキストで作り直す
+        self._buffer = GapBuffer(prototype.text)
+        self._text = prototype.text
+        # カーソル点滅の基準時刻はリセット時点から開始
+        self.last_blink_time = self.dialog.backend.time()
+
+    @property
+    def text(self):
+        """テキスト全体の文字列（編集後に最初に読まれた時に組み立てる）"""
+        text = self._text
+        if text is None:
+            text = self._text = self._buffer.get_text()
+        return text
+
+    @text.setter
+    def text(self, value):
+        if value == self.__dict__.get('_text'):
+            return
+        self._buffer = GapBuffer(value)
+        self._text = value
+        # カーソルをテキストの範囲内に収め、選択を解除する
+        if self.__dict__.get('cursor_pos', 0) > len(value):
+            self.cursor_pos = len(value)
+        self.selection_anchor = None
+
+    def get_selection(self):
+        """選択範囲 (start, end) を取得（選択されていない場合はNone）"""
+        anchor = self.selection_anchor
+        if anchor is None or anchor == self.cursor_pos:
+            return None
+        return (min(anchor, self.cursor_pos), max(anchor, self.cursor_pos))
+
+    def set_selection(self, start: int, end: int):
+        """start から end までを選択する（カーソルは end に移動）"""
+        length = len(self._buffer)
+        self.selection_anchor = max(0, min(start, length))
+        self.cursor_pos = max(0, min(end, length))
+
+    def select_all(self):
+        """テキスト全体を選択する"""
+        self.set_selection(0, len(self._buffer))
+
+    def get_selected_text(self) -> str:
+        """選択範囲の文字列（選択されていない場合は空文字列）"""
+        selection = self.get_selection()
+        if selection is None:
+            return ""
+        return self._buffer.get_range(*selection)
+
+    def delete_selection(self) -> bool:
+        """選択範囲を削除する（選択されていない場合はFalse）"""
+        selection = self.get_selection()
+        if selection is None:
+            return False
+        self._delete(*selection)
+        return True
+
+    def insert_text(self, text: str):
+        """
+        カーソル位置に文字列を挿入する（貼り付け用。選択範囲は置き換える）
+
+        max_length を超える部分は切り捨てる。
+        """
+        self.delete_selection()
+        text = text[:max(0, self.max_length - len(self._buffer))]
+        if text:
+            self._insert(text)
 
+    def _insert(self, text):
+        """カーソル位置に挿入してカーソルを挿入した文字列の後ろに移動する"""
+        cursor = min(self.cursor_pos, len(self._buffer))
+        self._buffer.insert(cursor, text)
+        self._text = None
+        self.cursor_pos = cursor + len(text)
+        self.selection_anchor = None
+
+    def _delete(self, start, end):
+        """[start, end) を削除してカーソルを start に移動する"""
+        self._buffer.delete(start, end)
+        self._text = None
+        self.cursor_pos = start
+        self.selection_anchor = None
+
+    interactive = True
+
+    @property
+    def focusable(self):
+        # 読み取り専用の場合はフォーカスしない
+        return not self.readonly
+
+    @property
+    def input_keys(self):
+        return () if self.readonly else TEXT_INPUT_KEYS
+
+    def on_mouse_down(self, mx, my):
+        if self.readonly:
+            return
+        # クリック位置にカーソルを移動（選択は解除）
+        click_x = mx - (self.dialog.x + self.x) - 4  # パディングを考慮
+        char_index = max(0, min(click_x // 4, len(self._buffer)))  # 4は文字幅
+        self.cursor_pos = char_index
+        self.selection_anchor = None
+
+    def on_focus(self):
+        self.has_focus = True
+
+    def on_blur(self):
+        self.has_focus = False
+
+    def update(self):
         # カーソル点滅制御
         if self.has_focus:
-            current_time = time.time()
+            current_time = self.dialog.backend.time()
             if current_time - self.last_blink_time >= self.cursor_blink_interval:
                 self.cursor_visible = not self.cursor_visible
                 self.last_blink_time = current_time
 
-        # フォーカス中のキー入力処理（読み取り専用でない場合のみ）
-        if self.has_focus and not self.readonly:
-            self._handle_keyboard_input()
-
-    def _handle_keyboard_input(self):
-        """キーボード入力を処理"""
-        # Backspace処理
-        if pyxel.btnp(pyxel.KEY_BACKSPACE) and self.cursor_pos > 0:
-            self.text = self.text[:self.cursor_pos-1] + self.text[self.cursor_pos:]
-            self.cursor_pos -= 1
-            self.cursor_visible = True
-            self.last_blink_time = time.time()
-
-        # Delete処理  
-        if pyxel.btnp(pyxel.KEY_DELETE) and self.cursor_pos < len(self.text):
-            self.text = self.text[:self.cursor_pos] + self.text[self.cursor_pos+1:]
-            self.cursor_visible = True
-            self.last_blink_time = time.time()
-
-        # 左矢印キー
-        if pyxel.btnp(pyxel.KEY_LEFT) and self.cursor_pos > 0:
-            self.cursor_pos -= 1
-            self.cursor_visible = True
-            self.last_blink_time = time.time()
-
-        # 右矢印キー
-        if pyxel.btnp(pyxel.KEY_RIGHT) and self.cursor_pos < len(self.text):
-            self.cursor_pos += 1
-            self.cursor_visible = True
-            self.last_blink_time = time.time()
-
-        # 文字入力処理（英数字、記号）
-        for key in range(256):
-            if pyxel.btnp(key):
-                char = self._convert_key_to_char(key)
-                if char and len(self.text) < self.max_length:
-                    self.text = self.text[:self.cursor_pos] + char + self.text[self.cursor_pos:]
-                    self.cursor_pos += 1
-                    self.cursor_visible = True
-                    self.last_blink_time = time.time()
-
-    def _convert_key_to_char(self, key):
+    def on_key_down(self, key, shift):
+        """キーボード入力を処理（選択範囲がある場合、削除と文字入力は選択範囲に対して行う）"""
+        if self.readonly:
+            return
+
+        length = len(self._buffer)
+        cursor = min(self.cursor_pos, length)
+        selection = self.get_selection()
+        if key == pyxel.KEY_BACKSPACE:
+            if selection is not None:
+                self._delete(*selection)
+            elif cursor <= 0:
+                return
+            else:
+                self._delete(cursor - 1, cursor)
+        elif key == pyxel.KEY_DELETE:
+            if selection is not None:
+                self._delete(*selection)
+            elif cursor >= length:
+                return
+            else:
+                self._delete(cursor, cursor + 1)
+        elif key == pyxel.KEY_LEFT or key == pyxel.KEY_RIGHT:
+            if shift:
+                # Shift + 左右キー: 選択範囲を広げる・狭める
+                if self.selection_anchor is None:
+                    self.selection_anchor = cursor
+            elif selection is not None:
+                # 選択中は選択範囲の端にカーソルを移動して選択を解除する
+                self.cursor_pos = selection[0] if key == pyxel.KEY_LEFT else selection[1]
+                self.selection_anchor = None
+                self.cursor_visible = True
+                self.last_blink_time = self.dialog.backend.time()
+                return
+            if key == pyxel.KEY_LEFT:
+                if cursor <= 0:
+                    return
+                self.cursor_pos = cursor - 1
+            else:
+                if cursor >= length:
+                    return
+                self.cursor_pos = cursor + 1
+            if not shift:
+                self.selection_anchor = None
+        else:
+            # 文字入力処理（英数字、記号）
+            char = self._convert_key_to_char(key, shift)
+            if not char:
+                return
+            selected = selection[1] - selection[0] if selection is not None else 0
+            if length - selected >= self.max_length:
+                return
+            if selection is not None:
+                self._delete(*selection)
+            self._insert(char)
+
+        # 入力があった場合はカーソルを表示して点滅をやり直す
+        self.cursor_visible = True
+        self.last_blink_time = self.dialog.backend.time()
+
+    def _convert_key_to_char(self, key, shift=False):
         """キーコードを文字に変換"""
-        # 英字 (a-z)
-        if pyxel.KEY_A <= key <= pyxel.KEY_Z:
-            char = chr(ord('a') + (key - pyxel.KEY_A))
-            if pyxel.btn(pyxel.KEY_SHIFT):
-                return char.upper()
-            return char
-        
-        # 数字 (0-9)
-        if pyxel.KEY_0 <= key <= pyxel.KEY_9:
-            if pyxel.btn(pyxel.KEY_SHIFT):
-                # Shift+数字の記号
-                shift_symbols = ')!@#$%^&*('
-                return shift_symbols[key - pyxel.KEY_0]
-            return chr(ord('0') + (key - pyxel.KEY_0))
-        
-        # 基本的な記号
-        symbol_map = {
-            pyxel.KEY_SPACE: ' ',
-            pyxel.KEY_PERIOD: '.' if not pyxel.btn(pyxel.KEY_SHIFT) else '>',
-            pyxel.KEY_COMMA: ',' if not pyxel.btn(pyxel.KEY_SHIFT) else '<',
-            pyxel.KEY_MINUS: '-' if not pyxel.btn(pyxel.KEY_SHIFT) else '_',
-            pyxel.KEY_EQUALS: '=' if not pyxel.btn(pyxel.KEY_SHIFT) else '+',
-            pyxel.KEY_SLASH: '/' if not pyxel.btn(pyxel.KEY_SHIFT) else '?',
-            pyxel.KEY_SEMICOLON: ';' if not pyxel.btn(pyxel.KEY_SHIFT) else ':',
-            pyxel.KEY_QUOTE: "'" if not pyxel.btn(pyxel.KEY_SHIFT) else '"',
-            pyxel.KEY_LEFTBRACKET: '[' if not pyxel.btn(pyxel.KEY_SHIFT) else '{',
-            pyxel.KEY_RIGHTBRACKET: ']' if not pyxel.btn(pyxel.KEY_SHIFT) else '}',
-            pyxel.KEY_BACKSLASH: '\\' if not pyxel.btn(pyxel.KEY_SHIFT) else '|',
-            pyxel.KEY_BACKQUOTE: '`' if not pyxel.btn(pyxel.KEY_SHIFT) else '~',
-        }
-        
-        return symbol_map.get(key)
+        chars = TEXT_CHAR_KEYS.get(key)
+        if chars is None:
+            return None
+        return chars[1] if shift else chars[0]
 
     def draw(self):
+        canvas = self.dialog.canvas
         dx, dy = self.dialog.x, self.dialog.y
         x, y = dx + self.x, dy + self.y
         
         # テキストボックスの背景と枠
         bg_color = pyxel.COLOR_GRAY if self.readonly else pyxel.COLOR_WHITE
-        pyxel.rect(x, y, self.width, self.height, bg_color)
-        pyxel.rectb(x, y, self.width, self.height, pyxel.COLOR_BLACK)
+        canvas.rect(x, y, self.width, self.height, bg_color)
+        canvas.rectb(x, y, self.width, self.height, pyxel.COLOR_BLACK)
         
         # フォーカス時は青い枠（読み取り専用でない場合のみ）
         if self.has_focus and not self.readonly:
-            pyxel.rectb(x-1, y-1, self.width+2, self.height+2, pyxel.COLOR_LIGHT_BLUE)
+            canvas.rectb(x-1, y-1, self.width+2, self.height+2, pyxel.COLOR_LIGHT_BLUE)
         
         # テキスト描画
         text_x = x + 4  # 左パディング
         text_y = y + (self.height - pyxel.FONT_HEIGHT) // 2  # 垂直中央
-        pyxel.text(text_x, text_y, self.text, pyxel.COLOR_BLACK)  # 黒テキスト
+
+        # 選択範囲の背景
+        selection = self.get_selection()
+        if selection is not None:
+            start, end = selection
+            canvas.rect(text_x + start * 4, text_y - 1, (end - start) * 4, pyxel.FONT_HEIGHT + 2,
+                        pyxel.COLOR_LIGHT_BLUE)
+
+        canvas.text(text_x, text_y, self.text, pyxel.COLOR_BLACK)  # 黒テキスト
         
         # カーソル描画（フォーカス中かつ表示状態、読み取り専用でない場合のみ）
         if self.has_focus and self.cursor_visible and not self.readonly:
             cursor_x = text_x + self.cursor_pos * 4  # 4は文字幅
             cursor_y = y + 2
-            pyxel.line(cursor_x, cursor_y, cursor_x, cursor_y + self.height - 4, pyxel.COLOR_BLACK)  # 黒いカーソル
+            canvas.line(cursor_x, cursor_y, cursor_x, cursor_y + self.height - 4, pyxel.COLOR_BLACK)  # 黒いカーソル
+
+class VirtualListItems(Sequence):
+    """
+    仮想リストボックス用のアイテム列
+
+    件数と「インデックス -> 表示文字列」の関数だけを持ち、表示文字列は
+    描画などでアクセスされた行の分だけ生成する。生成した文字列は一定数までキャッシュする。
+    """
+    # キャッシュする表示文字列の最大数（表示行数より十分大きければよい）
+    CACHE_SIZE = 256
+
+    def __init__(self, count: int, provider: Callable[[int], str]):
+        self._count = count
+        self._provider = provider
+        self._cache = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("virtual list index out of range")
+
+        text = self._cache.get(index)
+        if text is None:
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            text = self._cache[index] = self._provider(index)
+        return text
+
+    def refresh(self):
+        """元データが変わった場合に、生成済みの表示文字列を破棄する"""
+        self._cache.clear()
+
+    def set_count(self, count: int):
+        """アイテム数を変更する（生成済みの表示文字列は破棄する）"""
+        self._count = count
+        self._cache.clear()
+
 
 class ListBoxWidget(WidgetBase):
     """複数項目から選択可能なリストボックスウィジェット"""
+
+    # タイプアヘッド: この時間（秒）キー入力が無ければ、入力した文字列をリセットする
+    TYPE_AHEAD_TIMEOUT = 1.0
+    # 切り詰め済みの表示文字列をキャッシュする最大数（表示行数より十分大きければよい）
+    TEXT_LAYOUT_CACHE_SIZE = 1024
+
     def __init__(self, dialog, definition):
         super().__init__(dialog, definition)
         self.items = []  # 表示項目のリスト
@@ -297,6 +547,21 @@ class ListBoxWidget(WidgetBase):
         
         # スクロールボタンホバー状態
         self.hovered_scroll_button = None  # "up5", "up1", "down1", "down5"
+
+        # 絞り込み（filter_text で始まるアイテムだけを表示）とタイプアヘッド
+        self.filter_text = ""
+        self._filtered_indexes = None  # 絞り込み中に表示するアイテムのインデックス（昇順）
+        self._search_index = None  # 前方一致検索用索引（最初の検索時に作成）
+        self._type_ahead_text = ""
+        self._type_ahead_time = 0
+
+        # 表示文字列のキャッシュ（アイテムのインデックス -> 幅に合わせて切り詰めた文字列）
+        # アイテムはリストや辞書でもよいため、アイテム自体はキーにしない
+        self._text_layout = {}
+        self._text_layout_width = None  # キャッシュを作成した時の幅（幅が変われば作り直す）
+        self._text_layout_items = None  # キャッシュを作成した時の items（置き換えられれば作り直す）
+        # 表示行の配置（背景の矩形と文字列の描画引数）。表示状態が変わった時だけ作り直す
+        self._row_layout = None
         
         # デフォルトサイズ設定
         if self.width == 0:
@@ -304,12 +569,178 @@ class ListBoxWidget(WidgetBase):
         if self.height == 0:
             self.height = 100
 
+    def reset_from(self, prototype, dialog):
+        super().reset_from(prototype, dialog)
+        self.items = list(prototype.items)
+        self._search_index = None
+        self._text_layout = {}
+        self._row_layout = None
+
     def set_items(self, items):
-        """リストアイテムを設定"""
+        """
+        リストアイテムを設定
+
+        リストのほか、len() とインデックスアクセスができるシーケンスも指定できる
+        （コピーはしない）。
+        """
         self.items = items
         self.selected_index = -1
         self.scroll_offset = 0
         self.hover_index = -1
+        self._search_index = None
+        self._text_layout = {}
+        self._row_layout = None
+        # 絞り込み中の場合は新しいアイテムにも適用する
+        if self.filter_text:
+            self._apply_filter()
+
+    def set_virtual_items(self, count: int, provider: Callable[[int], str]):
+        """
+        仮想モードでアイテムを設定
+
+        表示文字列のリストを作らず、表示範囲の行だけ provider(index) で生成する。
+        数万〜数十万件のリストでも、メモリ使用量とスクロール・描画の時間は件数に依存しない。
+
+        Args:
+            count: アイテム数
+            provider: インデックスから表示文字列を返す関数
+        """
+        self.set_items(VirtualListItems(count, provider))
+
+    def set_virtual_count(self, count: int):
+        """
+        仮想モードのアイテム数を変更（選択とスクロール位置は維持する）
+
+        読み込み中のリストに行を追加する場合などに使用する。表示文字列は provider から生成し直す。
+        """
+        self.items.set_count(count)
+        if self.selected_index >= count:
+            self.selected_index = -1
+        if self.hover_index >= count:
+            self.hover_index = -1
+        self.refresh_items()
+        max_scroll = max(0, self.get_row_count() - self.visible_items)
+        self.scroll_offset = min(self.scroll_offset, max_scroll)
+
+    def refresh_items(self):
+        """
+        アイテムの内容を直接変更した後に呼び出す
+
+        仮想モードの生成済みの表示文字列と検索用索引、表示行の配置を破棄し、絞り込みを再適用する。
+        """
+        if isinstance(self.items, VirtualListItems):
+            self.items.refresh()
+        self._search_index = None
+        self._text_layout = {}
+        self._row_layout = None
+        if self.filter_text:
+            self._apply_filter()
+        self.invalidate()
+
+    def get_row_count(self) -> int:
+        """表示対象のアイテム数（絞り込み中は一致したアイテムの数）"""
+        if self._filtered_indexes is None:
+            return len(self.items)
+        return len(self._filtered_indexes)
+
+    def _row_to_index(self, row: int) -> int:
+        """表示行の番号をアイテムのインデックスに変換"""
+        if self._filtered_indexes is None:
+            return row
+        return self._filtered_indexes[row]
+
+    def _index_to_row(self, index: int) -> int:
+        """アイテムのインデックスを表示行の番号に変換（絞り込みで表示されていない場合は-1）"""
+        if self._filtered_indexes is None:
+            return index if 0 <= index < len(self.items) else -1
+        row = bisect_left(self._filtered_indexes, index)
+        if row < len(self._filtered_indexes) and self._filtered_indexes[row] == index:
+            return row
+        return -1
+
+    def get_search_index(self) -> ListSearchIndex:
+        """前方一致検索用索引を取得（アイテムが変わっていなければ作成済みの索引を使う）"""
+        search_index = self._search_index
+        if search_index is None or not search_index.is_current(self.items):
+            search_index = self._search_index = ListSearchIndex(self.items)
+        return search_index
+
+    def find_prefix(self, prefix: str) -> int:
+        """
+        表示文字列が prefix で始まるアイテムを検索（大文字小文字は区別しない）
+
+        絞り込み中は表示されているアイテムだけが対象。
+
+        Returns:
+            int: 一致したアイテムのうち表示文字列が最も小さいもののインデックス（無ければ-1）
+        """
+        prefix = prefix.lower()
+        filter_text = self.filter_text.lower()
+        # 絞り込みも前方一致なので、両方を満たすのは長い方の文字列で始まるアイテム
+        if filter_text:
+            if prefix.startswith(filter_text):
+                pass
+            elif filter_text.startswith(prefix):
+                prefix = filter_text
+            else:
+                return -1
+        return self.get_search_index().find_first(prefix)
+
+    def select_item(self, index: int):
+        """アイテムを選択して表示範囲までスクロールする（選択が変われば on_selection_changed を発火）"""
+        old_selection = self.selected_index
+        self.selected_index = index
+        self.scroll_to_item(index)
+        if old_selection != index and hasattr(self, 'on_selection_changed'):
+            self.on_selection_changed(index)
+
+    def set_filter(self, prefix: str):
+        """
+        表示文字列が prefix で始まるアイテムだけを表示する（空文字列で解除）
+
+        selected_index などのインデックスは絞り込み中も元のアイテムのインデックスのまま。
+        選択中のアイテムが表示されなくなった場合は選択を解除し、on_selection_changed(-1) を発火する。
+        """
+        prefix = prefix or ""
+        if prefix == self.filter_text:
+            return
+        self.filter_text = prefix
+        self._apply_filter()
+
+    def _apply_filter(self):
+        """filter_text に一致するアイテムで表示行を作り直す"""
+        if self.filter_text:
+            self._filtered_indexes = self.get_search_index().matching_indexes(self.filter_text)
+        else:
+            self._filtered_indexes = None
+        self.scroll_offset = 0
+        self.hover_index = -1
+        if self._index_to_row(self.selected_index) < 0:
+            # 選択中のアイテムが表示されなくなった場合は選択を解除（select_item() と同じく発火）
+            if self.selected_index != -1:
+                self.selected_index = -1
+                if hasattr(self, 'on_selection_changed'):
+                    self.on_selection_changed(-1)
+        else:
+            self.scroll_to_item(self.selected_index)
+
+    # タイプアヘッド: フォーカス中に文字キーを押すと、その文字列で始まるアイテムを選択する
+    focusable = True
+    input_keys = tuple(sorted(TEXT_CHAR_KEYS))
+
+    def on_key_down(self, key, shift):
+        chars = TEXT_CHAR_KEYS.get(key)
+        if chars is None:
+            return
+        current_time = self.dialog.backend.time()
+        if current_time - self._type_ahead_time > self.TYPE_AHEAD_TIMEOUT:
+            self._type_ahead_text = ""
+        self._type_ahead_text += chars[1] if shift else chars[0]
+        self._type_ahead_time = current_time
+
+        index = self.find_prefix(self._type_ahead_text)
+        if index >= 0:
+            self.select_item(index)
 
     def get_selected_item(self):
         """選択されたアイテムを取得"""
@@ -317,124 +748,133 @@ class ListBoxWidget(WidgetBase):
             return self.items[self.selected_index]
         return None
 
-    def update(self):
-        # マウス位置チェック
-        mx, my = pyxel.mouse_x, pyxel.mouse_y
+    interactive = True
+
+    def _scroll_button_at(self, mx, my):
+        """座標にあるスクロールボタン（"up5", "up1", "down1", "down5"）を取得"""
+        # スクロールボタンは項目数が表示可能数を超える場合のみ表示
+        if self.get_row_count() <= self.visible_items:
+            return None
+
+        button_width = 16
+        button_height = 14
         dx, dy = self.dialog.x, self.dialog.y
-        
-        # スクロールボタンの処理（項目数が表示可能数を超える場合）
-        if len(self.items) > self.visible_items:
-            button_width = 16
-            button_height = 14
-            scroll_area_x = dx + self.x + self.width - button_width
-            
-            # 4つのボタンの位置を計算
-            up5_button_y = dy + self.y
-            up1_button_y = up5_button_y + button_height
-            down1_button_y = dy + self.y + self.height - button_height * 2
-            down5_button_y = dy + self.y + self.height - button_height
-            
-            # ホバー状態とクリック処理
-            self.hovered_scroll_button = None
-            
-            # 上5行ボタン
-            if (scroll_area_x <= mx < scroll_area_x + button_width and
-                up5_button_y <= my < up5_button_y + button_height):
-                self.hovered_scroll_button = "up5"
-                if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-                    self.scroll_up_fast()
-                    return
-            
-            # 上1行ボタン
-            elif (scroll_area_x <= mx < scroll_area_x + button_width and
-                up1_button_y <= my < up1_button_y + button_height):
-                self.hovered_scroll_button = "up1"
-                if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-                    self.scroll_up()
-                    return
-            
-            # 下1行ボタン
-            elif (scroll_area_x <= mx < scroll_area_x + button_width and
-                down1_button_y <= my < down1_button_y + button_height):
-                self.hovered_scroll_button = "down1"
-                if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-                    self.scroll_down()
-                    return
-            
-            # 下5行ボタン
-            elif (scroll_area_x <= mx < scroll_area_x + button_width and
-                down5_button_y <= my < down5_button_y + button_height):
-                self.hovered_scroll_button = "down5"
-                if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-                    self.scroll_down_fast()
-                    return
-        
-        # リストボックス内でのマウス処理（スクロールボタン領域を除く）
-        list_width = self.width - (16 if len(self.items) > self.visible_items else 0)
-        if (dx + self.x <= mx < dx + self.x + list_width and
-            dy + self.y <= my < dy + self.y + self.height):
-            
-            # リスト内でのマウス位置を計算
-            list_y = my - (dy + self.y + 2)  # パディングを考慮
-            item_index = list_y // self.item_height + self.scroll_offset
-            
-            if 0 <= item_index < len(self.items):
-                self.hover_index = item_index
-                
-                # クリックで選択
-                if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-                    current_time = time.time()
-                    is_double_click = False
-                    
-                    # ダブルクリック判定
-                    if (self.last_clicked_index == item_index and 
-                        current_time - self.last_click_time < settings.get_double_click_interval()):
-                        is_double_click = True
-                    
-                    # 選択処理
-                    old_selection = self.selected_index
-                    self.selected_index = item_index
-                    
-                    # クリックモードに応じて処理を分岐
-                    if settings.is_single_click_mode():
-                        # シングルクリックモード: 即座にアクション実行
-                        print(f"Single-click selected: {self.items[item_index]}")
-                        if hasattr(self, 'on_item_activated'):
-                            self.on_item_activated(self.selected_index)
-                        
-                        # 選択変更イベントも発火
-                        if old_selection != self.selected_index and hasattr(self, 'on_selection_changed'):
-                            self.on_selection_changed(self.selected_index)
-                    
-                    else:  # ダブルクリックモード
-                        if is_double_click:
-                            # ダブルクリック: アクション実行
-                            print(f"Double-click activated: {self.items[item_index]}")
-                            if hasattr(self, 'on_item_activated'):
-                                self.on_item_activated(self.selected_index)
-                        else:
-                            # シングルクリック: 選択のみ
-                            print(f"Selected item: {self.items[item_index]}")
-                            if old_selection != self.selected_index and hasattr(self, 'on_selection_changed'):
-                                self.on_selection_changed(self.selected_index)
-                    
-                    # ダブルクリック検出用の状態更新
-                    self.last_click_time = current_time
-                    self.last_clicked_index = item_index
+        scroll_area_x = dx + self.x + self.width - button_width
+        if not scroll_area_x <= mx < scroll_area_x + button_width:
+            return None
+
+        # 4つのボタンの位置を計算
+        up5_button_y = dy + self.y
+        up1_button_y = up5_button_y + button_height
+        down1_button_y = dy + self.y + self.height - button_height * 2
+        down5_button_y = dy + self.y + self.height - button_height
+
+        if up5_button_y <= my < up5_button_y + button_height:
+            return "up5"
+        if up1_button_y <= my < up1_button_y + button_height:
+            return "up1"
+        if down1_button_y <= my < down1_button_y + button_height:
+            return "down1"
+        if down5_button_y <= my < down5_button_y + button_height:
+            return "down5"
+        return None
+
+    def _item_at(self, mx, my):
+        """座標にあるアイテムのインデックスを取得（スクロールボタン領域を除く、無ければ-1）"""
+        dx, dy = self.dialog.x, self.dialog.y
+        row_count = self.get_row_count()
+        list_width = self.width - (16 if row_count > self.visible_items else 0)
+        if not (dx + self.x <= mx < dx + self.x + list_width and
+                dy + self.y <= my < dy + self.y + self.height):
+            return -1
+
+        # リスト内でのマウス位置を計算
+        list_y = my - (dy + self.y + 2)  # パディングを考慮
+        row = list_y // self.item_height + self.scroll_offset
+        if 0 <= row < row_count:
+            return self._row_to_index(row)
+        return -1
+
+    def on_mouse_move(self, mx, my):
+        self.hovered_scroll_button = self._scroll_button_at(mx, my)
+        self.hover_index = -1 if self.hovered_scroll_button else self._item_at(mx, my)
+
+    def on_mouse_leave(self):
+        self.hovered_scroll_button = None
+        self.hover_index = -1
+
+    def on_mouse_down(self, mx, my):
+        # スクロールボタンの処理
+        scroll_button = self._scroll_button_at(mx, my)
+        if scroll_button == "up5":
+            self.scroll_up_fast()
+            return
+        if scroll_button == "up1":
+            self.scroll_up()
+            return
+        if scroll_button == "down1":
+            self.scroll_down()
+            return
+        if scroll_button == "down5":
+            self.scroll_down_fast()
+            return
+
+        # クリックで選択
+        item_index = self._item_at(mx, my)
+        if item_index < 0:
+            return
+
+        current_time = self.dialog.backend.time()
+        is_double_click = False
+
+        # ダブルクリック判定
+        if (self.last_clicked_index == item_index and 
+            current_time - self.last_click_time < settings.get_double_click_interval()):
+            is_double_click = True
+
+        # 選択処理
+        old_selection = self.selected_index
+        self.selected_index = item_index
+
+        # クリックモードに応じて処理を分岐
+        if settings.is_single_click_mode():
+            # シングルクリックモード: 即座にアクション実行
+            logger.debug("Single-click selected: %s", self.items[item_index])
+            if hasattr(self, 'on_item_activated'):
+                self.on_item_activated(self.selected_index)
+
+            # 選択変更イベントも発火
+            if old_selection != self.selected_index and hasattr(self, 'on_selection_changed'):
+                self.on_selection_changed(self.selected_index)
+
+        else:  # ダブルクリックモード
+            if is_double_click:
+                # ダブルクリック: アクション実行
+                logger.debug("Double-click activated: %s", self.items[item_index])
+                if hasattr(self, 'on_item_activated'):
+                    self.on_item_activated(self.selected_index)
             else:
-                self.hover_index = -1
-        else:
-            self.hover_index = -1
+                # シングルクリック: 選択のみ
+                logger.debug("Selected item: %s", self.items[item_index])
+                if old_selection != self.selected_index and hasattr(self, 'on_selection_changed'):
+                    self.on_selection_changed(self.selected_index)
+
+        # ダブルクリック検出用の状態更新
+        self.last_click_time = current_time
+        self.last_clicked_index = item_index
 
     def scroll_to_item(self, index):
         """指定されたアイテムが見えるようにスクロール"""
-        if index < self.scroll_offset:
-            self.scroll_offset = index
-        elif index >= self.scroll_offset + self.visible_items:
-            self.scroll_offset = index - self.visible_items + 1
+        row = self._index_to_row(index)
+        if row < 0:
+            return
+        if row < self.scroll_offset:
+            self.scroll_offset = row
+        elif row >= self.scroll_offset + self.visible_items:
+            self.scroll_offset = row - self.visible_items + 1
         
         # スクロール範囲制限
-        max_scroll = max(0, len(self.items) - self.visible_items)
+        max_scroll = max(0, self.get_row_count() - self.visible_items)
         self.scroll_offset = max(0, min(self.scroll_offset, max_scroll))
 
     def scroll_up(self):
@@ -444,7 +884,7 @@ class ListBoxWidget(WidgetBase):
 
     def scroll_down(self):
         """下にスクロール"""
-        max_scroll = max(0, len(self.items) - self.visible_items)
+        max_scroll = max(0, self.get_row_count() - self.visible_items)
         if self.scroll_offset < max_scroll:
             self.scroll_offset += 1
 
@@ -454,49 +894,88 @@ class ListBoxWidget(WidgetBase):
 
     def scroll_down_fast(self):
         """下に5行スクロール"""
-        max_scroll = max(0, len(self.items) - self.visible_items)
+        max_scroll = max(0, self.get_row_count() - self.visible_items)
         self.scroll_offset = min(max_scroll, self.scroll_offset + 5)
 
     def draw(self):
+        canvas = self.dialog.canvas
         dx, dy = self.dialog.x, self.dialog.y
         x, y = dx + self.x, dy + self.y
         
         # リストボックスの背景と枠
-        pyxel.rect(x, y, self.width, self.height, pyxel.COLOR_WHITE)
-        pyxel.rectb(x, y, self.width, self.height, pyxel.COLOR_BLACK)
-        
-        # 項目を描画
-        for i in range(self.visible_items):
-            item_index = i + self.scroll_offset
-            if item_index >= len(self.items):
-                break
-                
-            item_y = y + 2 + i * self.item_height
-            item = self.items[item_index]
+        canvas.rect(x, y, self.width, self.height, pyxel.COLOR_WHITE)
+        canvas.rectb(x, y, self.width, self.height, pyxel.COLOR_BLACK)
+        
+        # 表示行の配置は、スクロール・選択・ホバー・位置・サイズ・アイテムが変わった時だけ作り直す
+        # （変わっていなければ、前回計算した引数で描画命令を呼ぶだけ）
+        layout_key = (x, y, self.width, self.item_height, self.visible_items, self.scroll_offset,
+                      self.selected_index, self.hover_index, len(self.items), self.items, self._filtered_indexes)
+        row_layout = self._row_layout
+        if row_layout is None or row_layout[0] != layout_key:
+            row_layout = self._row_layout = (layout_key,) + self._layout_rows(x, y)
+        _, backgrounds, texts, has_scroll_buttons = row_layout
+
+        # 選択状態・ホバー中の行の背景と、アイテムテキスト
+        for args in backgrounds:
+            canvas.rect(*args)
+        for args in texts:
+            canvas.text(*args)
+        
+        # 上下スクロールボタン表示（項目数が表示可能数を超える場合）
+        if has_scroll_buttons:
+            self._draw_scroll_buttons(x, y)
+
+    def _layout_rows(self, x, y):
+        """
+        表示行の配置を計算する
+
+        Returns:
+            tuple: (背景の rect() の引数のリスト, text() の引数のリスト, スクロールボタンを表示するか)
+        """
+        # 切り詰め済みの表示文字列（幅が変わった場合、items が直接置き換えられた場合は作り直す）
+        text_layout = self._text_layout
+        if self._text_layout_width != self.width or self._text_layout_items is not self.items:
+            text_layout = self._text_layout = {}
+            self._text_layout_width = self.width
+            self._text_layout_items = self.items
+        max_chars = (self.width - 8) // 4  # 4は文字幅
+
+        backgrounds = []
+        texts = []
+        items = self.items
+        filtered_indexes = self._filtered_indexes
+        item_height = self.item_height
+        selected_index = self.selected_index
+        hover_index = self.hover_index
+        row_count = self.get_row_count()
+        first_row = self.scroll_offset
+        for i, row in enumerate(range(first_row, min(first_row + self.visible_items, row_count))):
+            item_index = row if filtered_indexes is None else filtered_indexes[row]
+            item_y = y + 2 + i * item_height
+            item = items[item_index]
             
             # 選択状態の背景
-            if item_index == self.selected_index:
-                pyxel.rect(x + 1, item_y, self.width - 2, self.item_height, pyxel.COLOR_NAVY)
-            elif item_index == self.hover_index:
-                pyxel.rect(x + 1, item_y, self.width - 2, self.item_height, pyxel.COLOR_LIGHT_BLUE)
+            if item_index == selected_index:
+                backgrounds.append((x + 1, item_y, self.width - 2, item_height, pyxel.COLOR_NAVY))
+            elif item_index == hover_index:
+                backgrounds.append((x + 1, item_y, self.width - 2, item_height, pyxel.COLOR_LIGHT_BLUE))
             
-            # アイテムテキスト描画
-            text_color = pyxel.COLOR_WHITE if item_index == self.selected_index else pyxel.COLOR_BLACK
+            # アイテムテキスト
+            text_color = pyxel.COLOR_WHITE if item_index == selected_index else pyxel.COLOR_BLACK
             
-            # テキストが長すぎる場合は切り詰め
-            display_text = str(item)
-            max_chars = (self.width - 8) // 4  # 4は文字幅
-            if len(display_text) > max_chars:
-                display_text = display_text[:max_chars-3] + "..."
+            # テキストが長すぎる場合は切り詰め（切り詰めた文字列はインデックスごとにキャッシュ）
+            display_text = text_layout.get(item_index)
+            if display_text is None:
+                if len(text_layout) >= self.TEXT_LAYOUT_CACHE_SIZE:
+                    text_layout.clear()
+                display_text = text_layout[item_index] = truncate_text(str(item), max_chars)
             
-            pyxel.text(x + 4, item_y + 2, display_text, text_color)
-        
-        # 上下スクロールボタン表示（項目数が表示可能数を超える場合）
-        if len(self.items) > self.visible_items:
-            self._draw_scroll_buttons(x, y)
+            texts.append((x + 4, item_y + 2, display_text, text_color))
+        return backgrounds, texts, row_count > self.visible_items
 
     def _draw_scroll_buttons(self, x, y):
         """スクロールボタンを描画"""
+        canvas = self.dialog.canvas
         button_width = 16
         button_height = 14
         button_x = x + self.width - button_width
@@ -509,40 +988,42 @@ class ListBoxWidget(WidgetBase):
         
         # 上5行ボタン（二重上矢印）
         bg_color = pyxel.COLOR_LIGHT_BLUE if self.hovered_scroll_button == "up5" else pyxel.COLOR_WHITE
-        pyxel.rect(button_x, up5_button_y, button_width, button_height, bg_color)
-        pyxel.rectb(button_x, up5_button_y, button_width, button_height, pyxel.COLOR_BLACK)
+        canvas.rect(button_x, up5_button_y, button_width, button_height, bg_color)
+        canvas.rectb(button_x, up5_button_y, button_width, button_height, pyxel.COLOR_BLACK)
         self._draw_double_up_arrow(button_x + 8, up5_button_y + 7)
         
         # 上1行ボタン（単一上矢印）
         bg_color = pyxel.COLOR_LIGHT_BLUE if self.hovered_scroll_button == "up1" else pyxel.COLOR_WHITE
-        pyxel.rect(button_x, up1_button_y, button_width, button_height, bg_color)
-        pyxel.rectb(button_x, up1_button_y, button_width, button_height, pyxel.COLOR_BLACK)
+        canvas.rect(button_x, up1_button_y, button_width, button_height, bg_color)
+        canvas.rectb(button_x, up1_button_y, button_width, button_height, pyxel.COLOR_BLACK)
         self._draw_up_arrow(button_x + 8, up1_button_y + 7)
         
         # 下1行ボタン（単一下矢印）
         bg_color = pyxel.COLOR_LIGHT_BLUE if self.hovered_scroll_button == "down1" else pyxel.COLOR_WHITE
-        pyxel.rect(button_x, down1_button_y, button_width, button_height, bg_color)
-        pyxel.rectb(button_x, down1_button_y, button_width, button_height, pyxel.COLOR_BLACK)
+        canvas.rect(button_x, down1_button_y, button_width, button_height, bg_color)
+        canvas.rectb(button_x, down1_button_y, button_width, button_height, pyxel.COLOR_BLACK)
         self._draw_down_arrow(button_x + 8, down1_button_y + 7)
         
         # 下5行ボタン（二重下矢印）
         bg_color = pyxel.COLOR_LIGHT_BLUE if self.hovered_scroll_button == "down5" else pyxel.COLOR_WHITE
-        pyxel.rect(button_x, down5_button_y, button_width, button_height, bg_color)
-        pyxel.rectb(button_x, down5_button_y, button_width, button_height, pyxel.COLOR_BLACK)
+        canvas.rect(button_x, down5_button_y, button_width, button_height, bg_color)
+        canvas.rectb(button_x, down5_button_y, button_width, button_height, pyxel.COLOR_BLACK)
         self._draw_double_down_arrow(button_x + 8, down5_button_y + 7)
 
     def _draw_up_arrow(self, cx, cy):
         """上向き矢印を描画（中心座標指定）"""
+        canvas = self.dialog.canvas
         # 塗りつぶし三角形: 上向き
-        pyxel.tri(cx, cy - 3,           # 上頂点
+        canvas.tri(cx, cy - 3,           # 上頂点
                   cx - 3, cy + 1,       # 左下
                   cx + 3, cy + 1,       # 右下
                   pyxel.COLOR_BLACK)
 
     def _draw_down_arrow(self, cx, cy):
         """下向き矢印を描画（中心座標指定）"""
+        canvas = self.dialog.canvas
         # 塗りつぶし三角形: 下向き
-        pyxel.tri(cx - 3, cy - 1,       # 左上
+        canvas.tri(cx - 3, cy - 1,       # 左上
                   cx + 3, cy - 1,       # 右上
                   cx, cy + 3,           # 下頂点
                   pyxel.COLOR_BLACK)
@@ -578,9 +1059,18 @@ class DropdownWidget(WidgetBase):
         # ドロップダウンリストの高さを計算
         visible_items = min(len(self.items), self.max_visible_items)
         self.dropdown_height = visible_items * self.item_height
+
+        # 表示文字列の配置のキャッシュ
+        self._button_layout = None  # (表示テキスト, 幅, 切り詰めた文字列)
+        self._list_layout = None  # (表示状態, 背景の rect() の引数のリスト, text() の引数のリスト)
         
         # イベントハンドラー（動的属性システム）
         # hasattr パターンでイベントハンドラーを実装
+
+    def reset_from(self, prototype, dialog):
+        super().reset_from(prototype, dialog)
+        self._button_layout = None
+        self._list_layout = None
         
     def get_selected_value(self) -> Optional[str]:
         """現在選択されている値を取得"""
@@ -594,35 +1084,51 @@ class DropdownWidget(WidgetBase):
             return self.items[self.selected_index]
         return "Select..." if self.items else "No items"
     
-    def update(self):
-        """マウス操作の処理"""
-        mx, my = pyxel.mouse_x, pyxel.mouse_y
-        dx, dy = self.dialog.x, self.dialog.y
-        
-        # ドロップダウンボタンの範囲チェック
-        button_x = dx + self.x
-        button_y = dy + self.y
-        
-        self.is_hover = (button_x <= mx < button_x + self.width and 
-                        button_y <= my < button_y + self.height)
-        
+    interactive = True
+    # 開いている間はフォーカスを持ち、フォーカスを失うと閉じる
+    focusable = True
+
+    def contains_point(self, mx, my):
+        """ボタンの領域と、開いている場合はドロップダウンリストの領域"""
+        if super().contains_point(mx, my):
+            return True
+        if not self.is_open:
+            return False
+        list_x = self.dialog.x + self.x
+        list_y = self.dialog.y + self.y + self.height
+        return (list_x <= mx < list_x + self.width and
+                list_y <= my < list_y + self.dropdown_height)
+
+    def _is_over_button(self, mx, my):
+        """ドロップダウンボタンの範囲チェック"""
+        return super().contains_point(mx, my)
+
+    def on_mouse_move(self, mx, my):
+        self.is_hover = self._is_over_button(mx, my)
+
         # ドロップダウンリストが開いている場合の処理
         if self.is_open:
-            self._update_dropdown_list(mx, my, dx, dy)
-        
-        # クリック処理
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-            if self.is_hover:
-                # ボタンクリック: ドロップダウンを開く/閉じる
-                self.is_open = not self.is_open
-                if self.is_open:
-                    self.hover_item_index = self.selected_index
-            elif self.is_open:
-                # ドロップダウンリスト内のクリック処理
-                self._handle_dropdown_click(mx, my, dx, dy)
-            else:
-                # 外部クリック: ドロップダウンを閉じる
-                self.is_open = False
+            self._update_dropdown_list(mx, my, self.dialog.x, self.dialog.y)
+
+    def on_mouse_leave(self):
+        self.is_hover = False
+        if self.is_open:
+            self.hover_item_index = -1
+
+    def on_mouse_down(self, mx, my):
+        """クリック処理"""
+        if self._is_over_button(mx, my):
+            # ボタンクリック: ドロップダウンを開く/閉じる
+            self.is_open = not self.is_open
+            if self.is_open:
+                self.hover_item_index = self.selected_index
+        elif self.is_open:
+            # ドロップダウンリスト内のクリック処理
+            self._handle_dropdown_click(mx, my, self.dialog.x, self.dialog.y)
+
+    def on_blur(self):
+        # 外部クリック: ドロップダウンを閉じる
+        self.is_open = False
     
     def _update_dropdown_list(self, mx, my, dx, dy):
         """ドロップダウンリスト内のマウス処理"""
@@ -660,10 +1166,11 @@ class DropdownWidget(WidgetBase):
                 
                 # イベント発火（動的属性システム）
                 if hasattr(self, 'on_selection_changed'):
-                    print(f"[DEBUG] DropdownWidget: Firing on_selection_changed event: index={self.selected_index}, value='{self.get_selected_value()}'")
+                    logger.debug("DropdownWidget: Firing on_selection_changed event: index=%d, value='%s'",
+                                 self.selected_index, self.get_selected_value())
                     self.on_selection_changed(self.selected_index, self.get_selected_value())
                 else:
-                    print(f"[DEBUG] DropdownWidget: No on_selection_changed handler found")
+                    logger.debug("DropdownWidget: No on_selection_changed handler found")
                 
                 # ドロップダウンを閉じる
                 self.is_open = False
@@ -684,6 +1191,7 @@ class DropdownWidget(WidgetBase):
     
     def _draw_button(self, dx, dy):
         """ドロップダウンボタンの描画"""
+        canvas = self.dialog.canvas
         x = dx + self.x
         y = dy + self.y
         
@@ -691,20 +1199,23 @@ class DropdownWidget(WidgetBase):
         bg_color = pyxel.COLOR_LIGHT_BLUE if self.is_hover else pyxel.COLOR_WHITE
         
         # ボタン背景
-        pyxel.rect(x, y, self.width, self.height, bg_color)
-        pyxel.rectb(x, y, self.width, self.height, pyxel.COLOR_BLACK)
+        canvas.rect(x, y, self.width, self.height, bg_color)
+        canvas.rectb(x, y, self.width, self.height, pyxel.COLOR_BLACK)
         
         # テキスト表示
         display_text = self.get_display_text()
         text_x = x + 2
         text_y = y + (self.height - pyxel.FONT_HEIGHT) // 2
         
-        # テキストが長すぎる場合は切り詰め
-        max_chars = (self.width - 20) // pyxel.FONT_WIDTH
-        if len(display_text) > max_chars:
-            display_text = display_text[:max_chars-3] + "..."
+        # テキストが長すぎる場合は切り詰め（表示テキストと幅が変わった時だけ切り詰め直す）
+        button_layout = self._button_layout
+        if (button_layout is None or button_layout[0] is not display_text or
+                button_layout[1] != self.width):
+            max_chars = (self.width - 20) // pyxel.FONT_WIDTH
+            button_layout = self._button_layout = (display_text, self.width,
+                                                   truncate_text(display_text, max_chars))
             
-        pyxel.text(text_x, text_y, display_text, pyxel.COLOR_BLACK)
+        canvas.text(text_x, text_y, button_layout[2], pyxel.COLOR_BLACK)
         
         # ドロップダウン矢印の描画
         arrow_x = x + self.width - 12
@@ -712,52 +1223,67 @@ class DropdownWidget(WidgetBase):
         
         if self.is_open:
             # 上向き矢印（閉じる）
-            pyxel.tri(arrow_x, arrow_y - 2,
+            canvas.tri(arrow_x, arrow_y - 2,
                      arrow_x - 3, arrow_y + 2,
                      arrow_x + 3, arrow_y + 2,
                      pyxel.COLOR_BLACK)
         else:
             # 下向き矢印（開く）
-            pyxel.tri(arrow_x - 3, arrow_y - 2,
+            canvas.tri(arrow_x - 3, arrow_y - 2,
                      arrow_x + 3, arrow_y - 2,
                      arrow_x, arrow_y + 2,
                      pyxel.COLOR_BLACK)
     
     def _draw_dropdown_list(self, dx, dy):
         """ドロップダウンリストの描画"""
+        canvas = self.dialog.canvas
         list_x = dx + self.x
         list_y = dy + self.y + self.height
         
         # リスト背景
-        pyxel.rect(list_x, list_y, self.width, self.dropdown_height, pyxel.COLOR_WHITE)
-        pyxel.rectb(list_x, list_y, self.width, self.dropdown_height, pyxel.COLOR_BLACK)
-        
-        # 各アイテムの描画
+        canvas.rect(list_x, list_y, self.width, self.dropdown_height, pyxel.COLOR_WHITE)
+        canvas.rectb(list_x, list_y, self.width, self.dropdown_height, pyxel.COLOR_BLACK)
+        
+        # 各アイテムの配置は、位置・サイズ・選択・ホバー・項目が変わった時だけ作り直す
+        layout_key = (list_x, list_y, self.width, self.item_height, self.max_visible_items,
+                      self.selected_index, self.hover_item_index, self.items)
+        list_layout = self._list_layout
+        if list_layout is None or list_layout[0] != layout_key:
+            list_layout = self._list_layout = (layout_key,) + self._layout_list_items(list_x, list_y)
+
+        # 各アイテムの背景とテキストを描画
+        for args in list_layout[1]:
+            canvas.rect(*args)
+        for args in list_layout[2]:
+            canvas.text(*args)
+
+    def _layout_list_items(self, list_x, list_y):
+        """
+        ドロップダウンリストの各アイテムの配置を計算する
+
+        Returns:
+            tuple: (背景の rect() の引数のリスト, text() の引数のリスト)
+        """
+        backgrounds = []
+        texts = []
+        max_chars = (self.width - 6) // pyxel.FONT_WIDTH
         visible_items = min(len(self.items), self.max_visible_items)
         for i in range(visible_items):
-            if i >= len(self.items):
-                break
-                
             item_y = list_y + i * self.item_height
             
             # アイテムの背景色（選択状態・ホバー状態に応じて変更）
             if i == self.selected_index:
                 # 選択中のアイテム
-                pyxel.rect(list_x + 1, item_y, self.width - 2, self.item_height, pyxel.COLOR_CYAN)
+                backgrounds.append((list_x + 1, item_y, self.width - 2, self.item_height, pyxel.COLOR_CYAN))
             elif i == self.hover_item_index:
                 # ホバー中のアイテム
-                pyxel.rect(list_x + 1, item_y, self.width - 2, self.item_height, pyxel.COLOR_LIGHT_BLUE)
+                backgrounds.append((list_x + 1, item_y, self.width - 2, self.item_height, pyxel.COLOR_LIGHT_BLUE))
             
-            # アイテムテキスト
+            # アイテムテキスト（長すぎる場合は切り詰め）
             text_x = list_x + 3
             text_y = item_y + (self.item_height - pyxel.FONT_HEIGHT) // 2
-            
-            item_text = self.items[i]
-            max_chars = (self.width - 6) // pyxel.FONT_WIDTH
-            if len(item_text) > max_chars:
-                item_text = item_text[:max_chars-3] + "..."
-                
-            pyxel.text(text_x, text_y, item_text, pyxel.COLOR_BLACK)
+            texts.append((text_x, text_y, truncate_text(self.items[i], max_chars), pyxel.COLOR_BLACK))
+        return backgrounds, texts
 
 
 class CheckboxWidget(WidgetBase):
@@ -789,28 +1315,24 @@ class CheckboxWidget(WidgetBase):
             self.is_checked = checked
             # イベント発火（動的属性システム）
             if hasattr(self, 'on_checked_changed'):
-                print(f"[DEBUG] CheckboxWidget: Firing on_checked_changed event: checked={self.is_checked}")
+                logger.debug("CheckboxWidget: Firing on_checked_changed event: checked=%s", self.is_checked)
                 self.on_checked_changed(self.is_checked)
     
-    def update(self):
-        """マウス操作の処理"""
-        mx, my = pyxel.mouse_x, pyxel.mouse_y
-        dx, dy = self.dialog.x, self.dialog.y
-        
-        # チェックボックス全体の範囲チェック
-        widget_x = dx + self.x
-        widget_y = dy + self.y
-        
-        self.is_hover = (widget_x <= mx < widget_x + self.width and 
-                        widget_y <= my < widget_y + self.height)
-        
-        # クリック処理
-        if self.is_hover and pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-            # チェック状態を反転
-            self.set_checked(not self.is_checked)
+    interactive = True
+
+    def on_mouse_move(self, mx, my):
+        self.is_hover = True
+
+    def on_mouse_leave(self):
+        self.is_hover = False
+
+    def on_mouse_down(self, mx, my):
+        # チェック状態を反転
+        self.set_checked(not self.is_checked)
     
     def draw(self):
         """チェックボックスウィジェットの描画"""
+        canvas = self.dialog.canvas
         dx, dy = self.dialog.x, self.dialog.y
         x = dx + self.x
         y = dy + self.y
@@ -823,8 +1345,8 @@ class CheckboxWidget(WidgetBase):
         bg_color = pyxel.COLOR_LIGHT_BLUE if self.is_hover else pyxel.COLOR_WHITE
         
         # チェックボックス背景
-        pyxel.rect(checkbox_x, checkbox_y, self.checkbox_size, self.checkbox_size, bg_color)
-        pyxel.rectb(checkbox_x, checkbox_y, self.checkbox_size, self.checkbox_size, pyxel.COLOR_BLACK)
+        canvas.rect(checkbox_x, checkbox_y, self.checkbox_size, self.checkbox_size, bg_color)
+        canvas.rectb(checkbox_x, checkbox_y, self.checkbox_size, self.checkbox_size, pyxel.COLOR_BLACK)
         
         # チェックマークの描画（チェックされている場合）
         if self.is_checked:
@@ -833,11 +1355,11 @@ class CheckboxWidget(WidgetBase):
             check_y = checkbox_y + self.checkbox_size // 2
             
             # チェックマークの線（簡単な✓形状）
-            pyxel.line(check_x, check_y, check_x + 3, check_y + 3, pyxel.COLOR_BLACK)
-            pyxel.line(check_x + 3, check_y + 3, check_x + 8, check_y - 2, pyxel.COLOR_BLACK)
+            canvas.line(check_x, check_y, check_x + 3, check_y + 3, pyxel.COLOR_BLACK)
+            canvas.line(check_x + 3, check_y + 3, check_x + 8, check_y - 2, pyxel.COLOR_BLACK)
         
         # テキストの描画
         if self.text:
             text_x = checkbox_x + self.checkbox_size + 4  # チェックボックスの右側に余白
             text_y = y + (self.height - pyxel.FONT_HEIGHT) // 2
-            pyxel.text(text_x, text_y, self.text, pyxel.COLOR_BLACK)
+            canvas.text(text_x, text_y, self.text, pyxel.COLOR_BLACK)